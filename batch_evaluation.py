@@ -0,0 +1,79 @@
+#This module evaluates many standard boards at once for offline analysis and simulations.
+#Boards are rows of 9 cell codes, 0 for an empty cell, 1 for X, and 2 for O, which are the board state table's base 3 digits.
+#NumPy is used when it is installed. Otherwise every board is looked up in the board state table one at a time.
+from array import array
+
+import game_actions
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EMPTY_CODE = 0
+X_CODE = 1
+O_CODE = 2
+#Winner codes use the piece codes plus these, matching the board state table
+NO_WINNER_CODE = 0
+TIE_CODE = 3
+#Indexing this with a winner or current player code gives what check_winner or compute_current_player returns
+CODE_PIECES = (None, 'X', 'O', game_actions.TIE)
+
+_BOARD_TEXT_TRANSLATION = bytes.maketrans(b" XO", bytes([EMPTY_CODE, X_CODE, O_CODE]))
+
+def is_numpy_available():
+    return numpy is not None
+
+def convert_boards_to_cell_codes(boards):
+    """Converts board strings of 'X', 'O', and ' ' characters into an (n, 9) int8 array, or a list of bytes objects without NumPy"""
+    cell_codes = [board.encode().translate(_BOARD_TEXT_TRANSLATION) for board in boards]
+    if numpy is None:
+        return cell_codes
+    return numpy.frombuffer(b"".join(cell_codes), dtype=numpy.int8).reshape(-1, 9)
+
+def evaluate_boards(boards):
+    """
+        Returns (winner_codes, current_player_codes, legal_move_masks) for a batch of boards given as an (n, 9) int8 array or a sequence of rows of 9 cell codes.
+        Each result has one entry per board, holding the code of what check_winner or compute_current_player returns or the board's legal move mask
+    """
+    if numpy is None:
+        return _evaluate_boards_one_at_a_time(boards)
+    return _evaluate_boards_with_numpy(boards)
+
+def _evaluate_boards_one_at_a_time(boards):
+    table = game_actions.get_board_state_table()
+    winner_codes = array('b')
+    current_player_codes = array('b')
+    legal_move_masks = array('H')
+    for board in boards:
+        index = 0
+        for cell_code in board:
+            index = 3*index + cell_code
+        winner_codes.append(table.winner_codes[index])
+        current_player_codes.append(table.current_player_codes[index])
+        legal_move_masks.append(table.legal_move_masks[index])
+    return winner_codes, current_player_codes, legal_move_masks
+
+if numpy is not None:
+    _WINNING_LINE_CELLS = numpy.array(game_actions.WINNING_LINES)
+    _CELL_BITS = numpy.array([1 << cell for cell in range(9)], dtype=numpy.uint16)
+
+def _evaluate_boards_with_numpy(boards):
+    boards = numpy.asarray(boards, dtype=numpy.int8).reshape(-1, 9)
+    #With X as 1 and O as -1, a line summing to 3 or -3 is complete
+    signed_cells = numpy.where(boards == O_CODE, numpy.int8(-1), boards)
+    line_sums = signed_cells[:, _WINNING_LINE_CELLS].sum(axis=2, dtype=numpy.int8)
+    completed_lines = numpy.abs(line_sums) == 3
+    #check_winner reports the first complete line in WINNING_LINES order, which matters for boards where both pieces have one
+    first_completed_lines = completed_lines.argmax(axis=1)
+    first_line_sums = line_sums[numpy.arange(len(boards)), first_completed_lines]
+    empty_cells = boards == EMPTY_CODE
+    is_full = ~empty_cells.any(axis=1)
+    winner_codes = numpy.where(first_line_sums == 3, X_CODE, O_CODE).astype(numpy.int8)
+    winner_codes[~completed_lines.any(axis=1)] = NO_WINNER_CODE
+    winner_codes[~completed_lines.any(axis=1) & is_full] = TIE_CODE
+    x_counts = (boards == X_CODE).sum(axis=1)
+    o_counts = (boards == O_CODE).sum(axis=1)
+    current_player_codes = numpy.where(x_counts == o_counts, X_CODE, O_CODE).astype(numpy.int8)
+    legal_move_masks = (empty_cells*_CELL_BITS).sum(axis=1, dtype=numpy.uint16)
+    return winner_codes, current_player_codes, legal_move_masks
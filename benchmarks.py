@@ -0,0 +1,939 @@
+#!/usr/bin/env python3
+#Benchmarks for performance sensitive parts of the server and game logic.
+#Run every benchmark with 'python benchmarks.py' or specific ones by listing their names, such as 'python benchmarks.py rate-limiting'.
+
+import sys
+import time
+import selectors
+import argparse
+import statistics
+import random
+import itertools
+import os
+import tempfile
+import tracemalloc
+import sqlite3
+
+import protocol
+import protocol_definitions
+import connection_handler
+from connection_scheduling import ConnectionScheduler
+from logging_utilities import Logger
+from rate_limiting import RateLimitConfiguration, ConnectionRateLimiter
+from mock_socket import MockPreloadedSocket, MockIgnoringSelector
+from connection_table import ConnectionTable, ConnectionTableEntry
+from chat import ChatRoom, ChatBatcher
+import game_actions
+from game_manager import Game, GameHandler
+from bitboard import BitBoard
+from grid_board import GridBoard, compute_winner_by_scanning
+import solver
+import hints
+from database_management import create_database_at_path, Account, ACCOUNT_TABLE, retrieve_account_with_name_from_database_at_path, close_database_connections, AccountCache, configure_account_cache, get_account_cache
+from database_management import insert_account_into_database_at_path, import_accounts_into_database_at_path, export_accounts_from_database_at_path
+from game_persistence import GamePersistenceWriter, restore_games_from_database_at_path
+from game_archive import encode_game_record, MemoryMappedGameRecords, GAME_RECORD_SIZE
+from array import array
+import batch_evaluation
+from simulation import SelfPlaySimulator, create_random_policy
+from tournament import run_tournament
+from shared_game_store import SharedGameStore, SLOT_SIZE
+from timers import TimerScheduler
+from matchmaking import MatchmakingQueue
+from ratings import RatingTable, RatingWriter, PlayerRating, WIN_SCORE, TIE_SCORE, LOSS_SCORE
+from testing_utilities import compute_percentile
+
+BENCHMARKS = {}
+
+def register_benchmark(name):
+    """Registers the decorated function as the benchmark with the specified name"""
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+def format_microseconds(seconds):
+    return f"{seconds*1e6:.1f}us"
+
+class NullLogger(Logger):
+    """A logger that discards everything so that logging does not affect measurements"""
+    def __init__(self):
+        self.debugging_mode = False
+
+def create_benchmark_connection_handler(address, callback_handler, *, rate_limiter=None, message_budget=None, logger=None):
+    """Creates a server side connection handler around a MockPreloadedSocket"""
+    sock = MockPreloadedSocket(address)
+    connection_information = connection_handler.ConnectionInformation(sock, address)
+    return connection_handler.ConnectionHandler(
+        MockIgnoringSelector(),
+        connection_information,
+        logger if logger is not None else NullLogger(),
+        callback_handler,
+        is_server=True,
+        rate_limiter=rate_limiter,
+        message_budget=message_budget
+    )
+
+def pack_client_message(type_code, *values):
+    """Packs a message the way a client would send it to the server"""
+    return protocol_definitions.SERVER_PROTOCOL_MAP.pack_values_given_type_code(type_code, *values)
+
+def _measure_move_latency_with_flooding_client(rate_limit_configuration, iterations, light_client_count, *, is_flooding=True):
+    handlers = {}
+    latencies = []
+    iteration_start = [0.0]
+    help_response = protocol.Message(protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE, ("help text " * 20,))
+    def respond_to_help(values, connection_information):
+        handlers[connection_information.text_representation].send_message(help_response)
+    def respond_to_move(values, connection_information):
+        latencies.append(time.perf_counter() - iteration_start[0])
+    callback_handler = protocol.ProtocolCallbackHandler()
+    callback_handler.register_callback_with_protocol(respond_to_help, protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
+    callback_handler.register_callback_with_protocol(respond_to_move, protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE)
+    def create_handler(index):
+        rate_limiter = ConnectionRateLimiter(rate_limit_configuration) if rate_limit_configuration else None
+        handler = create_benchmark_connection_handler(("client", index), callback_handler, rate_limiter=rate_limiter)
+        handlers[handler.get_connection_information().text_representation] = handler
+        return handler
+    flooding_handler = create_handler(0)
+    light_handlers = [create_handler(index + 1) for index in range(light_client_count)]
+    help_frame = pack_client_message(protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
+    move_frame = pack_client_message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, 1, 5)
+    for _ in range(iterations):
+        if is_flooding:
+            flooding_handler.connection_information.sock.load(help_frame*4096)
+        for handler in light_handlers:
+            handler.connection_information.sock.load(move_frame)
+        iteration_start[0] = time.perf_counter()
+        #The flooding client's socket is ready first, as it would be in the worst case for the selector loop
+        if is_flooding:
+            flooding_handler.read()
+            flooding_handler.message_sender.write()
+        for handler in light_handlers:
+            handler.read()
+    return latencies
+
+@register_benchmark("rate-limiting")
+def benchmark_rate_limiting():
+    """Measures move dispatch latency for light clients while one client floods help requests"""
+    iterations = 200
+    light_client_count = 10
+    configurations = [
+        ("baseline without the flooding client", None, False),
+        ("no rate limiting", None, True),
+        ("20 messages/s, burst 20", RateLimitConfiguration(20, 20), True),
+        ("help limited to 2/s", RateLimitConfiguration(1000, 1000, {protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE: (2, 2)}), True),
+    ]
+    print(f"Move latency for {light_client_count} light clients while one client floods 4096 help frames per loop iteration")
+    for name, configuration, is_flooding in configurations:
+        latencies = _measure_move_latency_with_flooding_client(configuration, iterations, light_client_count, is_flooding=is_flooding)
+        print(
+            f"  {name}: p50 {format_microseconds(compute_percentile(latencies, 50))}, "
+            f"p99 {format_microseconds(compute_percentile(latencies, 99))}, "
+            f"mean {format_microseconds(statistics.mean(latencies))}"
+        )
+
+def _measure_dispatch_latency_with_skewed_load(message_budget, heavy_message_count, light_client_count, rounds):
+    latencies = []
+    load_times = {}
+    def respond_to_help(values, connection_information):
+        pass
+    def respond_to_move(values, connection_information):
+        latencies.append(time.perf_counter() - load_times[connection_information.text_representation])
+    callback_handler = protocol.ProtocolCallbackHandler()
+    callback_handler.register_callback_with_protocol(respond_to_help, protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
+    callback_handler.register_callback_with_protocol(respond_to_move, protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE)
+    scheduler = ConnectionScheduler(lambda handler: handler.close())
+    heavy_handler = create_benchmark_connection_handler(("heavy", 0), callback_handler, message_budget=message_budget)
+    light_handlers = [create_benchmark_connection_handler(("light", index), callback_handler, message_budget=message_budget) for index in range(light_client_count)]
+    handlers = [heavy_handler] + light_handlers
+    help_frame = pack_client_message(protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
+    move_frame = pack_client_message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, 1, 5)
+    for _ in range(rounds):
+        heavy_handler.connection_information.sock.load(help_frame*heavy_message_count)
+        expected_latency_count = len(latencies) + light_client_count
+        for handler in light_handlers:
+            handler.connection_information.sock.load(move_frame)
+            load_times[handler.connection_information.text_representation] = time.perf_counter()
+        while len(latencies) < expected_latency_count or scheduler.has_ready_connections():
+            scheduler.service_ready_connections()
+            for handler in handlers:
+                if handler.connection_information.sock.has_received_bytes():
+                    scheduler.process_events(handler, selectors.EVENT_READ)
+    return latencies
+
+@register_benchmark("fair-scheduling")
+def benchmark_fair_scheduling():
+    """Measures move dispatch latency for light clients with one heavy client for different per connection message budgets"""
+    heavy_message_count = 4096
+    light_client_count = 100
+    rounds = 20
+    print(f"Move dispatch latency for {light_client_count} light clients while one heavy client sends {heavy_message_count} messages per round")
+    for message_budget in [None, 128, 32, 8]:
+        latencies = _measure_dispatch_latency_with_skewed_load(message_budget, heavy_message_count, light_client_count, rounds)
+        print(
+            f"  message budget {message_budget}: p50 {format_microseconds(compute_percentile(latencies, 50))}, "
+            f"p99 {format_microseconds(compute_percentile(latencies, 99))}"
+        )
+
+@register_benchmark("spectator-fan-out")
+def benchmark_spectator_fan_out():
+    """Compares packing a board update once for every spectator against packing it for each spectator"""
+    updates = 20
+    callback_handler = protocol.ProtocolCallbackHandler()
+    connection_table = ConnectionTable({})
+    print(f"Cost of queueing {updates} board updates to every spectator")
+    for spectator_count in [100, 1000, 10000]:
+        entries = []
+        for index in range(spectator_count):
+            handler = create_benchmark_connection_handler(("spectator", index), callback_handler)
+            entries.append(ConnectionTableEntry(handler, None))
+        game_message = protocol.Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, (1, 3, "X   O    "))
+        start = time.perf_counter()
+        for _ in range(updates):
+            for entry in entries:
+                entry.send_message_through_connection(game_message)
+        per_recipient_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(updates):
+            connection_table.broadcast_message_to_entries(game_message, entries)
+        encode_once_time = time.perf_counter() - start
+        deliveries = updates*spectator_count
+        print(
+            f"  {spectator_count} spectators: pack per recipient {format_microseconds(per_recipient_time/deliveries)}/delivery, "
+            f"pack once {format_microseconds(encode_once_time/deliveries)}/delivery "
+            f"({per_recipient_time/encode_once_time:.1f}x faster)"
+        )
+
+def _write_all_queued_bytes(entries):
+    """Writes everything queued for the entries and returns the number of send calls"""
+    send_calls = 0
+    for entry in entries:
+        sender = entry.connection_handler.message_sender
+        while sender.has_queued_bytes():
+            sender.write()
+            send_calls += 1
+    return send_calls
+
+@register_benchmark("chat-broadcast")
+def benchmark_chat_broadcast():
+    """Measures chat throughput in a 500 member room with and without batching messages per recipient"""
+    member_count = 500
+    flush_window_message_count = 50
+    windows = 10
+    callback_handler = protocol.ProtocolCallbackHandler()
+    connection_table = ConnectionTable({})
+    room = ChatRoom()
+    for index in range(member_count):
+        room.add_member(ConnectionTableEntry(create_benchmark_connection_handler(("member", index), callback_handler), None))
+    members = list(room.get_members())
+    messages = [protocol.Message(protocol_definitions.CHAT_MESSAGE_PROTOCOL_TYPE_CODE, (f"user{index % 20}", f"chat message number {index}")) for index in range(flush_window_message_count)]
+    total_message_count = flush_window_message_count*windows
+    print(f"{total_message_count} chat messages to a {member_count} member room, {flush_window_message_count} per flush window")
+
+    start = time.perf_counter()
+    send_calls = 0
+    for _ in range(windows):
+        for message in messages:
+            message_bytes = connection_table.pack_message(message)
+            room.record_message(message, message_bytes)
+            for member in members:
+                member.send_packed_message_through_connection(message, message_bytes)
+            send_calls += _write_all_queued_bytes(members)
+    elapsed_time = time.perf_counter() - start
+    print(f"  unbatched: {total_message_count/elapsed_time:.0f} messages/s, {total_message_count*member_count/elapsed_time:.0f} deliveries/s, {send_calls} send calls")
+
+    batcher = ChatBatcher()
+    start = time.perf_counter()
+    send_calls = 0
+    for _ in range(windows):
+        for message in messages:
+            message_bytes = connection_table.pack_message(message)
+            room.record_message(message, message_bytes)
+            batcher.queue_message_for_recipients(message, message_bytes, members)
+        batcher.flush()
+        send_calls += _write_all_queued_bytes(members)
+    elapsed_time = time.perf_counter() - start
+    print(f"  batched: {total_message_count/elapsed_time:.0f} messages/s, {total_message_count*member_count/elapsed_time:.0f} deliveries/s, {send_calls} send calls")
+
+class ListBoard:
+    """The list based board representation Game used before the bitboard engine, kept as a baseline for comparison"""
+    def __init__(self):
+        self.board = [' ' for _ in range(9)]
+
+    def is_cell_empty(self, index):
+        return self.board[index] == ' '
+
+    def place_piece(self, index, piece):
+        self.board[index] = piece
+
+    def compute_winner(self):
+        return game_actions.check_winner(self.board)
+
+    def compute_text(self):
+        return "".join(self.board)
+
+def create_random_move_orders(count, seed=0):
+    """Returns count random orders in which to try the 9 cells, numbered 1 through 9"""
+    generator = random.Random(seed)
+    permutations = list(itertools.permutations(range(1, 10)))
+    return [permutations[generator.randrange(len(permutations))] for _ in range(count)]
+
+def _play_random_games(move_orders, play_game):
+    start = time.perf_counter()
+    move_count = 0
+    for move_order in move_orders:
+        move_count += play_game(move_order)
+    return time.perf_counter() - start, move_count
+
+def _play_game_with_board(move_order, create_board):
+    game = Game("Bob", "Alice")
+    game.board = create_board()
+    for move_number, move in enumerate(move_order, 1):
+        game.make_move(game.current_turn, move)
+        game.compute_text()
+        if game.check_winner() is not None:
+            return move_number
+    return len(move_order)
+
+def _play_board_only(move_order, create_board):
+    board = create_board()
+    piece = 'X'
+    for move_number, move in enumerate(move_order, 1):
+        board.place_piece(move - 1, piece)
+        board.compute_text()
+        if board.compute_winner() is not None:
+            return move_number
+        piece = 'O' if piece == 'X' else 'X'
+    return len(move_order)
+
+@register_benchmark("bitboard")
+def benchmark_bitboard():
+    """Plays a million random games with the list board representation and with Game's bitboard engine"""
+    game_count = 1000000
+    move_orders = create_random_move_orders(game_count)
+    print(f"{game_count} random games, rendering the text and checking for a winner after every move")
+    for name, create_board in [("list board", ListBoard), ("bitboard", BitBoard)]:
+        elapsed_time, move_count = _play_random_games(move_orders, lambda move_order: _play_game_with_board(move_order, create_board))
+        print(f"  {name} through Game: {elapsed_time:.2f}s, {game_count/elapsed_time:.0f} games/s, {format_microseconds(elapsed_time/move_count)}/move")
+        elapsed_time, move_count = _play_random_games(move_orders, lambda move_order: _play_board_only(move_order, create_board))
+        print(f"  {name} alone: {elapsed_time:.2f}s, {game_count/elapsed_time:.0f} games/s, {format_microseconds(elapsed_time/move_count)}/move")
+
+def _measure_calls_per_board(function, boards):
+    start = time.perf_counter()
+    for board in boards:
+        function(board)
+    return (time.perf_counter() - start)/len(boards)
+
+@register_benchmark("board-state-table")
+def benchmark_board_state_table():
+    """Measures building the 3^9 board state table, its size, and the per call cost of the functions using it"""
+    from game_actions import _check_winner_by_scanning_lines, _compute_current_player_by_counting
+    start = time.perf_counter()
+    table = game_actions.BoardStateTable()
+    build_time = time.perf_counter() - start
+    print(f"Build time: {build_time*1000:.1f}ms")
+    print(f"Compact arrays: {table.compute_size_in_bytes()/1024:.1f}KiB, with board indexes computed from the board text")
+    table = game_actions.get_board_state_table()
+    generator = random.Random(0)
+    sample_boards = [game_actions.convert_board_index_to_board(generator.randrange(game_actions.NUMBER_OF_BOARD_STATES)) for _ in range(200000)]
+    #Boards arrive as new string objects decoded from messages, so the measurement uses copies without cached hashes
+    fresh_boards = lambda: ["".join(list(board)) for board in sample_boards]
+    comparisons = [
+        ("check_winner", game_actions.check_winner, _check_winner_by_scanning_lines),
+        ("current player", lambda board: table.get_current_player(game_actions.compute_board_index(board)), _compute_current_player_by_counting),
+        ("winner and current player together", game_actions.compute_winner_and_current_player, lambda board: (_check_winner_by_scanning_lines(board), _compute_current_player_by_counting(board))),
+    ]
+    for name, table_function, scanning_function in comparisons:
+        table_time = _measure_calls_per_board(table_function, fresh_boards())
+        scanning_time = _measure_calls_per_board(scanning_function, fresh_boards())
+        print(f"  {name}: table {format_microseconds(table_time)}/call, without table {format_microseconds(scanning_time)}/call ({scanning_time/table_time:.1f}x)")
+
+def _play_random_grid_games(board_size, winning_length, game_count, check_winner):
+    """Plays random games with the winner checked by check_winner(board, index) after every move and returns the time and move count"""
+    generator = random.Random(0)
+    move_orders = []
+    for _ in range(game_count):
+        cells = list(range(board_size*board_size))
+        generator.shuffle(cells)
+        move_orders.append(cells)
+    start = time.perf_counter()
+    move_count = 0
+    for move_order in move_orders:
+        board = GridBoard(board_size, winning_length)
+        piece = 'X'
+        for index in move_order:
+            board.place_piece(index, piece)
+            move_count += 1
+            if check_winner(board, index) is not None:
+                break
+            piece = 'O' if piece == 'X' else 'X'
+    return time.perf_counter() - start, move_count
+
+@register_benchmark("board-size")
+def benchmark_board_size():
+    """Compares the per move cost of checking for a winner through the last move with scanning the whole board as boards grow"""
+    print("Random games checking for a winner after every move")
+    for board_size, winning_length, game_count in [(3, 3, 20000), (7, 4, 2000), (15, 5, 500), (31, 5, 100), (63, 5, 20)]:
+        incremental_time, incremental_moves = _play_random_grid_games(board_size, winning_length, game_count, lambda board, index: board.compute_winner())
+        scanning_time, scanning_moves = _play_random_grid_games(board_size, winning_length, max(1, game_count//10),
+            lambda board, index: compute_winner_by_scanning(board.cells.decode('ascii'), board_size, winning_length))
+        incremental_cost = incremental_time/incremental_moves
+        scanning_cost = scanning_time/scanning_moves
+        print(f"  {board_size}x{board_size}, {winning_length} in a row: last move {format_microseconds(incremental_cost)}/move, "
+              f"full scan {format_microseconds(scanning_cost)}/move ({scanning_cost/incremental_cost:.1f}x)")
+
+@register_benchmark("solver")
+def benchmark_solver():
+    """Measures solving the game once and the latency of the computer opponent's moves afterwards"""
+    start = time.perf_counter()
+    game_solver = solver.Solver()
+    warm_up_time = time.perf_counter() - start
+    print(f"Warm-up: {warm_up_time*1000:.0f}ms, {len(game_solver.transposition_table)} canonical transposition table entries, {len(game_solver.best_moves)} best move entries")
+    start = time.perf_counter()
+    searching_solver = solver.Solver.__new__(solver.Solver)
+    searching_solver.transposition_table = {}
+    searching_solver.compute_value(solver.EMPTY_BOARD)
+    print(f"  Searching the empty board without a warm table: {(time.perf_counter() - start)*1000:.0f}ms")
+
+    game_count = 100000
+    generator = random.Random(0)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(game_count):
+        game = Game("Bob", "computer")
+        while not game.is_over():
+            board = game.compute_text()
+            empty_cells = [index for index, character in enumerate(board) if character == ' ']
+            game.make_move("Bob", generator.choice(empty_cells) + 1)
+            if game.is_over():
+                break
+            move_start = time.perf_counter()
+            game.make_move("computer", game_solver.get_best_move(game.compute_text()) + 1)
+            latencies.append(time.perf_counter() - move_start)
+    elapsed_time = time.perf_counter() - start
+    print(f"{game_count} games against a random opponent in {elapsed_time:.2f}s")
+    print(f"  computer move latency: mean {format_microseconds(statistics.mean(latencies))}, p50 {format_microseconds(compute_percentile(latencies, 50))}, "
+          f"p99 {format_microseconds(compute_percentile(latencies, 99))}, max {format_microseconds(max(latencies))}")
+
+def _measure_hint_latencies(hint_table, boards):
+    latencies = []
+    for board in boards:
+        start = time.perf_counter()
+        hint_table.get_best_moves(board)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def _format_latencies(latencies):
+    return f"mean {format_microseconds(statistics.mean(latencies))}, p99 {format_microseconds(compute_percentile(latencies, 99))}, max {format_microseconds(max(latencies))}"
+
+@register_benchmark("hint-table")
+def benchmark_hint_table():
+    """Compares startup time, size, and hint latency of the memoized and memory mapped hint tables"""
+    game_actions.get_board_state_table()
+    generator = random.Random(0)
+    #A separate solver lists the reachable boards, so neither table below starts from a solved game
+    reachable_boards = list(solver.Solver().best_moves)
+    requested_boards = [generator.choice(reachable_boards) for _ in range(100000)]
+
+    start = time.perf_counter()
+    lazy_table = hints.LazyHintTable()
+    startup_time = time.perf_counter() - start
+    print(f"Lazy: startup {startup_time*1000:.2f}ms, nothing on disk")
+    print(f"  first {len(requested_boards)} requests, searching each new board: {_format_latencies(_measure_hint_latencies(lazy_table, requested_boards))}")
+    print(f"  after memoizing {lazy_table.compute_size()} boards: {_format_latencies(_measure_hint_latencies(lazy_table, requested_boards))}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "hints.bin")
+        start = time.perf_counter()
+        hints.write_hint_table_file(path)
+        print(f"Memory mapped: writing the file (solving every board) {(time.perf_counter() - start)*1000:.0f}ms, {os.path.getsize(path)/1024:.1f}KiB on disk")
+        start = time.perf_counter()
+        mapped_table = hints.MemoryMappedHintTable(path)
+        startup_time = time.perf_counter() - start
+        print(f"  startup {startup_time*1000:.2f}ms")
+        print(f"  hints: {_format_latencies(_measure_hint_latencies(mapped_table, requested_boards))}")
+        mapped_table.close()
+
+def _simulate_games_across_users(game_handler: GameHandler, game_count: int, user_count: int, should_keep_finished_games: bool):
+    """Plays random games between random pairs of users through the game handler"""
+    generator = random.Random(0)
+    usernames = [f"user{index}" for index in range(user_count)]
+    move_orders = create_random_move_orders(1000)
+    for game_number in range(game_count):
+        creator_username, invited_username = generator.sample(usernames, 2)
+        game = game_handler.create_game(creator_username, invited_username)
+        for move in move_orders[game_number % len(move_orders)]:
+            if should_keep_finished_games:
+                game.make_move(game.current_turn, move)
+            else:
+                game_handler.make_move(game, game.current_turn, move)
+            if game.is_over():
+                break
+
+def _measure_game_memory(game_count: int, user_count: int, should_keep_finished_games: bool):
+    tracemalloc.start()
+    start = time.perf_counter()
+    game_handler = GameHandler()
+    _simulate_games_across_users(game_handler, game_count, user_count, should_keep_finished_games)
+    elapsed_time = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return game_handler, memory, elapsed_time
+
+@register_benchmark("game-retention")
+def benchmark_game_retention():
+    """Measures the memory held by GameHandler after a million games across 100k users with and without archiving finished games"""
+    user_count = 100000
+    baseline_game_count = 100000
+    game_handler, memory, elapsed_time = _measure_game_memory(baseline_game_count, user_count, True)
+    print(f"Keeping finished games as Game objects: {baseline_game_count} games in {elapsed_time:.1f}s hold {memory/2**20:.1f}MiB "
+          f"({memory/len(game_handler.games):.0f} bytes per game, about {memory*10/2**20:.0f}MiB for a million games)")
+    game_count = 1000000
+    game_handler, memory, elapsed_time = _measure_game_memory(game_count, user_count, False)
+    print(f"Archiving finished games: {game_count} games in {elapsed_time:.1f}s hold {memory/2**20:.1f}MiB "
+          f"({memory/game_count:.0f} bytes per game), {len(game_handler.games)} live games, "
+          f"archive arrays {game_handler.archive.compute_size_in_bytes()/2**20:.1f}MiB for {len(game_handler.archive)} games")
+
+def _list_user_games_by_scanning(game_handler: GameHandler, username: str, start: int, count: int):
+    """Lists a user's games the way it had to be done before the per user index, by looking at every live game"""
+    user_games = [game for game in game_handler.games.values() if username in game.players]
+    return user_games[start:start + count]
+
+def _measure_calls(function, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function()
+    return (time.perf_counter() - start)/repetitions
+
+@register_benchmark("game-listing")
+def benchmark_game_listing():
+    """Measures listing a page of games for a user with 10k games among 100k live games and the cost of computing game ids"""
+    game_handler = GameHandler()
+    user_game_count = 10000
+    for index in range(user_game_count):
+        game_handler.create_game("Bob", f"opponent{index}")
+    for index in range(100000 - user_game_count):
+        game_handler.create_game(f"creator{index}", f"invited{index}")
+    page_size = 10
+    print(f"{len(game_handler.games)} live games, {game_handler.count_user_games('Bob')} of them Bob's, {page_size} games per page")
+    for name, start in [("first page", 0), ("last page", user_game_count - page_size)]:
+        scanning_time = _measure_calls(lambda: _list_user_games_by_scanning(game_handler, "Bob", start, page_size), 20)
+        index_time = _measure_calls(lambda: game_handler.get_user_games("Bob", start, page_size), 2000)
+        print(f"  {name}: scanning every game {format_microseconds(scanning_time)}, per user index {format_microseconds(index_time)} ({scanning_time/index_time:.0f}x)")
+    joined_string_game_id = lambda creator_username, invited_username: ' '.join(sorted([creator_username, invited_username]))
+    repetitions = 1000000
+    string_time = _measure_calls(lambda: joined_string_game_id("opponent5", "Bob"), repetitions)
+    tuple_time = _measure_calls(lambda: game_handler.sorted_game_id("opponent5", "Bob"), repetitions)
+    print(f"  game id: joined sorted string {format_microseconds(string_time)}, interned tuple {format_microseconds(tuple_time)}")
+    lookup_time = _measure_calls(lambda: game_handler.get_game("opponent5", "Bob"), repetitions)
+    print(f"  get_game with tuple ids: {format_microseconds(lookup_time)}")
+
+#Moves that leave every game unfinished, so all of the games stay open for the recovery measurement
+UNFINISHED_GAME_MOVES = [1, 2, 3, 5]
+
+def _play_moves_in_open_games(game_handler: GameHandler, game_count: int):
+    """Creates the games and plays UNFINISHED_GAME_MOVES in each of them, returning the number of seconds spent playing moves"""
+    for index in range(game_count):
+        game_handler.create_game(f"creator{index}", f"invited{index}")
+    games = list(game_handler.games.values())
+    start = time.perf_counter()
+    for move in UNFINISHED_GAME_MOVES:
+        for game in games:
+            game_handler.make_move(game, game.get_current_turn(), move)
+    return time.perf_counter() - start
+
+@register_benchmark("game-persistence")
+def benchmark_game_persistence():
+    """Measures move throughput with and without saving games in the background and the time to restore 100k open games"""
+    game_count = 100000
+    move_count = game_count*len(UNFINISHED_GAME_MOVES)
+    print(f"{move_count} moves across {game_count} open games")
+    elapsed_time = _play_moves_in_open_games(GameHandler(), game_count)
+    print(f"  in memory only: {move_count/elapsed_time:.0f} moves/s")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.db")
+        create_database_at_path(path)
+        writer = GamePersistenceWriter(path)
+        game_handler = GameHandler(persistence=writer)
+        start = time.perf_counter()
+        elapsed_time = _play_moves_in_open_games(game_handler, game_count)
+        writer.flush()
+        committed_time = time.perf_counter() - start
+        writer.close()
+        print(f"  with persistence: {move_count/elapsed_time:.0f} moves/s on the selector loop, "
+              f"all {writer.committed_change_count} changes committed after {committed_time:.2f}s in {writer.transaction_count} transactions "
+              f"({writer.committed_change_count/committed_time:.0f} changes/s)")
+        start = time.perf_counter()
+        restored_handler = GameHandler()
+        restored_game_count = restore_games_from_database_at_path(restored_handler, path)
+        print(f"  recovery: restored {restored_game_count} games in {time.perf_counter() - start:.2f}s")
+
+def create_random_finished_games(count, seed=0):
+    """Returns count (moves, outcome) pairs of standard games played in random move orders until they finished"""
+    games = []
+    for move_order in create_random_move_orders(count, seed):
+        board = BitBoard()
+        moves = []
+        for move_number in move_order:
+            board.place_piece(move_number - 1, 'X' if len(moves) % 2 == 0 else 'O')
+            moves.append(move_number - 1)
+            outcome = board.compute_winner()
+            if outcome is not None:
+                break
+        games.append((moves, outcome))
+    return games
+
+@register_benchmark("move-encoding")
+def benchmark_move_encoding():
+    """Measures encoding and decoding move sequences and scanning a memory mapped file of 10M game records"""
+    games = create_random_finished_games(100000)
+    start = time.perf_counter()
+    codes = [game_actions.encode_move_sequence(moves) for moves, _ in games]
+    encoding_time = (time.perf_counter() - start)/len(games)
+    start = time.perf_counter()
+    for code in codes:
+        game_actions.decode_move_sequence(code)
+    decoding_time = (time.perf_counter() - start)/len(games)
+    list_size = statistics.mean(sys.getsizeof(moves) for moves, _ in games)
+    print(f"{len(games)} random finished games: encode {format_microseconds(encoding_time)}, decode {format_microseconds(decoding_time)} per game, "
+          f"{GAME_RECORD_SIZE} bytes per record instead of about {list_size:.0f} bytes for the list object holding the moves")
+    record_count = 10000000
+    records = array('I', [encode_game_record(moves, outcome) for moves, outcome in games])*(record_count//len(games))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.records")
+        start = time.perf_counter()
+        with open(path, 'wb') as file:
+            records.tofile(file)
+        writing_time = time.perf_counter() - start
+        del records
+        memory_mapped_records = MemoryMappedGameRecords(path)
+        start = time.perf_counter()
+        outcome_counts = memory_mapped_records.count_outcomes()
+        scanning_time = time.perf_counter() - start
+        print(f"{len(memory_mapped_records)} records in {os.path.getsize(path)/2**20:.0f}MiB: written in {writing_time:.2f}s, "
+              f"outcomes counted by scanning in {scanning_time:.2f}s ({len(memory_mapped_records)/scanning_time/1e6:.1f}M records/s): {outcome_counts}")
+        memory_mapped_records.close()
+
+@register_benchmark("batch-evaluation")
+def benchmark_batch_evaluation():
+    """Compares evaluating a million random boards one at a time with the scalar functions against evaluating them as a batch"""
+    generator = random.Random(0)
+    boards = [game_actions.convert_board_index_to_board(generator.randrange(game_actions.NUMBER_OF_BOARD_STATES)) for _ in range(1000000)]
+    start = time.perf_counter()
+    for board in boards:
+        game_actions.compute_winner_and_current_player(board)
+        game_actions.compute_legal_move_mask(board)
+    scalar_time = time.perf_counter() - start
+    cell_codes = batch_evaluation.convert_boards_to_cell_codes(boards)
+    start = time.perf_counter()
+    batch_evaluation.evaluate_boards(cell_codes)
+    batch_time = time.perf_counter() - start
+    batch_name = "NumPy line sums" if batch_evaluation.is_numpy_available() else "table lookups without NumPy"
+    print(f"{len(boards)} boards: scalar functions {len(boards)/scalar_time/1e6:.2f}M boards/s, "
+          f"batch with {batch_name} {len(boards)/batch_time/1e6:.2f}M boards/s ({scalar_time/batch_time:.1f}x)")
+
+@register_benchmark("self-play")
+def benchmark_self_play():
+    """Measures game layer throughput with random policies playing through GameHandler, as a regression check for game_manager.py and game_actions.py"""
+    for board_size, winning_length, game_count in [(3, 3, 100000), (7, 4, 5000)]:
+        simulator = SelfPlaySimulator(create_random_policy(0), create_random_policy(1), concurrent_game_count=1000, board_size=board_size, winning_length=winning_length)
+        print(f"  {board_size}x{board_size} board, {winning_length} in a row: {simulator.run(game_count)}")
+        traced_results = simulator.run(game_count//10, should_trace_allocations=True)
+        print(f"    peak allocated memory over {traced_results.game_count} games: {traced_results.peak_memory/2**20:.1f}MiB")
+
+@register_benchmark("tournament-scaling")
+def benchmark_tournament_scaling():
+    """Measures how round robin throughput scales from 1 worker process to one per processor"""
+    processor_count = os.cpu_count()
+    worker_counts = sorted({1, 2, 4, 8, processor_count} & set(range(1, processor_count + 1)))
+    policy_names = ["random", "scripted", "perfect"]
+    games_per_pairing = 20000
+    print(f"Round robin between {', '.join(policy_names)} with {games_per_pairing} games per ordered pairing on {processor_count} processors")
+    single_worker_rate = None
+    for worker_count in worker_counts:
+        results = run_tournament(policy_names, games_per_pairing, worker_count=worker_count, shard_game_count=2000)
+        games_per_second = results.game_count/results.elapsed_time
+        if single_worker_rate is None:
+            single_worker_rate = games_per_second
+        print(f"  {worker_count} workers: {results.elapsed_time:.2f}s, {games_per_second:.0f} games/s, speedup {games_per_second/single_worker_rate:.2f}x")
+
+@register_benchmark("shared-game-store")
+def benchmark_shared_game_store():
+    """Compares the memory per live game and move time of Game objects in a GameHandler and slots in a SharedGameStore"""
+    game_count = 100000
+    moves = [(0, 4), (1, 0), (0, 8), (1, 2)]
+    tracemalloc.start()
+    game_handler = GameHandler()
+    for index in range(game_count):
+        game_handler.create_game(f"creator{index}", f"invited{index}")
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    games = list(game_handler.games.values())
+    start = time.perf_counter()
+    for game in games:
+        for player_index, cell in moves:
+            game_handler.make_move(game, game.players[player_index], cell + 1)
+    object_move_time = (time.perf_counter() - start)/(game_count*len(moves))
+    print(f"Game objects: {memory/game_count:.0f} bytes per live game, {format_microseconds(object_move_time)} per move")
+
+    store = SharedGameStore(game_count)
+    try:
+        slots = [store.allocate_slot(index, 2*index, 2*index + 1) for index in range(game_count)]
+        start = time.perf_counter()
+        for slot in slots:
+            for player_index, cell in moves:
+                store.make_move(slot, 2*slot + player_index, cell)
+        store_move_time = (time.perf_counter() - start)/(game_count*len(moves))
+        start = time.perf_counter()
+        for slot in slots:
+            store.read_slot(slot)
+        read_time = (time.perf_counter() - start)/game_count
+        print(f"Shared memory slots: {SLOT_SIZE} bytes per live game, {format_microseconds(store_move_time)} per move, {format_microseconds(read_time)} per lock free read")
+    finally:
+        store.close()
+
+@register_benchmark("move-clocks")
+def benchmark_move_clocks():
+    """Measures the cost of keeping 100k move clocks in the timer heap and of timed moves through GameHandler"""
+    clock_count = 100000
+    generator = random.Random(0)
+    scheduler = TimerScheduler()
+    start = time.perf_counter()
+    for key in range(clock_count):
+        scheduler.schedule(key, generator.uniform(0, 30))
+    schedule_time = (time.perf_counter() - start)/clock_count
+    #Every player moving once pushes every clock back, which only moves heap entries once their old deadlines pass
+    start = time.perf_counter()
+    for key in range(clock_count):
+        scheduler.schedule(key, 30 + generator.uniform(0, 30))
+    reschedule_time = (time.perf_counter() - start)/clock_count
+    start = time.perf_counter()
+    for _ in range(clock_count):
+        scheduler.compute_next_deadline()
+    next_deadline_time = (time.perf_counter() - start)/clock_count
+    start = time.perf_counter()
+    expired_keys = scheduler.pop_expired_keys(45)
+    pop_time = (time.perf_counter() - start)/len(expired_keys)
+    print(f"{clock_count} clocks: {format_microseconds(schedule_time)} per schedule, {format_microseconds(reschedule_time)} per reschedule, "
+          f"{format_microseconds(next_deadline_time)} per select timeout, {format_microseconds(pop_time)} per expired clock, {len(scheduler.heap)} heap entries for {len(scheduler)} clocks")
+
+    for move_time_limit in [None, 30]:
+        game_handler = GameHandler(move_time_limit=move_time_limit)
+        for index in range(clock_count):
+            game_handler.create_game(f"creator{index}", f"invited{index}")
+        games = list(game_handler.games.values())
+        start = time.perf_counter()
+        for game in games:
+            game_handler.make_move(game, game.creator_username, 5)
+            game_handler.make_move(game, game.invited_username, 1)
+        move_time = (time.perf_counter() - start)/(2*clock_count)
+        start = time.perf_counter()
+        game_handler.end_timed_out_games()
+        game_handler.compute_time_until_next_move_deadline()
+        loop_time = time.perf_counter() - start
+        name = "untimed" if move_time_limit is None else f"{move_time_limit}s per move"
+        print(f"  GameHandler with {clock_count} {name} games: {format_microseconds(move_time)} per move, {format_microseconds(loop_time)} per loop iteration timeout check")
+
+@register_benchmark("matchmaking")
+def benchmark_matchmaking():
+    """Measures pairing throughput with 100k players waiting in the matchmaking queue, against scanning every waiting player for the closest rating"""
+    player_count = 100000
+    generator = random.Random(0)
+    clock = [0.0]
+    queue = MatchmakingQueue(time_function=lambda: clock[0])
+    #Ratings far enough apart that nobody is paired, so every player stays in the queue
+    waiting_ratings = [index*(MatchmakingQueue.DEFAULT_MAXIMUM_RATING_GAP + 1) for index in range(player_count)]
+    start = time.perf_counter()
+    for index, rating in enumerate(waiting_ratings):
+        queue.enqueue(f"waiting{index}", rating)
+    waiting_time = (time.perf_counter() - start)/player_count
+    arriving_ratings = [rating + generator.uniform(-50, 50) for rating in waiting_ratings]
+    generator.shuffle(arriving_ratings)
+    start = time.perf_counter()
+    pair_count = sum(queue.enqueue(f"arriving{index}", rating) is not None for index, rating in enumerate(arriving_ratings))
+    pairing_time = time.perf_counter() - start
+    print(f"{player_count} waiting players: {format_microseconds(waiting_time)} per enqueue that waits, "
+          f"{format_microseconds(pairing_time/player_count)} per enqueue that pairs ({pair_count/pairing_time:.0f} pairs/s)")
+
+    #Scanning every waiting player, which is what pairing without buckets takes
+    waiting_players = dict((f"waiting{index}", rating) for index, rating in enumerate(waiting_ratings))
+    scanned_count = 1000
+    start = time.perf_counter()
+    for rating in arriving_ratings[:scanned_count]:
+        opponent = min(waiting_players, key=lambda username: abs(waiting_players[username] - rating))
+        del waiting_players[opponent]
+    scan_time = (time.perf_counter() - start)/scanned_count
+    print(f"  scanning every waiting player: {format_microseconds(scan_time)} per enqueue that pairs")
+
+    #Realistic ratings fill few buckets, so few players wait at once and pairing passes are short
+    queue = MatchmakingQueue(time_function=lambda: clock[0])
+    most_waiting_count = 0
+    pass_times = []
+    start = time.perf_counter()
+    for index in range(player_count):
+        queue.enqueue(f"player{index}", generator.uniform(0, 3000))
+        most_waiting_count = max(most_waiting_count, len(queue))
+        if index % 100 == 0:
+            clock[0] += 1
+            pass_start = time.perf_counter()
+            queue.pair_waiting_players_if_due()
+            pass_times.append(time.perf_counter() - pass_start)
+    enqueue_time = (time.perf_counter() - start - sum(pass_times))/player_count
+    print(f"  {player_count} players rated 0 to 3000: {format_microseconds(enqueue_time)} per enqueue, at most {most_waiting_count} waiting at once, "
+          f"{format_microseconds(statistics.mean(pass_times))} per pairing pass")
+
+@register_benchmark("ratings")
+def benchmark_ratings():
+    """Measures rating updates and leaderboard reads with 1M rated accounts, against sorting the ratings in SQL, and saving the updates in batches"""
+    account_count = 1000000
+    game_count = 100000
+    generator = random.Random(0)
+    usernames = [f"player{index}" for index in range(account_count)]
+    player_ratings = [PlayerRating(username, generator.gauss(1500, 300), 10) for username in usernames]
+    start = time.perf_counter()
+    rating_table = RatingTable(player_ratings)
+    print(f"{account_count} rated accounts loaded in {time.perf_counter() - start:.2f}s")
+    games = [(generator.choice(usernames), generator.choice(usernames), generator.choice([WIN_SCORE, TIE_SCORE, LOSS_SCORE])) for _ in range(game_count)]
+    start = time.perf_counter()
+    for first_username, second_username, first_score in games:
+        rating_table.record_game(first_username, second_username, first_score)
+    print(f"  {format_microseconds((time.perf_counter() - start)/game_count)} per rated game, {rating_table.leaderboard_rebuild_count - 1} leaderboard cache rebuilds")
+    start = time.perf_counter()
+    for _ in range(1000):
+        rating_table.get_leaderboard(10)
+    print(f"  {format_microseconds((time.perf_counter() - start)/1000)} per top 10 leaderboard from the cache")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ratings.db")
+        create_database_at_path(path)
+        writer = RatingWriter(path)
+        start = time.perf_counter()
+        for player_rating in rating_table.player_ratings.values():
+            writer.record_rating(player_rating)
+        writer.flush()
+        print(f"  {account_count} ratings saved in {time.perf_counter() - start:.2f}s in {writer.transaction_count} transactions")
+        start = time.perf_counter()
+        for first_username, second_username, _ in games:
+            writer.record_rating(rating_table.get_player_rating(first_username))
+            writer.record_rating(rating_table.get_player_rating(second_username))
+        writer.flush()
+        print(f"  {2*game_count} rating changes saved by the batched writer: {format_microseconds((time.perf_counter() - start)/(2*game_count))} per change")
+        writer.close()
+        connection = sqlite3.connect(path)
+        start = time.perf_counter()
+        for _ in range(5):
+            connection.execute("SELECT username, rating FROM rating ORDER BY rating DESC LIMIT 10").fetchall()
+        print(f"  {format_microseconds((time.perf_counter() - start)/5)} per top 10 leaderboard sorted by SQL")
+        connection.close()
+
+@register_benchmark("sign-in")
+def benchmark_sign_in():
+    """Measures account lookups like the ones made when signing in, through the persistent connections against connecting for every lookup"""
+    account_count = 100000
+    lookup_count = 20000
+    generator = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "accounts.db")
+        create_database_at_path(path)
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.executemany(f"INSERT INTO {ACCOUNT_TABLE.name} VALUES (?, ?)", ((f"player{index}", "password") for index in range(account_count)))
+        connection.close()
+        usernames = [f"player{generator.randrange(2*account_count)}" for _ in range(lookup_count)]
+        #Every lookup reaches the database, so only the connections are compared
+        configure_account_cache(0)
+
+        def retrieve_account_with_new_connection(name):
+            connection = sqlite3.connect(path)
+            try:
+                values = connection.execute(f"SELECT * FROM {ACCOUNT_TABLE.name} WHERE name = ?", (name,)).fetchone()
+            finally:
+                connection.close()
+            return Account(*values) if values else None
+
+        for name, retrieve_account in [
+            ("connecting for every lookup", retrieve_account_with_new_connection),
+            ("persistent connection", lambda name: retrieve_account_with_name_from_database_at_path(name, path)),
+        ]:
+            start = time.perf_counter()
+            for username in usernames:
+                retrieve_account(username)
+            elapsed_time = time.perf_counter() - start
+            print(f"{name}: {lookup_count/elapsed_time:.0f} sign in lookups/s")
+        close_database_connections()
+        configure_account_cache(AccountCache.DEFAULT_MAXIMUM_SIZE)
+
+@register_benchmark("account-cache")
+def benchmark_account_cache():
+    """Measures sign in lookups whose names follow a Zipfian distribution, with a tenth of them for names without accounts, with and without the account cache"""
+    account_count = 100000
+    lookup_count = 200000
+    generator = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "accounts.db")
+        create_database_at_path(path)
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.executemany(f"INSERT INTO {ACCOUNT_TABLE.name} VALUES (?, ?)", ((f"player{index}", "password") for index in range(account_count)))
+        connection.close()
+        #The popularity of the rank k name is proportional to 1/k, and names past the accounts have none
+        ranks = range(1, account_count + account_count//10 + 1)
+        names = [f"player{rank - 1}" if rank <= account_count else f"unknown{rank}" for rank in generator.sample(ranks, len(ranks))]
+        cumulative_weights = list(itertools.accumulate(1/rank for rank in ranks))
+        lookup_names = generator.choices(names, cum_weights=cumulative_weights, k=lookup_count)
+        for maximum_size in [0, 1000, AccountCache.DEFAULT_MAXIMUM_SIZE]:
+            configure_account_cache(maximum_size)
+            start = time.perf_counter()
+            for name in lookup_names:
+                retrieve_account_with_name_from_database_at_path(name, path)
+            elapsed_time = time.perf_counter() - start
+            account_cache = get_account_cache()
+            print(f"{maximum_size} cached names: {lookup_count/elapsed_time:.0f} sign in lookups/s, {account_cache.compute_hit_rate():.1%} hit rate, {account_cache.eviction_count} evictions")
+        close_database_connections()
+        configure_account_cache(AccountCache.DEFAULT_MAXIMUM_SIZE)
+
+@register_benchmark("bulk-accounts")
+def benchmark_bulk_accounts():
+    """Measures importing and exporting 1M accounts in chunks, against inserting accounts one at a time"""
+    account_count = 1000000
+    single_insert_count = 2000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "accounts.db")
+        create_database_at_path(path)
+        start = time.perf_counter()
+        for index in range(single_insert_count):
+            insert_account_into_database_at_path(Account(f"single{index}", "password"), path)
+        single_insert_time = (time.perf_counter() - start)/single_insert_count
+        print(f"one account per insert: {1/single_insert_time:.0f} accounts/s, so {account_count*single_insert_time:.0f}s for {account_count} accounts")
+        tracemalloc.start()
+        start = time.perf_counter()
+        inserted_count = import_accounts_into_database_at_path((Account(f"player{index}", "password") for index in range(account_count)), path)
+        import_time = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"bulk import: {inserted_count} accounts in {import_time:.2f}s ({inserted_count/import_time:.0f} accounts/s), peak allocated memory {peak_memory/2**20:.1f}MiB")
+        tracemalloc.start()
+        start = time.perf_counter()
+        exported_count = sum(1 for _ in export_accounts_from_database_at_path(path))
+        export_time = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"streaming export: {exported_count} accounts in {export_time:.2f}s ({exported_count/export_time:.0f} accounts/s), peak allocated memory {peak_memory/2**20:.1f}MiB")
+        close_database_connections()
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmarks.py', description='Runs performance benchmarks.')
+    parser.add_argument("names", nargs="*", help=f"the benchmarks to run. Options: {', '.join(BENCHMARKS)}")
+    arguments = parser.parse_args()
+    names = arguments.names if arguments.names else list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark {name}!")
+            sys.exit(1)
+    for name in names:
+        print(f"=== {name} ===")
+        BENCHMARKS[name]()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#This module represents tictactoe boards as a pair of 9 bit integers, one for each piece.
+#Bit i of a bitboard is set when the piece occupies cell i, where cells are numbered from 0 to 8 row by row.
+import game_actions
+
+NUMBER_OF_CELLS = 9
+FULL_BOARD_MASK = (1 << NUMBER_OF_CELLS) - 1
+
+def _compute_line_mask(cells):
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+WIN_MASKS = tuple(_compute_line_mask(line) for line in game_actions.WINNING_LINES)
+
+def _compute_winning_bitboard_table():
+    """Returns a table with a 1 at every bitboard index containing a complete line and a 0 elsewhere"""
+    table = bytearray(1 << NUMBER_OF_CELLS)
+    for bitboard in range(len(table)):
+        for mask in WIN_MASKS:
+            if bitboard & mask == mask:
+                table[bitboard] = 1
+                break
+    return bytes(table)
+
+#Indexing this with a bitboard tells you if the bitboard contains a complete line without checking the lines one at a time
+WINNING_BITBOARD_TABLE = _compute_winning_bitboard_table()
+
+def compute_winner_from_bitboards(x_bitboard: int, o_bitboard: int):
+    """Returns the winning piece, game_actions.TIE if the board is full without a winner, or None if the game is unfinished"""
+    if WINNING_BITBOARD_TABLE[x_bitboard]:
+        return 'X'
+    if WINNING_BITBOARD_TABLE[o_bitboard]:
+        return 'O'
+    if x_bitboard | o_bitboard == FULL_BOARD_MASK:
+        return game_actions.TIE
+    return None
+
+def convert_board_to_bitboards(board):
+    """Converts a board given as a string or list of 'X', 'O', and ' ' characters into an (x_bitboard, o_bitboard) tuple"""
+    x_bitboard = 0
+    o_bitboard = 0
+    for index, character in enumerate(board):
+        if character == 'X':
+            x_bitboard |= 1 << index
+        elif character == 'O':
+            o_bitboard |= 1 << index
+    return x_bitboard, o_bitboard
+
+def convert_bitboards_to_text(x_bitboard: int, o_bitboard: int):
+    """Converts bitboards into a board string of 'X', 'O', and ' ' characters"""
+    characters = []
+    for index in range(NUMBER_OF_CELLS):
+        cell_mask = 1 << index
+        if x_bitboard & cell_mask:
+            characters.append('X')
+        elif o_bitboard & cell_mask:
+            characters.append('O')
+        else:
+            characters.append(' ')
+    return "".join(characters)
+
+class BitBoard:
+    """A tictactoe board stored as one bitboard for each piece"""
+    __slots__ = ('x_bitboard', 'o_bitboard', 'text')
+
+    def __init__(self, x_bitboard: int = 0, o_bitboard: int = 0):
+        self.x_bitboard = x_bitboard
+        self.o_bitboard = o_bitboard
+        self.text = convert_bitboards_to_text(x_bitboard, o_bitboard)
+
+    def is_cell_empty(self, index: int):
+        """Returns true if index refers to a cell on the board that neither piece occupies"""
+        return 0 <= index < NUMBER_OF_CELLS and not (self.x_bitboard | self.o_bitboard) & (1 << index)
+
+    def place_piece(self, index: int, piece: str):
+        """Puts the piece ('X' or 'O') on the cell at the index, which must be empty"""
+        if piece == 'X':
+            self.x_bitboard |= 1 << index
+        else:
+            self.o_bitboard |= 1 << index
+        #Updating the cached text here keeps rendering from having to look at every cell
+        self.text = self.text[:index] + piece + self.text[index + 1:]
+
+    def compute_winner(self):
+        """Returns the winning piece, game_actions.TIE, or None if the game is unfinished"""
+        return compute_winner_from_bitboards(self.x_bitboard, self.o_bitboard)
+
+    def compute_text(self):
+        """Returns the board as a string of 'X', 'O', and ' ' characters"""
+        return self.text
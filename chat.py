@@ -0,0 +1,91 @@
+import time
+from collections import deque
+
+from protocol import Message
+
+class ChatRoom:
+    #The default number of recent chat messages kept for members who join later
+    DEFAULT_HISTORY_SIZE = 50
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE):
+        """
+            Keeps track of the members of a chat room and its most recent messages
+            history_size: the number of recent messages to keep. Older messages are discarded as new ones arrive
+        """
+        self.members = set()
+        self.history = deque(maxlen=history_size)
+
+    def add_member(self, member):
+        """Adds a member, such as a connection table entry, to the room"""
+        self.members.add(member)
+
+    def remove_member(self, member):
+        """Removes the member if present and otherwise fails silently"""
+        self.members.discard(member)
+
+    def get_members(self):
+        return self.members
+
+    def record_message(self, message: Message, message_bytes: bytes):
+        """Adds the message and its packed bytes to the history"""
+        self.history.append((message, message_bytes))
+
+    def get_history(self):
+        """Returns a list of (message, message_bytes) tuples from oldest to newest"""
+        return list(self.history)
+
+class ChatBatcher:
+    #The default amount of time in seconds chat messages are held so that they can be sent together
+    DEFAULT_FLUSH_INTERVAL = 0.05
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL, time_function=time.monotonic):
+        """
+            Accumulates packed chat messages for each recipient so that everything a recipient receives during a flush interval is sent in one write
+            flush_interval: the amount of time in seconds between the first queued message and the flush
+            time_function: the function used to get the current time in seconds, which is settable to aid with testing
+        """
+        self.flush_interval = flush_interval
+        self.time_function = time_function
+        #Maps recipients to a tuple of a list of messages and a list of the corresponding packed bytes
+        self.pending = {}
+        self.flush_deadline = None
+
+    def queue_message_for_recipients(self, message: Message, message_bytes: bytes, recipients):
+        """
+            Queues a message that was packed once for every recipient
+            message: the Message object, which is kept for logging
+            message_bytes: the packed message
+            recipients: an iterable of connection table entries
+        """
+        if self.flush_deadline is None:
+            self.flush_deadline = self.time_function() + self.flush_interval
+        for recipient in recipients:
+            pending = self.pending.get(recipient)
+            if pending is None:
+                pending = ([], [])
+                self.pending[recipient] = pending
+            pending[0].append(message)
+            pending[1].append(message_bytes)
+
+    def discard_recipient(self, recipient):
+        """Forgets the messages queued for a recipient that will never receive them, such as a closed connection"""
+        self.pending.pop(recipient, None)
+
+    def has_pending_messages(self):
+        return self.flush_deadline is not None
+
+    def flush(self):
+        """Sends every recipient its queued messages as a single chunk of bytes"""
+        for recipient, (messages, message_bytes_list) in self.pending.items():
+            recipient.send_packed_messages_through_connection(messages, b"".join(message_bytes_list))
+        self.pending = {}
+        self.flush_deadline = None
+
+    def flush_if_due(self):
+        """Flushes if the flush interval for the oldest queued message has passed"""
+        if self.flush_deadline is not None and self.time_function() >= self.flush_deadline:
+            self.flush()
+
+    def compute_time_until_flush(self):
+        """Returns the number of seconds until the next flush or None if there is nothing to flush"""
+        if self.flush_deadline is None:
+            return None
+        return max(0, self.flush_deadline - self.time_function())
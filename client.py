@@ -15,8 +15,9 @@ import logging_utilities
 import protocol_definitions
 import protocol
 import game_actions
+import grid_board
 
-CLIENT_COMMANDS = set(['quit', 'join', 'create', 'move', 'exit', 'login', 'register', 'help'])
+CLIENT_COMMANDS = set(['quit', 'join', 'create', 'move', 'exit', 'login', 'register', 'help', 'spectate', 'chat', 'hint', 'games', 'select', 'queue', 'unqueue', 'leaderboard'])
 
 def create_socket_from_address(target_address):
     """Creates a client socket that connects to the specified address"""
@@ -25,6 +26,9 @@ def create_socket_from_address(target_address):
     sock.connect_ex(target_address)
     return sock
 
+#Page numbers for the games command are sent in two bytes
+MAXIMUM_GAMES_PAGE = 2**16 - 1
+
 def _parse_two_space_separated_values(text):
     """Parses text into 2 space separated values. Returns None on failure."""
     values = text.split(" ", maxsplit=1)
@@ -32,6 +36,40 @@ def _parse_two_space_separated_values(text):
         return None
     return values
 
+def _parse_game_creation_values(text):
+    """Parses an opponent username optionally followed by a board size and winning length. Returns None on failure."""
+    values = text.split()
+    if len(values) == 1:
+        return (values[0], game_actions.DEFAULT_BOARD_SIZE, game_actions.DEFAULT_WINNING_LENGTH)
+    if len(values) == 3 and values[1].isdecimal() and values[2].isdecimal():
+        return (values[0], int(values[1]), int(values[2]))
+    return None
+
+def compute_winner_and_current_player(board: str, board_size: int, winning_length: int):
+    """Returns the winner of the board, if any, and the piece that moves next"""
+    if board_size == game_actions.DEFAULT_BOARD_SIZE and winning_length == game_actions.DEFAULT_WINNING_LENGTH:
+        return game_actions.compute_winner_and_current_player(board)
+    return grid_board.compute_winner_by_scanning(board, board_size, winning_length), game_actions.compute_current_player(board)
+
+def compute_board_rendering(board: str, board_size: int):
+    """Returns the text drawing of the board with the row letters on the right and the column numbers underneath"""
+    lines = []
+    for row in range(board_size):
+        cells = board[row*board_size:(row + 1)*board_size]
+        lines.append("|".join(f" {character} " for character in cells))
+        separator = "___" if row < board_size - 1 else "   "
+        lines.append("|".join([separator]*board_size) + " " + game_actions.ROW_LETTERS[row])
+    lines.append(" ".join(f"{column:^3}" for column in range(1, board_size + 1)).rstrip())
+    return "\n".join(lines) + "\n"
+
+class LocalGame:
+    def __init__(self, opponent_username: str, piece: str):
+        """The client's copy of a game it has joined, which is filled in by the server's game updates"""
+        self.opponent_username = opponent_username
+        self.piece = piece
+        self.board = None
+        self.winning_length = None
+
 class Client:
     #The default and maximum amount of time to wait in between reconnection attempts
     DEFAULT_RECONNECTION_TIMEOUT = 5
@@ -47,12 +85,14 @@ class Client:
             socket_creation_function: the function used to create the socket from an address, which is settable to help with testing
         """
         self.username = None
-        self.current_piece = ""
         self.reconnection_timeout = self.DEFAULT_RECONNECTION_TIMEOUT
         self.host = host
         self.port = port
-        self.current_game = None
-        self.current_opponent = None
+        #Maps game numbers to the LocalGame for each game the client has joined
+        self.games = {}
+        #The number of the game that moves, hints, and quitting apply to
+        self.selected_game_number = None
+        self.spectated_player = None
         self.output_text = output_text_function
         self.selector = selector
         self.logger = logger
@@ -70,60 +110,51 @@ class Client:
             outcome_text = 'loss'
         elif outcome == game_actions.VICTORY:
             outcome_text = 'win'
-        self.output_text(f"Your game with {opponent_username} ended with a {outcome_text}!")
-        if opponent_username == self.current_opponent:
-            self._reset_game_state()
+        if outcome == game_actions.EXPIRED:
+            self.output_text(f"Your game #{values['game']} with {opponent_username} expired after going without moves for too long!")
+        else:
+            self.output_text(f"Your game #{values['game']} with {opponent_username} ended with a {outcome_text}!")
+        if values["game"] in self.games:
+            self._remove_game(values["game"])
             self.output_text("This game has ended.\nYou may start another game with the 'create' command and may quit the program using the 'exit' command.")
 
     def update_game(self, values):
         """Updates the game state"""
         self.output_text("The game board is now:")
-        self.current_game = values["text"]
-        gamerow_1 = [' ',' ',' ','|',' ',' ',' ','|',' ',' ',' ']
-        gamerow_2 = [' ',' ',' ','|',' ',' ',' ','|',' ',' ',' ']
-        gamerow_3 = [' ',' ',' ','|',' ',' ',' ','|',' ',' ',' ']
-        for index, character in enumerate(self.current_game):
-            if character == ' ':
-                continue
-            match index + 1:
-                case 1:
-                    gamerow_1[1] = character
-                case 2:
-                    gamerow_1[5] = character
-                case 3:
-                    gamerow_1[9] = character
-                case 4:
-                    gamerow_2[1] = character
-                case 5:
-                    gamerow_2[5] = character
-                case 6:
-                    gamerow_2[9] = character
-                case 7:
-                    gamerow_3[1] = character
-                case 8:
-                    gamerow_3[5] = character
-                case 9:
-                    gamerow_3[9] = character
-        srow_1 = "".join(gamerow_1)
-        srow_2 = "".join(gamerow_2)
-        srow_3 = "".join(gamerow_3)
-        self.information_text = f"{self.username} ({self.current_piece}) vs {self.current_opponent} ({game_actions.compute_other_piece(self.current_piece)})"
-        if not game_actions.check_winner(self.current_game):
-            self.information_text += f"\n{game_actions.compute_current_player(self.current_game)}'s turn."
+        board = values["text"]
+        winning_length = values["winning_length"]
+        board_size = game_actions.compute_board_size(board)
+        game = self.games.get(values["game"])
+        if game is None:
+            self.information_text = f"Spectating {self.spectated_player}'s game"
+        else:
+            game.board = board
+            game.winning_length = winning_length
+            self.information_text = f"Game #{values['game']}: {self.username} ({game.piece}) vs {game.opponent_username} ({game_actions.compute_other_piece(game.piece)})"
+        if board_size != game_actions.DEFAULT_BOARD_SIZE or winning_length != game_actions.DEFAULT_WINNING_LENGTH:
+            self.information_text += f"\n{winning_length} in a row wins."
+        winner, current_player = compute_winner_and_current_player(board, board_size, winning_length)
+        if not winner:
+            self.information_text += f"\n{current_player}'s turn."
         self.output_text(self.information_text)
-        self.output_text(srow_1 + "\n___|___|___ a\n" +
-                         srow_2 + "\n___|___|___ b\n" +
-                         srow_3 + "\n   |   |    c\n 1   2   3\n")
+        self.output_text(compute_board_rendering(board, board_size))
 
     def update_game_piece(self, values):
-        """Update the player's game piece"""
-        self.current_piece = values["character"]
-        self.output_text(f"You are playing as {self.current_piece}.")
+        """Starts tracking a joined game and selects it"""
+        game_number = values["game"]
+        self.games[game_number] = LocalGame(values["opponent"], values["character"])
+        self.selected_game_number = game_number
+        self.spectated_player = None
+        self.output_text(f"You are playing as {values['character']} in game #{game_number} against {values['opponent']}.")
 
     def handle_text_message(self, values):
         """Displays a text message from the server"""
         self.output_text("Server: " + values["text"])
 
+    def handle_chat_message(self, values):
+        """Displays a chat message from another user"""
+        self.output_text(f"{values['username']}: {values['text']}")
+
     def handle_help_message(self, values):
         """Displays a help message from the server"""
         self.output_text("Help: " + values["text"])
@@ -137,6 +168,7 @@ class Client:
         self.protocol_callback_handler.register_callback_with_protocol(self.handle_help_message, protocol_definitions.HELP_MESSAGE_PROTOCOL_TYPE_CODE)
         self.protocol_callback_handler.register_callback_with_protocol(self.handle_help_message, protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
         self.protocol_callback_handler.register_callback_with_protocol(self.handle_game_ending, protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_chat_message, protocol_definitions.CHAT_MESSAGE_PROTOCOL_TYPE_CODE)
 
     def _create_connection_handler(self):
         """Creates the connection handler for managing the connection with the server"""
@@ -202,10 +234,18 @@ class Client:
                 done = False
                 self.pause_in_between_reconnection_attempts()
 
-    def _reset_game_state(self):
-        self.current_game = None
-        self.current_piece = None
-        self.current_opponent = None
+    def _remove_game(self, game_number: int):
+        """Stops tracking the game, selecting the most recently joined remaining game if it was selected"""
+        del self.games[game_number]
+        if self.selected_game_number == game_number:
+            self.selected_game_number = next(reversed(self.games), None)
+
+    def _get_selected_game(self):
+        """Returns the selected LocalGame once its board has arrived, or None"""
+        game = self.games.get(self.selected_game_number)
+        if game is None or game.board is None:
+            return None
+        return game
 
     def create_request(self, action, value):
         """Creates a request for the server from an action value pair. Returns None on failure."""
@@ -229,7 +269,7 @@ class Client:
             values = _parse_two_space_separated_values(value)
             if values is None:
                 self.output_text('When logging in, you must provide a username, press space, and provide your password!')
-            elif self.current_game is not None:
+            elif self.games:
                 self.output_text("You cannot log in to an account in the middle of a game!")
             elif self.username is not None:
                 self.output_text("You are already logged in!")  
@@ -240,49 +280,108 @@ class Client:
             values = _parse_two_space_separated_values(value)
             if values is None:
                 self.output_text('When creating an account, you must provide a username, press space, and provide your password!')
-            elif self.current_game is not None:
+            elif self.games:
                 self.output_text("You cannot register an account in the middle of a game!")
             else:
                 type_code = protocol_definitions.ACCOUNT_CREATION_PROTOCOL_TYPE_CODE
         elif action == "quit":
-            if self.current_game is None:
+            if self.selected_game_number is None:
                 self.output_text("You cannot quit a game when you are not in one.")
             else:
                 type_code = protocol_definitions.QUIT_GAME_PROTOCOL_TYPE_CODE
-                values = []
-                self._reset_game_state()
+                values = (self.selected_game_number,)
+                self._remove_game(self.selected_game_number)
+        elif action == "select":
+            if not value.isdecimal() or int(value) not in self.games:
+                self.output_text(f"You can only select a game you have joined. Your games are: {self._compute_joined_games_text()}")
+            else:
+                self.selected_game_number = int(value)
+                game = self.games[self.selected_game_number]
+                self.output_text(f"Selected game #{value} against {game.opponent_username}.")
         elif action == "join":
-            if value == "":
-                self.output_text("To join a game, you must specify the username of your opponent.")
+            if value == "" or value == "#":
+                self.output_text("To join a game, you must specify the username of your opponent or the game number after a '#', such as 'join #2'.")
+            elif value.startswith("#"):
+                if not value[1:].isdecimal() or int(value[1:]) >= 2**32:
+                    self.output_text("Game numbers are made of up to 10 digits, such as 'join #2'.")
+                else:
+                    type_code = protocol_definitions.JOIN_GAME_PROTOCOL_TYPE_CODE
+                    values = (int(value[1:]), "")
             else:
                 type_code = protocol_definitions.JOIN_GAME_PROTOCOL_TYPE_CODE
-                values = (value,)
-                self.current_opponent = value
+                values = (protocol_definitions.UNNUMBERED_GAME, value)
         elif action == "create":
-            if value == "":
-                self.output_text("To create a game, you must specify the username of your opponent.")
+            values = _parse_game_creation_values(value)
+            if values is None:
+                self.output_text("To create a game, you must specify the username of your opponent, optionally followed by the board size and how many pieces in a row win.")
+            elif not game_actions.is_valid_board_configuration(values[1], values[2]):
+                self.output_text(f"Games need between {game_actions.MINIMUM_WINNING_LENGTH} and {game_actions.MAXIMUM_BOARD_SIZE} pieces in a row to win on a board with at least that many rows.")
             else:
                 type_code = protocol_definitions.GAME_CREATION_PROTOCOL_TYPE_CODE
+        elif action == "spectate":
+            if value == "":
+                self.output_text("To spectate a game, you must specify the username of one of its players.")
+            elif self.games:
+                self.output_text("You cannot spectate a game in the middle of your own game!")
+            else:
+                type_code = protocol_definitions.SPECTATE_GAME_PROTOCOL_TYPE_CODE
+                values = (value,)
+                self.spectated_player = value
+        elif action == "chat":
+            if value == "":
+                self.output_text("To chat, you must provide a message after the command.")
+            else:
+                type_code = protocol_definitions.CHAT_MESSAGE_PROTOCOL_TYPE_CODE
                 values = (value,)
+        elif action == "hint":
+            if self._get_selected_game() is None:
+                self.output_text("You cannot get a hint because you are not in a game.")
+            else:
+                type_code = protocol_definitions.HINT_PROTOCOL_TYPE_CODE
+                values = (self.selected_game_number,)
+        elif action == "games":
+            if value == "":
+                type_code = protocol_definitions.GAMES_LIST_PROTOCOL_TYPE_CODE
+                values = (1,)
+            elif not value.isdecimal() or not 1 <= int(value) <= MAXIMUM_GAMES_PAGE:
+                self.output_text(f"The page number must be a whole number from 1 to {MAXIMUM_GAMES_PAGE}.")
+            else:
+                type_code = protocol_definitions.GAMES_LIST_PROTOCOL_TYPE_CODE
+                values = (int(value),)
+        elif action == "queue":
+            type_code = protocol_definitions.QUEUE_PROTOCOL_TYPE_CODE
+            values = []
+        elif action == "unqueue":
+            type_code = protocol_definitions.LEAVE_QUEUE_PROTOCOL_TYPE_CODE
+            values = []
+        elif action == "leaderboard":
+            type_code = protocol_definitions.LEADERBOARD_PROTOCOL_TYPE_CODE
+            values = []
         elif action == "move":
-            if not self.current_game:
+            game = self._get_selected_game()
+            if game is None:
                 self.output_text("You cannot make a move because you are not in a game.")
-            elif not game_actions.is_valid_move_text(value):
+            elif not game_actions.is_valid_move_text(value, game_actions.compute_board_size(game.board)):
                 self.output_text("You must provide a valid move. Use the row followed by the column, such as 'move a1'.")
             else:
-                move_number = game_actions.convert_move_text_to_move_number(value)
-                current_piece = game_actions.compute_current_player(self.current_game)
-                if self.current_game[move_number - 1] != ' ':
+                move_number = game_actions.convert_move_text_to_move_number(value, game_actions.compute_board_size(game.board))
+                current_piece = game_actions.compute_current_player(game.board)
+                if game.board[move_number - 1] != ' ':
                     self.output_text("You cannot move there because that spot is already taken.")
-                elif current_piece == self.current_piece:
+                elif current_piece == game.piece:
                     type_code = protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE
-                    values = (move_number,)
+                    values = (self.selected_game_number, move_number)
                 else:
                     self.output_text("You cannot move because it is not your turn.")
         if type_code is not None:
             request = protocol.Message(type_code, values)
         return request
 
+    def _compute_joined_games_text(self):
+        if not self.games:
+            return "none"
+        return ", ".join(f"#{number} against {game.opponent_username}" for number, game in self.games.items())
+
     def create_request_from_text_input(self, text: str):
         """Creates a request for the server from user input text"""
         text = text.strip()
@@ -1,4 +1,5 @@
 import selectors
+from collections import deque
 
 import protocol
 from protocol import Message
@@ -36,12 +37,18 @@ class ConnectionInformation:
         self.text_representation = f"{ip_address}:{port}"
 
 class MessageSender:
-    def __init__(self, logger, connection_information: ConnectionInformation, protocol_map, close_callback):
+    #The most bytes moved from the priority lanes into the buffer at once. Frames already in the buffer are sent before any newly queued frame,
+    #so this bounds how long a newly queued high priority frame can wait behind lower priority ones
+    MAXIMUM_BUFFER_FILL_SIZE = 16384
+    def __init__(self, logger, connection_information: ConnectionInformation, protocol_map, close_callback, priorities=None):
         """A message sender is responsible for transmitting a message as bytes to a connection peer
             logger: a logger object for logging errors and significant occurrences
             connection_information: the connection information to use for transmitting messages
             protocol_map: a protocol map for converting messages to bytes
             close_callback: the call back to call to close the current connection
+            priorities: an optional dictionary mapping type codes to priorities, where 0 is the highest priority.
+            Queued messages are sent in priority order and in the order they were queued within a priority.
+            Type codes missing from the dictionary get the lowest priority.
         """
         self.logger = logger
         self.sock = connection_information.sock
@@ -49,9 +56,29 @@ class MessageSender:
         self.buffer = b""
         self.protocol_map = protocol_map
         self.close_callback = close_callback
-    
+        self.priorities = priorities if priorities is not None else {}
+        self.lowest_priority = max(self.priorities.values(), default=0) + 1
+        self.lanes = [deque() for _ in range(self.lowest_priority + 1)]
+
+    def _fill_buffer_from_lanes(self):
+        """Moves queued frames into the buffer in priority order"""
+        frames = []
+        size = 0
+        for lane in self.lanes:
+            while lane and size < self.MAXIMUM_BUFFER_FILL_SIZE:
+                frame = lane.popleft()
+                frames.append(frame)
+                size += len(frame)
+        self.buffer = b"".join(frames)
+
+    def has_queued_bytes(self):
+        """Returns true if there are bytes waiting to be sent and false otherwise"""
+        return len(self.buffer) > 0 or any(self.lanes)
+
     def write(self):
         """Writes bytes in the buffer to the connection socket"""
+        if not self.buffer:
+            self._fill_buffer_from_lanes()
         if self.buffer:
             try:
                 # Should be ready to write
@@ -69,8 +96,28 @@ class MessageSender:
     def send_message(self, message: Message):
         """Starts transmitting the message with specified type code and values to the connection peer"""
         message_bytes = self.protocol_map.pack_values_given_type_code(message.type_code, *message.values)
-        self.buffer += message_bytes
-        self.logger.handle_debug_message(MessageEvent(message, self.addr), SENDING_MESSAGE_LOG_CATEGORY)
+        self.send_packed_message(message, message_bytes)
+
+    def send_packed_message(self, message: Message, message_bytes: bytes):
+        """
+            Starts transmitting a message that was already packed into bytes. This lets a message sent to many peers be packed once
+            message: the Message object that was packed
+            message_bytes: the packed bytes for the message
+        """
+        self.send_packed_messages([message], message_bytes)
+
+    def send_packed_messages(self, messages, message_bytes: bytes):
+        """
+            Starts transmitting messages that were already packed together into bytes, which are sent without being split up
+            messages: a list of the Message objects that were packed. They should share a priority
+            message_bytes: the packed bytes for the messages in order
+        """
+        priority = self.priorities.get(messages[0].type_code, self.lowest_priority)
+        self.lanes[priority].append(message_bytes)
+        #Broadcasts send the same messages through every recipient, so the events are only built when they would be logged
+        if self.logger.debugging_mode:
+            for message in messages:
+                self.logger.log_message(MessageEvent(message, self.addr), SENDING_MESSAGE_LOG_CATEGORY)
 
 class MessageReceiver:
     def __init__(self, logger, connection_information: ConnectionInformation, receiving_protocol_map: protocol.ProtocolMap, close_callback):
@@ -108,13 +155,27 @@ class MessageReceiver:
             else:
                 raise PeerDisconnectionException("Peer closed.")
     
-    def read(self):
-        """Processes newly received bytes"""
+    def read(self, maximum_number_of_messages: int = None):
+        """
+            Processes newly received bytes
+            maximum_number_of_messages: if given, bytes stop being converted into messages once this many processed messages are waiting
+        """
         self._read()
+        self.process_buffered_bytes(maximum_number_of_messages)
+
+    def process_buffered_bytes(self, maximum_number_of_messages: int = None):
+        """
+            Converts bytes that were received but not processed yet into messages
+            maximum_number_of_messages: if given, processing stops once this many processed messages are waiting
+        """
         #This loop is necessary because the selector will only call read when bytes are received, 
         #so this is needed to handle messages that arrived in the same chunk of bytes
-        while len(self.buffer) > 0:
+        while len(self.buffer) > 0 and (maximum_number_of_messages is None or len(self.messages) < maximum_number_of_messages):
             self.process_message()
+
+    def has_unprocessed_bytes(self):
+        """Returns true if received bytes are waiting to be converted into messages"""
+        return len(self.buffer) > 0
     
     def process_complete_message(self):
         """Finishes handling a completed message"""
@@ -162,11 +223,17 @@ def compute_sending_and_receiving_protocol_maps(is_server):
         sending_protocol_map = protocol_definitions.SERVER_PROTOCOL_MAP
         receiving_protocol_map = protocol_definitions.CLIENT_PROTOCOL_MAP
     return sending_protocol_map, receiving_protocol_map
+
+def compute_sending_priorities(is_server):
+    """Returns the priorities for the messages sent by the server or client"""
+    if is_server:
+        return protocol_definitions.CLIENT_MESSAGE_PRIORITIES
+    return None
     
 
 class ConnectionHandler:
     #* as an argument is not something you pass in. It just means that the following arguments must be named explicitly when giving them values
-    def __init__(self, selector, connection_information: ConnectionInformation, logger, callback_handler: protocol.ProtocolCallbackHandler, *, is_server: bool=False, on_close_callback=None):
+    def __init__(self, selector, connection_information: ConnectionInformation, logger, callback_handler: protocol.ProtocolCallbackHandler, *, is_server: bool=False, on_close_callback=None, rate_limiter=None, message_budget: int=None):
         """
             selector: the selector object that the connection handler is registered with
             connection_information: the information used to exchange information with the peer
@@ -174,6 +241,8 @@ class ConnectionHandler:
             callback_handler: the callback handler is used to respond to request messages
             is_server: must be assigned values explicitly. Determines if this is for a client or server
             on_close_callback: must be assigned values explicitly. Called when the connection is closed using connection_information
+            rate_limiter: must be assigned values explicitly. An optional rate_limiting.ConnectionRateLimiter deciding which received messages get responded to
+            message_budget: must be assigned values explicitly. If given, at most this many received messages are responded to per read. The rest are left pending until process_pending_messages is called
         """
         self.selector = selector
         self.connection_information = connection_information
@@ -181,12 +250,14 @@ class ConnectionHandler:
         self.logger = logger
         self.callback_handler = callback_handler
         self.on_close_callback = on_close_callback
+        self.rate_limiter = rate_limiter
+        self.message_budget = message_budget
 
         #Pick the correct protocol maps based on if this is the client or the server
         sending_protocol_map, receiving_protocol_map = compute_sending_and_receiving_protocol_maps(is_server)
 
         self.message_receiver = MessageReceiver(self.logger, self.connection_information, receiving_protocol_map, self.close)
-        self.message_sender = MessageSender(self.logger, self.connection_information, sending_protocol_map, self.close)
+        self.message_sender = MessageSender(self.logger, self.connection_information, sending_protocol_map, self.close, compute_sending_priorities(is_server))
 
     def _set_selector_events_mask(self, mode):
         """Set selector to listen for events."""
@@ -202,21 +273,57 @@ class ConnectionHandler:
     def respond_to_received_message(self):
         """This responds to a request by extracting the message from the message receiver and transmits any responses if needed"""
         request = self.message_receiver.extract_message()
+        if self.rate_limiter is not None and not self.rate_limiter.allow_message(request.type_code):
+            return
         if self.callback_handler.has_protocol(request.type_code):
             self.respond_to_request(request)
         elif not self.is_server:
             print(f"Received message with type code {request.type_code}! values: {request.values}")
         
+    def _respond_to_processed_messages(self):
+        """Responds to every message the message receiver has finished processing"""
+        while self.message_receiver.has_processed_messages() and not self.is_closed():
+            self.respond_to_received_message()
+
+    def _compute_message_limit(self):
+        """Returns the most received messages to convert and respond to now: the message budget, lowered to what the rate limiter allows"""
+        if self.rate_limiter is None:
+            return self.message_budget
+        allowed_message_count = self.rate_limiter.count_allowed_messages()
+        if self.message_budget is None:
+            return allowed_message_count
+        return min(self.message_budget, allowed_message_count)
+
     def read(self):
         """Responds to the selector notifying the handler that bytes have been received from the peer"""
-        self.message_receiver.read()
-        while self.message_receiver.has_processed_messages():
-            self.respond_to_received_message()
+        #Leaving new bytes in the socket until pending messages are handled with process_pending_messages
+        #pushes back on peers sending faster than they are served. A peer that used up its rate limit is pushed back on the same way
+        message_limit = self._compute_message_limit()
+        if not self.has_pending_messages() and message_limit != 0:
+            self.message_receiver.read(message_limit)
+            self._respond_to_processed_messages()
+
+    def has_pending_messages(self):
+        """Returns true if received messages are waiting to be responded to because of the message budget"""
+        return self.message_receiver.has_processed_messages() or self.message_receiver.has_unprocessed_bytes()
+
+    def process_pending_messages(self):
+        """Responds to at most the message budget of the messages left pending by earlier reads, and none while the rate limit is used up"""
+        self.message_receiver.process_buffered_bytes(self._compute_message_limit())
+        self._respond_to_processed_messages()
 
     def send_message(self, request: Message):
         """Sends a message to the peer"""
         self.message_sender.send_message(request)
 
+    def send_packed_message(self, message: Message, message_bytes: bytes):
+        """Sends a message that was already packed into bytes using the sending protocol map to the peer"""
+        self.message_sender.send_packed_message(message, message_bytes)
+
+    def send_packed_messages(self, messages, message_bytes: bytes):
+        """Sends messages that were already packed together into bytes using the sending protocol map to the peer"""
+        self.message_sender.send_packed_messages(messages, message_bytes)
+
     def process_events(self, mask):
         """Processes events from the selector managing the connection socket"""
         if mask & selectors.EVENT_READ:
@@ -242,5 +349,9 @@ class ConnectionHandler:
             if self.on_close_callback is not None:
                 self.on_close_callback(self.connection_information)
         
+    def is_closed(self):
+        """Returns true if the connection has been closed"""
+        return self.connection_information.sock is None
+
     def get_connection_information(self):
         return self.connection_information
\ No newline at end of file
@@ -0,0 +1,50 @@
+from collections import deque
+
+from connection_handler import ConnectionHandler
+
+class ConnectionScheduler:
+    def __init__(self, error_callback):
+        """
+            Services connection handlers that have messages left pending by their message budgets.
+            Pending connections are serviced round robin so that a burst from one peer only delays others by one budget per loop iteration.
+            error_callback: called with the connection handler and nothing else when processing a connection raises an exception
+        """
+        self.error_callback = error_callback
+        self.ready_queue = deque()
+        self.queued_handlers = set()
+
+    def _queue_if_pending(self, handler: ConnectionHandler):
+        """Adds the handler to the back of the ready queue if it has pending messages and is not already queued"""
+        if handler not in self.queued_handlers and not handler.is_closed() and handler.has_pending_messages():
+            self.ready_queue.append(handler)
+            self.queued_handlers.add(handler)
+
+    def _run_safely(self, handler: ConnectionHandler, function):
+        try:
+            function()
+        except Exception:
+            self.error_callback(handler)
+        else:
+            self._queue_if_pending(handler)
+
+    def process_events(self, handler: ConnectionHandler, mask):
+        """Has the handler process selector events and queues it if messages were left pending"""
+        if handler.is_closed():
+            return
+        self._run_safely(handler, lambda: handler.process_events(mask))
+
+    def service_ready_connections(self):
+        """Gives every connection waiting at the start of the call one message budget's worth of work in the order they were queued"""
+        for _ in range(len(self.ready_queue)):
+            handler = self.ready_queue.popleft()
+            self.queued_handlers.discard(handler)
+            if not handler.is_closed():
+                self._run_safely(handler, handler.process_pending_messages)
+
+    def has_ready_connections(self):
+        """Returns true if any connection has pending messages"""
+        return len(self.ready_queue) > 0
+
+    def compute_select_timeout(self):
+        """Returns the timeout to use with the selector: waiting is only allowed when no connection has pending work"""
+        return 0 if self.has_ready_connections() else None
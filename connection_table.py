@@ -1,5 +1,6 @@
 from connection_handler import ConnectionHandler, ConnectionInformation
 from protocol import Message
+import protocol_definitions
 
 class ConnectionTableEntry:
     def __init__(self, connection_handler: ConnectionHandler, state):
@@ -20,6 +21,14 @@ class ConnectionTableEntry:
         """Sends the Message object the the connection"""
         self.connection_handler.send_message(message)
 
+    def send_packed_message_through_connection(self, message: Message, message_bytes: bytes):
+        """Sends the Message object that was already packed into message_bytes through the connection"""
+        self.connection_handler.send_packed_message(message, message_bytes)
+
+    def send_packed_messages_through_connection(self, messages, message_bytes: bytes):
+        """Sends the Message objects that were already packed together into message_bytes through the connection"""
+        self.connection_handler.send_packed_messages(messages, message_bytes)
+
     def get_state(self):
         """Return state information associated with the connection"""
         return self.state
@@ -71,5 +80,15 @@ class ConnectionTable:
         if entry is not None:
             entry.send_message_through_connection(message)
 
+    def pack_message(self, message: Message):
+        """Packs the message into the bytes sent through the connections"""
+        return protocol_definitions.CLIENT_PROTOCOL_MAP.pack_values_given_type_code(message.type_code, *message.values)
+
+    def broadcast_message_to_entries(self, message: Message, entries):
+        """Packs the message once and sends the same bytes through every ConnectionTableEntry in entries"""
+        message_bytes = self.pack_message(message)
+        for entry in entries:
+            entry.send_packed_message_through_connection(message, message_bytes)
+
     def __str__(self):
         return str(self.connections)
\ No newline at end of file
@@ -1,21 +1,31 @@
 #This module provides functions for interfacing with the database and classes for encapsulating database entries
 #search for the comment starting with "The public interface" for functions intended to be used outside this module
 
+import os
+import csv
+import sys
+import time
 import sqlite3
+import argparse
+import itertools
+import threading
+from collections import OrderedDict
 
 #Classes for representing database tables
 
 class TableField:
     """Represents one of the values in a table entry"""
-    def __init__(self, name: str, data_type: str, is_primary_key: bool = False):
+    def __init__(self, name: str, data_type: str, is_primary_key: bool = False, is_indexed: bool = False):
         """
             name: the name of the field
             data_type: the data type of the field as understood by the database
             is_primary_key: determines if this is the primary key for the table
+            is_indexed: determines if the table gets an index on this field for looking up rows by it
         """
         self.name = name
         self.data_type = data_type
         self.is_primary_key = is_primary_key
+        self.is_indexed = is_indexed
 
 class Table:
     """Represents a database table consisting of rows with specific fields"""
@@ -43,6 +53,142 @@ class Account:
         self.name = name
         self.password = password
 
+#Connection management
+
+class ConnectionConfiguration:
+    #The default number of bytes of the database file memory mapped by each connection
+    DEFAULT_MMAP_SIZE = 256*2**20
+    #The default number of prepared statements each connection keeps for reuse
+    DEFAULT_CACHED_STATEMENT_COUNT = 128
+    def __init__(self, *, journal_mode: str = "WAL", synchronous: str = "NORMAL", mmap_size: int = DEFAULT_MMAP_SIZE, cached_statement_count: int = DEFAULT_CACHED_STATEMENT_COUNT):
+        """
+            Describes how persistent database connections are set up
+            journal_mode: must be assigned values explicitly. The journal_mode pragma. Write-ahead logging lets lookups run while another connection commits
+            synchronous: must be assigned values explicitly. The synchronous pragma. NORMAL only syncs at checkpoints when write-ahead logging is used
+            mmap_size: must be assigned values explicitly. The mmap_size pragma. 0 reads the database with system calls instead of memory mapping it
+            cached_statement_count: must be assigned values explicitly. The number of prepared statements each connection keeps, so repeated commands are not compiled again
+        """
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cached_statement_count = cached_statement_count
+
+class DatabaseConnectionManager:
+    def __init__(self, configuration: ConnectionConfiguration = None):
+        """
+            Keeps one open connection for each database path on each thread, since sqlite3 connections are not shared between threads by default
+            configuration: how new connections are set up. The defaults of ConnectionConfiguration are used if unspecified
+        """
+        self.configuration = configuration if configuration is not None else ConnectionConfiguration()
+        #Holds a dictionary mapping paths to connections for each thread, which are closed when the thread ends
+        self.thread_connections = threading.local()
+        self.opened_connection_count = 0
+
+    def _get_connections(self):
+        connections = getattr(self.thread_connections, "connections", None)
+        if connections is None:
+            connections = {}
+            self.thread_connections.connections = connections
+        return connections
+
+    def get_connection(self, path: str):
+        """Returns the calling thread's connection to the database at the path, opening it if needed"""
+        connections = self._get_connections()
+        connection = connections.get(path)
+        if connection is None:
+            connection = sqlite3.connect(path, cached_statements=self.configuration.cached_statement_count)
+            connection.execute(f"PRAGMA journal_mode={self.configuration.journal_mode}")
+            connection.execute(f"PRAGMA synchronous={self.configuration.synchronous}")
+            connection.execute(f"PRAGMA mmap_size={int(self.configuration.mmap_size)}")
+            connections[path] = connection
+            self.opened_connection_count += 1
+        return connection
+
+    def close_connections(self):
+        """Closes the calling thread's connections"""
+        connections = self._get_connections()
+        for connection in connections.values():
+            connection.close()
+        connections.clear()
+
+_connection_manager = DatabaseConnectionManager()
+
+#Account caching
+
+class AccountCache:
+    #The default number of looked up names kept
+    DEFAULT_MAXIMUM_SIZE = 10000
+    #The default number of seconds a name without an account is remembered. Accounts inserted by another process, such as an import, can sign in once it passes
+    DEFAULT_MISSING_ACCOUNT_LIFETIME = 5.0
+    def __init__(self, maximum_size: int = DEFAULT_MAXIMUM_SIZE, *, missing_account_lifetime: float = DEFAULT_MISSING_ACCOUNT_LIFETIME, time_function=time.monotonic):
+        """
+            Keeps the most recently looked up accounts, and names without accounts, in least recently used order
+            maximum_size: the number of names kept. The least recently used one is evicted to make room for another
+            missing_account_lifetime: must be assigned values explicitly. The number of seconds a name without an account is remembered, so repeated failed sign ins do not reach the database
+            time_function: must be assigned values explicitly. The function used to get the current time in seconds, which is settable to aid with testing
+        """
+        self.maximum_size = maximum_size
+        self.missing_account_lifetime = missing_account_lifetime
+        self.time_function = time_function
+        #Maps (path, name) pairs to Account objects or, for names without accounts, the time their entry expires
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        #Counts the accounts inserted, so a lookup that raced with an insert does not cache what it read before the insert
+        self.invalidation_count = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+    def look_up(self, path: str, name: str):
+        """Returns (True, the cached Account or None for a name without an account) on a hit and (False, None) on a miss"""
+        key = (path, name)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and not isinstance(entry, Account) and self.time_function() >= entry:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.miss_count += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hit_count += 1
+        return True, entry if isinstance(entry, Account) else None
+
+    def store(self, path: str, name: str, account: Account, invalidation_count: int):
+        """Caches the result of a lookup that started when the invalidation count was invalidation_count, unless an account was inserted since"""
+        key = (path, name)
+        with self.lock:
+            if invalidation_count != self.invalidation_count:
+                return
+            self.entries[key] = self.time_function() + self.missing_account_lifetime if account is None else account
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maximum_size:
+                self.entries.popitem(last=False)
+                self.eviction_count += 1
+
+    def invalidate(self, path: str, name: str):
+        """Forgets what was cached for the name, such as when an account is inserted with it"""
+        with self.lock:
+            self.entries.pop((path, name), None)
+            self.invalidation_count += 1
+
+    def invalidate_path(self, path: str):
+        """Forgets everything cached for the database at the path"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == path]:
+                del self.entries[key]
+            self.invalidation_count += 1
+
+    def compute_hit_rate(self):
+        """Returns the fraction of lookups answered from the cache, or 0 if there were none"""
+        lookup_count = self.hit_count + self.miss_count
+        return self.hit_count/lookup_count if lookup_count else 0
+
+    def __len__(self):
+        return len(self.entries)
+
+_account_cache = AccountCache()
+
 #Database management helper functions. Other modules should not call these.
 
 def _create_table_if_nonexistent_using_cursor(table: Table, cursor):
@@ -62,6 +208,9 @@ def _create_table_if_nonexistent_using_cursor(table: Table, cursor):
         field_already_added = True
     creation_text += ")"
     cursor.execute(creation_text)
+    for field in table.fields:
+        if field.is_indexed:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {table.name}_{field.name} ON {table.name} ({field.name})")
 
 def _create_placeholders_for_fields(fields):
     """
@@ -86,17 +235,10 @@ def _insert_values_into_table_for_database_at_path(values, table: Table, path: s
         table: a database table object
         path: the path containing the database
     """
-    connection = sqlite3.connect(path)
+    connection = _connection_manager.get_connection(path)
     insertion_command = f"INSERT INTO {table.name} VALUES" + _create_placeholders_for_fields(table.fields)
-    exception = None
-    try:
-        with connection:
-            connection.execute(insertion_command, values)
-    except sqlite3.Error as e:
-        exception = e
-    connection.close()
-    if exception:
-        raise exception
+    with connection:
+        connection.execute(insertion_command, values)
 
 def _retrieve_values_from_table_from_database_at_path_using_primary_key(table: Table, path: str, primarykey):
     """
@@ -105,19 +247,37 @@ def _retrieve_values_from_table_from_database_at_path_using_primary_key(table: T
         path: the path to the database
         primarykey: the primary key value used to identify the target row in the database
     """
-    connection = sqlite3.connect(path)
+    connection = _connection_manager.get_connection(path)
     retrieval_command = f"SELECT * FROM {table.name} WHERE {table.primary_key.name} = ?"
-    cursor = connection.cursor()
-    queryresult = cursor.execute(retrieval_command, (primarykey,))
-    values = queryresult.fetchone()
-    return values
+    return connection.execute(retrieval_command, (primarykey,)).fetchone()
 
 #Database table representation definitions
 ACCOUNT_TABLE = Table('account', [TableField('name', 'TEXT', is_primary_key=True), TableField('password', 'TEXT')])
-TABLES = [ACCOUNT_TABLE]
+#Live games and their moves, which are saved by the game_persistence module. A game's moves are its move rows in rowid order
+GAME_TABLE = Table('game', [
+    TableField('number', 'INTEGER', is_primary_key=True),
+    TableField('creator_username', 'TEXT'),
+    TableField('invited_username', 'TEXT'),
+    TableField('board_size', 'INTEGER'),
+    TableField('winning_length', 'INTEGER')
+])
+MOVE_TABLE = Table('move', [TableField('game_number', 'INTEGER', is_indexed=True), TableField('cell', 'INTEGER')])
+#Holds one row with the largest game number handed out, since finished games are deleted from the game table and their numbers must not be reused
+GAME_NUMBER_TABLE = Table('game_number', [TableField('id', 'INTEGER', is_primary_key=True), TableField('last_number', 'INTEGER')])
+#The Elo ratings of players who have finished rated games, which are saved by the ratings module
+RATING_TABLE = Table('rating', [TableField('username', 'TEXT', is_primary_key=True), TableField('rating', 'REAL'), TableField('game_count', 'INTEGER')])
+TABLES = [ACCOUNT_TABLE, GAME_TABLE, MOVE_TABLE, GAME_NUMBER_TABLE, RATING_TABLE]
 
 #The public interface: functions intended to be used by other modules
 
+def configure_database_connections(configuration: ConnectionConfiguration):
+    """Sets how the connections used by the functions below are set up. Connections opened before keep their settings until they are closed"""
+    _connection_manager.configuration = configuration
+
+def close_database_connections():
+    """Closes the connections the calling thread opened through the functions below. They are reopened as needed"""
+    _connection_manager.close_connections()
+
 def insert_account_into_database_at_path(account: Account, path: str):
     """
         Inserts the account object into the database at the specified path.
@@ -126,7 +286,10 @@ def insert_account_into_database_at_path(account: Account, path: str):
         path: the path to the database
     """
     values = (account.name, account.password)
-    _insert_values_into_table_for_database_at_path(values, ACCOUNT_TABLE, path)
+    try:
+        _insert_values_into_table_for_database_at_path(values, ACCOUNT_TABLE, path)
+    finally:
+        _account_cache.invalidate(path, account.name)
 
 def insert_account_into_database_at_path_if_nonexistent(account: Account, path: str):
     """
@@ -140,17 +303,34 @@ def insert_account_into_database_at_path_if_nonexistent(account: Account, path:
         pass
 
 def retrieve_account_with_name_from_database_at_path(name: str, path: str):
+    """Returns the Account with the name from the database at the path or None if there is none. Recent lookups are answered by the account cache"""
+    is_hit, result = _account_cache.look_up(path, name)
+    if is_hit:
+        return result
+    invalidation_count = _account_cache.invalidation_count
     values = _retrieve_values_from_table_from_database_at_path_using_primary_key(ACCOUNT_TABLE, path, name)
     result = None
     if values:
         result = Account(*values)
+    _account_cache.store(path, name, result, invalidation_count)
     return result
 
+def configure_account_cache(maximum_size: int, *, missing_account_lifetime: float = AccountCache.DEFAULT_MISSING_ACCOUNT_LIFETIME, time_function=time.monotonic):
+    """Replaces the account cache with an empty one keeping up to maximum_size names, set up like AccountCache. 0 turns caching off"""
+    global _account_cache
+    _account_cache = AccountCache(maximum_size, missing_account_lifetime=missing_account_lifetime, time_function=time_function)
+
+def get_account_cache():
+    """Returns the AccountCache in front of account lookups, whose hit_count, miss_count, and eviction_count attributes count what it has done"""
+    return _account_cache
+
 def create_database_at_path(path: str):
     """
         Creates a database at the specified filepath if nonexistent. If the database exists, any missing tables are added to it.
         path: the path at which to create the database
     """
+    #A database created again at the same path must not be answered from what was cached for the old one
+    _account_cache.invalidate_path(path)
     connection = sqlite3.connect(path)
     cursor = connection.cursor()
     for table in TABLES:
@@ -158,15 +338,97 @@ def create_database_at_path(path: str):
     connection.commit()
     connection.close()
 
-#Simple testing script that assumes that testing.db did not previously exist
+#The number of accounts imported in each executemany and transaction, and fetched at once when exporting
+DEFAULT_BULK_CHUNK_SIZE = 50000
+
+def import_accounts_into_database_at_path(accounts, path: str, *, chunk_size: int = DEFAULT_BULK_CHUNK_SIZE):
+    """
+        Inserts the accounts into the database at the path in transactions of chunk_size accounts, skipping names that already have accounts.
+        The accounts are read as they are inserted, so they can come from a generator over a file larger than memory. Returns the number of accounts inserted.
+        Only this process's account cache is invalidated. A server running on the same database lets the imported names sign in once its cached names without accounts expire
+        accounts: an iterable of Account objects
+        path: the path to the database
+        chunk_size: must be assigned values explicitly. The number of accounts inserted with one executemany in one transaction
+    """
+    connection = _connection_manager.get_connection(path)
+    insertion_command = f"INSERT OR IGNORE INTO {ACCOUNT_TABLE.name} VALUES" + _create_placeholders_for_fields(ACCOUNT_TABLE.fields)
+    inserted_count = 0
+    account_values = ((account.name, account.password) for account in accounts)
+    try:
+        while True:
+            chunk = list(itertools.islice(account_values, chunk_size))
+            if not chunk:
+                break
+            with connection:
+                inserted_count += connection.executemany(insertion_command, chunk).rowcount
+    finally:
+        #Names looked up before the import may have been cached as having no account
+        _account_cache.invalidate_path(path)
+    return inserted_count
+
+def export_accounts_from_database_at_path(path: str, *, chunk_size: int = DEFAULT_BULK_CHUNK_SIZE):
+    """
+        Yields every Account in the database at the path in name order, fetching chunk_size rows at a time so the accounts are never all in memory
+        path: the path to the database
+        chunk_size: must be assigned values explicitly. The number of rows fetched at once
+    """
+    #The export has its own connection, so the calling thread can keep using its persistent one while the export is in progress
+    connection = sqlite3.connect(path)
+    try:
+        cursor = connection.execute(f"SELECT * FROM {ACCOUNT_TABLE.name} ORDER BY {ACCOUNT_TABLE.primary_key.name}")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield Account(*row)
+    finally:
+        connection.close()
+
+def _read_accounts_from_csv_file(file):
+    """Yields an Account for each name,password row of the CSV file. Raises a ValueError for a row without exactly two values"""
+    reader = csv.reader(file)
+    for row in reader:
+        if len(row) != 2:
+            raise ValueError(f"Line {reader.line_num} should have a name and a password separated by a comma.")
+        yield Account(*row)
+
+def main():
+    default_database_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.db')
+    parser = argparse.ArgumentParser(prog='database_management.py', description='Imports accounts into the database from a CSV file or exports them to one, with one name,password row per account.')
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("file", help="the CSV file to import from or export to. '-' is standard input or output")
+    parser.add_argument("--database", default=default_database_path, help="the path of the database, which is created if missing")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_BULK_CHUNK_SIZE, help="the number of accounts imported in each transaction or fetched at once when exporting")
+    arguments = parser.parse_args()
+    if arguments.chunk_size < 1:
+        print("The chunk size must be at least 1.")
+        sys.exit(1)
+    create_database_at_path(arguments.database)
+    if arguments.command == "import":
+        file = sys.stdin if arguments.file == "-" else open(arguments.file, newline="")
+        try:
+            inserted_count = import_accounts_into_database_at_path(_read_accounts_from_csv_file(file), arguments.database, chunk_size=arguments.chunk_size)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        print(f"Imported {inserted_count} accounts.", file=sys.stderr)
+    else:
+        file = sys.stdout if arguments.file == "-" else open(arguments.file, "w", newline="")
+        try:
+            writer = csv.writer(file)
+            exported_count = 0
+            for account in export_accounts_from_database_at_path(arguments.database, chunk_size=arguments.chunk_size):
+                writer.writerow((account.name, account.password))
+                exported_count += 1
+        finally:
+            if file is not sys.stdout:
+                file.close()
+        print(f"Exported {exported_count} accounts.", file=sys.stderr)
+    close_database_connections()
 
 if __name__ == '__main__':
-    database_path = 'testing.db'
-    create_database_at_path(database_path)
-    insert_account_into_database_at_path(Account('name', 'password'), database_path)
-    result = retrieve_account_with_name_from_database_at_path('name', database_path)
-    print('result', result)
-    if result is not None:
-        print(result.name, result.password)
-    empty_result = retrieve_account_with_name_from_database_at_path('george', database_path)
-    print('empty_result', empty_result)
\ No newline at end of file
+    main()
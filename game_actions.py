@@ -1,33 +1,189 @@
+import math
+import string
+from array import array
+
 VICTORY = "W"
 LOSS = "L"
 TIE = "T"
+#The outcome of a game that was removed for going without moves for too long before it finished
+EXPIRED = "E"
 
-def is_valid_move_text(text: str):
-    return len(text) == 2 and text[0].lower() in 'abc' and text[1] in '123'
+#The cell index triples that win the game when one piece occupies all of them
+WINNING_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
 
-def convert_move_text_to_move_number(text: str):
-    letter = text[0].lower()
-    number = int(text[1])
-    if letter == 'b':
-        number += 3
-    elif letter == 'c':
-        number += 6
-    return number
+#The standard tictactoe board, which every game uses unless its creator asks for another size
+DEFAULT_BOARD_SIZE = 3
+DEFAULT_WINNING_LENGTH = 3
+MINIMUM_WINNING_LENGTH = 3
+#Move numbers from 1 to board_size^2 are sent in a single byte, and rows are named by single letters
+MAXIMUM_BOARD_SIZE = 15
+ROW_LETTERS = string.ascii_lowercase[:MAXIMUM_BOARD_SIZE]
 
-def compute_current_player(game_state: str) -> str:
-    """Determines the current player based on game state."""
+def is_valid_board_configuration(board_size: int, winning_length: int):
+    """Returns true if games can be played on a board_size by board_size board needing winning_length pieces in a row"""
+    return MINIMUM_WINNING_LENGTH <= winning_length <= board_size <= MAXIMUM_BOARD_SIZE
+
+def compute_board_size(board):
+    """Returns the number of rows in a square board given as a string or list of cells"""
+    return math.isqrt(len(board))
+
+def is_valid_move_text(text: str, board_size: int = DEFAULT_BOARD_SIZE):
+    if len(text) < 2 or text[0].lower() not in ROW_LETTERS[:board_size] or not text[1:].isdecimal():
+        return False
+    return 1 <= int(text[1:]) <= board_size
+
+def convert_move_text_to_move_number(text: str, board_size: int = DEFAULT_BOARD_SIZE):
+    row = ROW_LETTERS.index(text[0].lower())
+    return row*board_size + int(text[1:])
+
+def convert_move_number_to_move_text(number: int, board_size: int = DEFAULT_BOARD_SIZE):
+    row, column = divmod(number - 1, board_size)
+    return ROW_LETTERS[row] + str(column + 1)
+
+def _compute_current_player_by_counting(game_state) -> str:
     x_moves = game_state.count('X')
     o_moves = game_state.count('O')
     return 'X' if x_moves == o_moves else 'O'
 
+def compute_current_player(game_state: str) -> str:
+    """Determines the current player based on game state."""
+    #Counting with str.count is as fast as a board state table lookup on its own, so the table is only used
+    #for this through compute_winner_and_current_player, which shares one lookup with the winner
+    return _compute_current_player_by_counting(game_state)
+
 def compute_other_piece(piece: str):
     return 'X' if piece == 'O' else 'O'
 
-def check_winner(board):
-    winning_combos = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
-    for combo in winning_combos:
+def _check_winner_by_scanning_lines(board):
+    for combo in WINNING_LINES:
         if board[combo[0]] == board[combo[1]] == board[combo[2]] != ' ':
             return board[combo[0]]
     if ' ' not in board:
         return TIE
-    return None
\ No newline at end of file
+    return None
+
+#Board state table: every one of the 3^9 boards, valid or not, gets an index by reading its cells as base 3 digits
+#with ' ' as 0, 'X' as 1, and 'O' as 2, where the first cell is the most significant digit
+NUMBER_OF_BOARD_STATES = 3**9
+_PIECES = (None, 'X', 'O', TIE)
+_PIECE_CODES = {piece: code for code, piece in enumerate(_PIECES)}
+#Translates board bytes to base 3 digits. Every other byte becomes 'z', which int rejects, so signs, underscores, whitespace, and digits in the board are not read as a number
+_BASE_3_DIGITS = bytes({ord(' '): ord('0'), ord('X'): ord('1'), ord('O'): ord('2')}.get(byte, ord('z')) for byte in range(256))
+
+def convert_board_index_to_board(index: int):
+    """Returns the board string with the specified board state table index"""
+    characters = []
+    for _ in range(9):
+        index, digit = divmod(index, 3)
+        characters.append(' XO'[digit])
+    return "".join(reversed(characters))
+
+def convert_board_to_board_index(board: str):
+    """Returns the board state table index for the board string or None if it is not a board of 9 'X', 'O', and ' ' characters"""
+    if len(board) != 9 or not board.isascii():
+        return None
+    #Translating the bytes and parsing them with int keeps the conversion in C instead of going digit by digit in python
+    try:
+        return int(board.encode('ascii').translate(_BASE_3_DIGITS), 3)
+    except ValueError:
+        return None
+
+class BoardStateTable:
+    def __init__(self):
+        """Stores the winner, next player, and legal moves for every board in compact arrays indexed by board index, which take about 77KiB in total"""
+        self.winner_codes = bytearray(NUMBER_OF_BOARD_STATES)
+        self.current_player_codes = bytearray(NUMBER_OF_BOARD_STATES)
+        self.legal_move_masks = array('H', bytes(2*NUMBER_OF_BOARD_STATES))
+        for index in range(NUMBER_OF_BOARD_STATES):
+            board = convert_board_index_to_board(index)
+            self.winner_codes[index] = _PIECE_CODES[_check_winner_by_scanning_lines(board)]
+            self.current_player_codes[index] = _PIECE_CODES[_compute_current_player_by_counting(board)]
+            legal_move_mask = 0
+            for cell, character in enumerate(board):
+                if character == ' ':
+                    legal_move_mask |= 1 << cell
+            self.legal_move_masks[index] = legal_move_mask
+
+    def get_winner(self, index: int):
+        """Returns what check_winner returns for the board with the index"""
+        return _PIECES[self.winner_codes[index]]
+
+    def get_current_player(self, index: int):
+        """Returns the piece that moves next on the board with the index"""
+        return _PIECES[self.current_player_codes[index]]
+
+    def get_legal_move_mask(self, index: int):
+        """Returns a 9 bit integer with bit i set if cell i is empty on the board with the index"""
+        return self.legal_move_masks[index]
+
+    def compute_size_in_bytes(self):
+        """Returns the number of bytes used by the compact arrays"""
+        return len(self.winner_codes) + len(self.current_player_codes) + self.legal_move_masks.itemsize*len(self.legal_move_masks)
+
+_board_state_table = None
+
+def compute_board_index(board):
+    """Returns the board state table index for a board given as a string or list of 'X', 'O', and ' ' characters or None if it is not such a board"""
+    if type(board) != str:
+        try:
+            board = "".join(board)
+        except TypeError:
+            return None
+    return convert_board_to_board_index(board)
+
+def get_board_state_table() -> BoardStateTable:
+    """Returns the board state table, building it on first use"""
+    global _board_state_table
+    if _board_state_table is None:
+        _board_state_table = BoardStateTable()
+    return _board_state_table
+
+def check_winner(board):
+    index = compute_board_index(board)
+    if index is None:
+        return _check_winner_by_scanning_lines(board)
+    return get_board_state_table().get_winner(index)
+
+def compute_winner_and_current_player(board):
+    """Returns what check_winner and compute_current_player return for the board using a single board state table lookup"""
+    index = compute_board_index(board)
+    if index is None:
+        return _check_winner_by_scanning_lines(board), _compute_current_player_by_counting(board)
+    table = get_board_state_table()
+    return table.get_winner(index), table.get_current_player(index)
+
+def compute_legal_move_mask(board):
+    """Returns a 9 bit integer with bit i set if cell i of the board is empty"""
+    index = compute_board_index(board)
+    if index is None:
+        return sum(1 << cell for cell, character in enumerate(board) if character == ' ')
+    return get_board_state_table().get_legal_move_mask(index)
+
+#Move sequences on the standard board are encoded as bijective base 9 numbers. Each digit is a cell index plus 1 and the first move is the least significant digit,
+#so every sequence of up to 9 moves, including the empty one, gets its own code and the length needs no separate field
+MAXIMUM_MOVE_SEQUENCE_LENGTH = 9
+MAXIMUM_MOVE_SEQUENCE_CODE = sum(9*9**position for position in range(MAXIMUM_MOVE_SEQUENCE_LENGTH))
+#The number of bits needed to hold any move sequence code
+MOVE_SEQUENCE_CODE_BITS = MAXIMUM_MOVE_SEQUENCE_CODE.bit_length()
+
+def encode_move_sequence(moves):
+    """Returns the code for a sequence of up to 9 cell indices on the standard board"""
+    code = 0
+    for move in reversed(moves):
+        code = code*9 + move + 1
+    return code
+
+def decode_move_sequence(code: int):
+    """Returns the list of cell indices encoded by encode_move_sequence"""
+    moves = []
+    while code:
+        code, digit = divmod(code - 1, 9)
+        moves.append(digit)
+    return moves
+
+def compute_board_after_moves(moves, board_size: int = DEFAULT_BOARD_SIZE):
+    """Returns the board text after playing the cell indices in order, starting with X"""
+    cells = [' ']*(board_size*board_size)
+    for move_number, move in enumerate(moves):
+        cells[move] = 'X' if move_number % 2 == 0 else 'O'
+    return "".join(cells)
@@ -0,0 +1,147 @@
+#This module stores finished games compactly so that they can be dropped from the live games.
+#Each archived game is kept as its players, board configuration, move sequence, and outcome in flat arrays instead of as a Game object.
+#Standard games can also be appended to a record file whose fixed width records can be scanned through a memory map.
+import sys
+import mmap
+from array import array
+
+import game_actions
+
+EXPIRED = game_actions.EXPIRED
+OUTCOMES = ('X', 'O', game_actions.TIE, EXPIRED)
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+
+#Each record in a game record file is a 4 byte unsigned integer in the machine's byte order.
+#The low bits hold the game's move sequence code from game_actions.encode_move_sequence and the 2 bits above them hold its outcome code
+GAME_RECORD_SIZE = 4
+_RECORD_OUTCOME_SHIFT = game_actions.MOVE_SEQUENCE_CODE_BITS
+_RECORD_MOVE_SEQUENCE_MASK = (1 << _RECORD_OUTCOME_SHIFT) - 1
+
+def encode_game_record(moves, outcome: str):
+    """Returns the record for a standard game with the moves and outcome"""
+    return game_actions.encode_move_sequence(moves) | (_OUTCOME_CODES[outcome] << _RECORD_OUTCOME_SHIFT)
+
+def decode_game_record(record: int):
+    """Returns the (moves, outcome) pair stored in the record"""
+    return game_actions.decode_move_sequence(record & _RECORD_MOVE_SEQUENCE_MASK), OUTCOMES[record >> _RECORD_OUTCOME_SHIFT]
+
+class GameRecordFile:
+    def __init__(self, path: str):
+        """Appends records of finished standard games to the file at the path, which is created if needed. Existing records are never changed"""
+        self.file = open(path, 'ab')
+
+    def append_game(self, moves, outcome: str):
+        self.file.write(encode_game_record(moves, outcome).to_bytes(GAME_RECORD_SIZE, sys.byteorder))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class MemoryMappedGameRecords:
+    def __init__(self, path: str):
+        """Maps the game record file at the path into memory for reading. Raises ValueError if the file does not hold whole records"""
+        with open(path, 'rb') as file:
+            size = file.seek(0, 2)
+            if size % GAME_RECORD_SIZE != 0:
+                raise ValueError(f"The game record file {path} has {size} bytes, which is not a multiple of {GAME_RECORD_SIZE}")
+            #Empty files cannot be mapped
+            self.memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.records = memoryview(self.memory_map if size else b"").cast('I')
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_game(self, index: int):
+        """Returns the (moves, outcome) pair of the game with the index"""
+        return decode_game_record(self.records[index])
+
+    def count_outcomes(self):
+        """Returns a dictionary mapping each outcome to the number of games with it by scanning every record"""
+        counts = [0]*len(OUTCOMES)
+        for record in self.records:
+            counts[record >> _RECORD_OUTCOME_SHIFT] += 1
+        return dict(zip(OUTCOMES, counts))
+
+    def close(self):
+        self.records.release()
+        if self.memory_map is not None:
+            self.memory_map.close()
+
+class ArchivedGame:
+    """Represents a game read back from the archive"""
+    def __init__(self, creator_username: str, invited_username: str, board_size: int, winning_length: int, moves, outcome: str):
+        """
+            moves: the cell indices played in order, starting with the creator's first move
+            outcome: the winning piece, game_actions.TIE, or EXPIRED
+        """
+        self.creator_username = creator_username
+        self.invited_username = invited_username
+        self.board_size = board_size
+        self.winning_length = winning_length
+        self.moves = moves
+        self.outcome = outcome
+
+    def compute_text_after_moves(self, move_count: int):
+        """Returns the board as it was after the first move_count moves"""
+        return game_actions.compute_board_after_moves(self.moves[:move_count], self.board_size)
+
+class GameArchive:
+    def __init__(self, record_file: GameRecordFile = None):
+        """
+            Stores archived games in parallel arrays indexed by archive id, with every username stored once
+            record_file: if given, archived games on the standard board are also appended to it
+        """
+        self.record_file = record_file
+        self.usernames = []
+        self.username_ids = {}
+        self.creator_ids = array('I')
+        self.invited_ids = array('I')
+        self.board_sizes = array('B')
+        self.winning_lengths = array('B')
+        self.outcome_codes = array('B')
+        #Game i's moves are move_bytes[move_offsets[i]:move_offsets[i + 1]], one byte per cell index
+        self.move_offsets = array('Q', [0])
+        self.move_bytes = bytearray()
+
+    def _get_username_id(self, username: str):
+        username_id = self.username_ids.get(username)
+        if username_id is None:
+            username_id = len(self.usernames)
+            self.usernames.append(username)
+            self.username_ids[username] = username_id
+        return username_id
+
+    def archive_game(self, game, outcome: str):
+        """Stores the game with the outcome and returns its archive id"""
+        self.creator_ids.append(self._get_username_id(game.creator_username))
+        self.invited_ids.append(self._get_username_id(game.invited_username))
+        self.board_sizes.append(game.board_size)
+        self.winning_lengths.append(game.winning_length)
+        self.outcome_codes.append(_OUTCOME_CODES[outcome])
+        self.move_bytes.extend(game.moves)
+        self.move_offsets.append(len(self.move_bytes))
+        if self.record_file is not None and game.board_size == game_actions.DEFAULT_BOARD_SIZE and game.winning_length == game_actions.DEFAULT_WINNING_LENGTH:
+            self.record_file.append_game(game.moves, outcome)
+        return len(self.outcome_codes) - 1
+
+    def get_game(self, archive_id: int):
+        """Returns the ArchivedGame with the archive id"""
+        moves = list(self.move_bytes[self.move_offsets[archive_id]:self.move_offsets[archive_id + 1]])
+        return ArchivedGame(
+            self.usernames[self.creator_ids[archive_id]],
+            self.usernames[self.invited_ids[archive_id]],
+            self.board_sizes[archive_id],
+            self.winning_lengths[archive_id],
+            moves,
+            OUTCOMES[self.outcome_codes[archive_id]]
+        )
+
+    def __len__(self):
+        return len(self.outcome_codes)
+
+    def compute_size_in_bytes(self):
+        """Returns the number of bytes used by the arrays, excluding the stored usernames"""
+        arrays = [self.creator_ids, self.invited_ids, self.board_sizes, self.winning_lengths, self.outcome_codes, self.move_offsets]
+        return sum(stored_array.itemsize*len(stored_array) for stored_array in arrays) + len(self.move_bytes)
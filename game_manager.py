@@ -1,12 +1,39 @@
+import sys
+import time
+import itertools
+from collections import OrderedDict
+
 import game_actions
+from game_archive import GameArchive, EXPIRED
+from bitboard import BitBoard
+from grid_board import GridBoard
+from timers import TimerScheduler
+
+def create_board(board_size: int, winning_length: int):
+    """Returns an empty board, using the bitboard engine for standard tictactoe and the grid engine for everything else"""
+    if board_size == game_actions.DEFAULT_BOARD_SIZE and winning_length == game_actions.DEFAULT_WINNING_LENGTH:
+        return BitBoard()
+    return GridBoard(board_size, winning_length)
 
 class Game:
-    def __init__(self, creator_username, invited_username):
+    def __init__(self, creator_username, invited_username, board_size=game_actions.DEFAULT_BOARD_SIZE, winning_length=game_actions.DEFAULT_WINNING_LENGTH, move_time_limit: float = None):
+        """move_time_limit: the number of seconds each player has to make each move, after which they lose. The game is untimed if unspecified"""
         self.creator_username = creator_username
         self.invited_username = invited_username
         self.players = [creator_username, invited_username]
-        self.board = [' ' for _ in range(9)]
+        self.board_size = board_size
+        self.winning_length = winning_length
+        self.board = create_board(board_size, winning_length)
+        #The history of cell indices played in order, starting with the creator's first move
+        self.moves = []
+        #Assigned by the GameHandler that creates the game. The id is the pair of players, which every game between them shares, and the number identifies the game
+        self.game_id = None
+        self.number = None
         self.current_turn = creator_username
+        self.spectators = set()
+        self.move_time_limit = move_time_limit
+        #The time by which the player whose turn it is must move, which the GameHandler sets for timed games
+        self.move_deadline = None
 
         if self.current_turn not in self.players:
             raise ValueError("Invalid current turn")
@@ -18,8 +45,8 @@ class Game:
     def compute_player_outcome(self, victory_condition: str, username: str):
         if victory_condition == self.compute_player_piece(username):
             return game_actions.VICTORY
-        elif victory_condition == game_actions.TIE:
-            return game_actions.TIE
+        elif victory_condition in (game_actions.TIE, game_actions.EXPIRED):
+            return victory_condition
         else:
             return game_actions.LOSS
 
@@ -27,9 +54,10 @@ class Game:
         if username != self.current_turn:
             return False
         move_index = int(move) - 1
-        if self.board[move_index] != ' ':
+        if not self.board.is_cell_empty(move_index):
             return False
-        self.board[move_index] = 'X' if username == self.creator_username else 'O'
+        self.board.place_piece(move_index, self.compute_player_piece(username))
+        self.moves.append(move_index)
         self.switch_turns()
         return True
     
@@ -40,40 +68,213 @@ class Game:
         self.current_turn = self.players[0] if self.current_turn == self.players[1] else self.players[1]
 
     def check_winner(self):
-        return game_actions.check_winner(self.board)
+        return self.board.compute_winner()
 
     def is_over(self):
         return self.check_winner() is not None
 
     def compute_text(self):
-        return "".join(self.board)
+        return self.board.compute_text()
+
+    def compute_text_after_moves(self, move_count: int):
+        """Returns the board as it was after the first move_count moves, rebuilt from the move history"""
+        return game_actions.compute_board_after_moves(self.moves[:move_count], self.board_size)
+
+    def compute_timeout_victory_condition(self):
+        """Returns the winning piece if the player whose turn it is runs out of time"""
+        return 'O' if self.compute_player_piece(self.current_turn) == 'X' else 'X'
 
     def compute_other_player(self, username):
         if username == self.creator_username:
             return self.invited_username
         return self.creator_username
 
+    def add_spectator(self, spectator):
+        """Adds a spectator, such as a connection table entry, to receive updates about the game"""
+        self.spectators.add(spectator)
+
+    def remove_spectator(self, spectator):
+        """Removes the spectator if present and otherwise fails silently"""
+        self.spectators.discard(spectator)
+
+    def get_spectators(self):
+        return self.spectators
+
+def _remove_from_index(index, key, number: int):
+    """Removes the game number from the numbers the index maps the key to, dropping the key once it has no games left"""
+    numbers = index[key]
+    del numbers[number]
+    if not numbers:
+        del index[key]
+
 class GameHandler:
-    def __init__(self):
+    #The default number of seconds an unfinished game may go without moves before it expires
+    DEFAULT_IDLE_GAME_TIMEOUT = 60*60
+    def __init__(self, idle_game_timeout: float = DEFAULT_IDLE_GAME_TIMEOUT, time_function = time.monotonic, archive: GameArchive = None, persistence = None, move_time_limit: float = None):
+        """
+            Keeps the live games. Finished games are moved to the archive and unfinished games expire after going idle
+            idle_game_timeout: the number of seconds an unfinished game may go without being created or moved in before it expires
+            time_function: the function used to get the current time in seconds, which is settable to aid with testing
+            archive: the GameArchive finished and expired games are stored in. A new one is created if unspecified
+            persistence: a game_persistence.GamePersistenceWriter that is told about every created game, move, and removed game. Games are only kept in memory if unspecified
+            move_time_limit: the number of seconds players of newly created games have for each move. Games are untimed if unspecified
+        """
+        #Maps the numbers sent in messages to the live games, so two players can have any number of games together.
+        #Numbers are never reused, including across restarts when games are persisted
         self.games = {}
+        self.next_game_number = 1
+        self.idle_game_timeout = idle_game_timeout
+        self.time_function = time_function
+        self.archive = archive if archive is not None else GameArchive()
+        #Maps the numbers of unfinished games to their last activity time, ordered from the least to the most recently active
+        self.activity_times = OrderedDict()
+        #These map usernames and game ids to the numbers of their live games. The numbers are dictionary keys with None values so that they stay in creation order
+        self.user_game_numbers = {}
+        self.pair_game_numbers = {}
+        self.persistence = persistence
+        self.move_time_limit = move_time_limit
+        #Keeps the move deadlines of timed games by game number
+        self.move_clocks = TimerScheduler()
+
+    def _record_activity(self, number: int):
+        self.activity_times[number] = self.time_function()
+        self.activity_times.move_to_end(number)
+
+    def _start_move_clock(self, game: Game):
+        """Gives the player whose turn it is in a timed game the move time limit to move"""
+        if game.move_time_limit is not None:
+            game.move_deadline = self.time_function() + game.move_time_limit
+            self.move_clocks.schedule(game.number, game.move_deadline)
+
+    def _retire_game(self, game: Game, outcome: str):
+        """Archives the game with the outcome and removes it from the live games"""
+        self.archive.archive_game(game, outcome)
+        self.move_clocks.cancel(game.number)
+        if self.persistence is not None:
+            self.persistence.record_game_removal(game)
+        del self.games[game.number]
+        self.activity_times.pop(game.number, None)
+        _remove_from_index(self.pair_game_numbers, game.game_id, game.number)
+        #A set keeps a game someone created against themselves from being removed from their index twice
+        for username in set(game.game_id):
+            _remove_from_index(self.user_game_numbers, username, game.number)
+
+    def make_move(self, game: Game, username, move):
+        """Makes the move in the game like Game.make_move, archiving the game if the move finished it"""
+        if not game.make_move(username, move):
+            return False
+        if self.games.get(game.number) is game:
+            if self.persistence is not None:
+                self.persistence.record_move(game, game.moves[-1])
+            victory_condition = game.check_winner()
+            if victory_condition is None:
+                self._record_activity(game.number)
+                self._start_move_clock(game)
+            else:
+                self._retire_game(game, victory_condition)
+        return True
+
+    def expire_idle_games(self):
+        """Archives and removes every unfinished game that has been idle for the timeout and returns the list of them"""
+        expired_games = []
+        now = self.time_function()
+        while self.activity_times:
+            number, activity_time = next(iter(self.activity_times.items()))
+            if now - activity_time < self.idle_game_timeout:
+                break
+            game = self.games[number]
+            self._retire_game(game, EXPIRED)
+            expired_games.append(game)
+        return expired_games
+
+    def compute_time_until_next_expiry(self):
+        """Returns the number of seconds until the next unfinished game expires or None if there are no unfinished games"""
+        if not self.activity_times:
+            return None
+        activity_time = next(iter(self.activity_times.values()))
+        return max(0, activity_time + self.idle_game_timeout - self.time_function())
+
+    def end_timed_out_games(self):
+        """Archives and removes every timed game whose current player ran out of time, which loses them the game, and returns a list of (game, victory condition) pairs"""
+        timed_out_games = []
+        for number in self.move_clocks.pop_expired_keys(self.time_function()):
+            game = self.games[number]
+            victory_condition = game.compute_timeout_victory_condition()
+            self._retire_game(game, victory_condition)
+            timed_out_games.append((game, victory_condition))
+        return timed_out_games
+
+    def compute_time_until_next_move_deadline(self):
+        """Returns the number of seconds until the next player of a timed game may run out of time, which can be early when they have moved since, or None if no games are timed"""
+        deadline = self.move_clocks.compute_next_deadline()
+        if deadline is None:
+            return None
+        return max(0, deadline - self.time_function())
 
-    def _should_create_game_with_id(self, game_id):
-        return game_id not in self.games or self.games[game_id].is_over()
+    def create_game(self, creator_username, invited_username, board_size=game_actions.DEFAULT_BOARD_SIZE, winning_length=game_actions.DEFAULT_WINNING_LENGTH):
+        """Creates a game with the next number and returns it. Players may have several live games with each other at once"""
+        game = Game(creator_username, invited_username, board_size, winning_length, self.move_time_limit)
+        game.number = self.next_game_number
+        self._add_game(game)
+        if self.persistence is not None:
+            self.persistence.record_game_creation(game)
+        return game
 
-    def create_game(self, creator_username, invited_username):
-        game_id = self.sorted_game_id(creator_username, invited_username)
-        if self._should_create_game_with_id(game_id):
-            self.games[game_id] = Game(creator_username, invited_username)
-            return game_id
-        return False
+    def _add_game(self, game: Game):
+        """Adds the numbered game to the live games and the indexes"""
+        game_id = self.sorted_game_id(game.creator_username, game.invited_username)
+        game.game_id = game_id
+        self.skip_game_numbers_through(game.number)
+        self.games[game.number] = game
+        self._record_activity(game.number)
+        self._start_move_clock(game)
+        self.pair_game_numbers.setdefault(game_id, {})[game.number] = None
+        for username in game_id:
+            self.user_game_numbers.setdefault(username, {})[game.number] = None
+
+    def restore_game(self, saved_game):
+        """Adds a game saved by game_persistence back to the live games by replaying its moves. Its idle time and move clock start over"""
+        game = Game(saved_game.creator_username, saved_game.invited_username, saved_game.board_size, saved_game.winning_length, self.move_time_limit)
+        game.number = saved_game.number
+        for cell in saved_game.moves:
+            game.make_move(game.get_current_turn(), cell + 1)
+        self._add_game(game)
+        return game
+
+    def skip_game_numbers_through(self, number: int):
+        """Makes sure games created from now on get numbers larger than the number, such as the largest number an earlier run handed out"""
+        self.next_game_number = max(self.next_game_number, number + 1)
 
     def get_game(self, creator_username, invited_username):
-        game_id = self.sorted_game_id(creator_username, invited_username)
-        return self.games.get(game_id)
+        """Returns the most recently created live game between the two players or None if they have none"""
+        numbers = self.pair_game_numbers.get(self.sorted_game_id(creator_username, invited_username))
+        return self.games[next(reversed(numbers))] if numbers else None
+
+    def get_games_between(self, creator_username, invited_username):
+        """Returns a list of the live games between the two players in the order they were created"""
+        return [self.games[number] for number in self.pair_game_numbers.get(self.sorted_game_id(creator_username, invited_username), ())]
 
     def game_exists(self, creator_username, invited_username):
-        game_id = self.sorted_game_id(creator_username, invited_username)
-        return game_id in self.games
+        return self.sorted_game_id(creator_username, invited_username) in self.pair_game_numbers
     
     def sorted_game_id(self, creator_username, invited_username):
-        return ' '.join(sorted([creator_username, invited_username]))
+        """Returns the id shared by every game between the two players, which is the tuple of their usernames in sorted order"""
+        #Interning the usernames makes the tuple's hashing and comparisons cheap when it is used as a dictionary key
+        creator_username = sys.intern(creator_username)
+        invited_username = sys.intern(invited_username)
+        if creator_username <= invited_username:
+            return (creator_username, invited_username)
+        return (invited_username, creator_username)
+
+    def get_game_by_number(self, number: int):
+        """Returns the live game with the number or None if there is none"""
+        return self.games.get(number)
+
+    def count_user_games(self, username):
+        """Returns the number of live games the user is playing in"""
+        return len(self.user_game_numbers.get(username, ()))
+
+    def get_user_games(self, username, start: int, count: int):
+        """Returns a list of up to count of the user's live games in the order they were created, skipping the first start games"""
+        numbers = self.user_game_numbers.get(username, ())
+        return [self.games[number] for number in itertools.islice(numbers, start, start + count)]
@@ -0,0 +1,168 @@
+#This module saves live games to the database so that a restarted server can restore them.
+#Game changes are queued by the selector loop and written by a background thread, which commits everything queued so far in one transaction.
+#The writer switches the database to write-ahead logging, so account sign ins and registrations are not blocked while it commits.
+#BatchedDatabaseWriter is the part of the writer that is not specific to games, which other modules use to save their own changes the same way.
+import queue
+import sqlite3
+import itertools
+import threading
+from operator import itemgetter
+
+from database_management import GAME_TABLE, MOVE_TABLE, GAME_NUMBER_TABLE
+
+GAME_INSERTION_COMMAND = f"INSERT OR REPLACE INTO {GAME_TABLE.name} VALUES (?, ?, ?, ?, ?)"
+MOVE_INSERTION_COMMAND = f"INSERT INTO {MOVE_TABLE.name} VALUES (?, ?)"
+GAME_DELETION_COMMAND = f"DELETE FROM {GAME_TABLE.name} WHERE number = ?"
+MOVE_DELETION_COMMAND = f"DELETE FROM {MOVE_TABLE.name} WHERE game_number = ?"
+#Games are created in increasing number order, so the last number saved is the largest
+GAME_NUMBER_SAVING_COMMAND = f"INSERT OR REPLACE INTO {GAME_NUMBER_TABLE.name} VALUES (0, ?)"
+
+class SavedGame:
+    """Represents a game read back from the database"""
+    def __init__(self, number: int, creator_username: str, invited_username: str, board_size: int, winning_length: int, moves):
+        """moves: the cell indices played in order, starting with the creator's first move"""
+        self.number = number
+        self.creator_username = creator_username
+        self.invited_username = invited_username
+        self.board_size = board_size
+        self.winning_length = winning_length
+        self.moves = moves
+
+class BatchedDatabaseWriter:
+    #The largest number of queued changes committed in one transaction
+    DEFAULT_MAXIMUM_BATCH_SIZE = 4096
+    #What the changes are called in logged errors
+    CHANGE_DESCRIPTION = "changes"
+    def __init__(self, path: str, *, maximum_batch_size: int = DEFAULT_MAXIMUM_BATCH_SIZE, logger=None):
+        """
+            Writes changes to the database at the path on a background thread, so recording a change never waits for the disk
+            path: the path to a database created with create_database_at_path
+            maximum_batch_size: must be assigned values explicitly. The largest number of queued changes committed in one transaction
+            logger: must be assigned values explicitly. An optional logger that database errors are logged to when they happen
+        """
+        self.path = path
+        self.maximum_batch_size = maximum_batch_size
+        self.logger = logger
+        #Holds (command, values) pairs. A None command marks a flush, whose values are the event to set, or closing if the values are None too
+        self.changes = queue.SimpleQueue()
+        self.committed_change_count = 0
+        self.transaction_count = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._write_changes, daemon=True)
+        self.thread.start()
+
+    def record_change(self, command: str, values):
+        """Queues the SQL command to be executed with the values. Changes are committed in the order they were recorded"""
+        self.changes.put((command, values))
+
+    def flush(self):
+        """Waits until every change recorded so far has been committed"""
+        event = threading.Event()
+        self.changes.put((None, event))
+        event.wait()
+
+    def close(self):
+        """Commits the recorded changes and stops the writer thread. Returns the last error the writer ran into or None"""
+        self.changes.put((None, None))
+        self.thread.join()
+        return self.error
+
+    def _take_batch(self):
+        """Waits for a change and returns it along with the other changes already queued, up to the maximum batch size"""
+        batch = [self.changes.get()]
+        while len(batch) < self.maximum_batch_size:
+            try:
+                batch.append(self.changes.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _log_error(self, message: str, error: Exception):
+        self.error = error
+        if self.logger is not None:
+            self.logger.log_message(f"error: {message}: {repr(error)}")
+
+    def _commit_batch(self, connection: sqlite3.Connection, batch):
+        changes = [change for change in batch if change[0] is not None]
+        try:
+            with connection:
+                #Consecutive changes of the same kind become a single executemany, which keeps their order
+                for command, group in itertools.groupby(changes, key=itemgetter(0)):
+                    connection.executemany(command, [values for _, values in group])
+            self.committed_change_count += len(changes)
+            self.transaction_count += 1
+        except Exception as e:
+            #The batch is lost, but the writer keeps going so later changes are still saved
+            self._log_error(f"{len(changes)} {self.CHANGE_DESCRIPTION} could not be saved to {self.path}", e)
+
+    def _signal_flushes(self, batch):
+        """Sets the events of the flushes in the batch and returns whether it asked the writer to close"""
+        is_closing = False
+        for command, values in batch:
+            if command is None:
+                if values is None:
+                    is_closing = True
+                else:
+                    values.set()
+        return is_closing
+
+    def _write_changes(self):
+        connection = None
+        is_closing = False
+        try:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            while not is_closing:
+                batch = self._take_batch()
+                self._commit_batch(connection, batch)
+                is_closing = self._signal_flushes(batch)
+        except Exception as e:
+            self._log_error(f"the writer for {self.path} stopped, so later {self.CHANGE_DESCRIPTION} are not saved", e)
+            #Changes are dropped from here on, but flushing and closing still finish so nothing waits on the writer forever
+            while not is_closing:
+                is_closing = self._signal_flushes(self._take_batch())
+        finally:
+            if connection is not None:
+                connection.close()
+
+class GamePersistenceWriter(BatchedDatabaseWriter):
+    CHANGE_DESCRIPTION = "game changes"
+
+    def record_game_creation(self, game):
+        self.record_change(GAME_INSERTION_COMMAND, (game.number, game.creator_username, game.invited_username, game.board_size, game.winning_length))
+        self.record_change(GAME_NUMBER_SAVING_COMMAND, (game.number,))
+
+    def record_move(self, game, cell: int):
+        self.record_change(MOVE_INSERTION_COMMAND, (game.number, cell))
+
+    def record_game_removal(self, game):
+        self.record_change(MOVE_DELETION_COMMAND, (game.number,))
+        self.record_change(GAME_DELETION_COMMAND, (game.number,))
+
+def load_saved_games_from_database_at_path(path: str):
+    """Returns a list of every SavedGame in the database at the path in increasing number order"""
+    connection = sqlite3.connect(path)
+    try:
+        game_rows = connection.execute(f"SELECT * FROM {GAME_TABLE.name} ORDER BY number").fetchall()
+        move_rows = connection.execute(f"SELECT game_number, cell FROM {MOVE_TABLE.name} ORDER BY game_number, rowid")
+        moves_by_number = {number: [cell for _, cell in rows] for number, rows in itertools.groupby(move_rows, key=itemgetter(0))}
+    finally:
+        connection.close()
+    return [SavedGame(*row, moves_by_number.get(row[0], [])) for row in game_rows]
+
+def load_last_game_number_from_database_at_path(path: str):
+    """Returns the largest game number ever saved to the database at the path, including numbers of games that have since been removed, or 0 if there are none"""
+    connection = sqlite3.connect(path)
+    try:
+        row = connection.execute(f"SELECT last_number FROM {GAME_NUMBER_TABLE.name}").fetchone()
+    finally:
+        connection.close()
+    return 0 if row is None else row[0]
+
+def restore_games_from_database_at_path(game_handler, path: str):
+    """Adds every game saved in the database at the path to the GameHandler and returns how many were restored. Games created afterwards get numbers no saved game ever had"""
+    saved_games = load_saved_games_from_database_at_path(path)
+    for saved_game in saved_games:
+        game_handler.restore_game(saved_game)
+    game_handler.skip_game_numbers_through(load_last_game_number_from_database_at_path(path))
+    return len(saved_games)
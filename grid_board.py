@@ -0,0 +1,76 @@
+#This module represents square boards of any size where a player wins by getting a number of pieces in a row.
+#Cells are numbered from 0 row by row, so cell i is in row i // board_size and column i % board_size.
+import game_actions
+
+EMPTY_CELL = ' '
+
+#The (row step, column step) of the horizontal, vertical, diagonal, and anti-diagonal line directions
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+def is_winning_move(cells, board_size: int, winning_length: int, index: int):
+    """
+        Returns true if the piece at the index is part of winning_length pieces in a row.
+        Only the four lines through the index are checked, so this takes O(winning_length) time regardless of the board size.
+        cells: a string, list, or bytearray of the board's cells
+    """
+    piece = cells[index]
+    row, column = divmod(index, board_size)
+    for row_step, column_step in LINE_DIRECTIONS:
+        count = 1
+        for sign in (1, -1):
+            current_row = row + sign*row_step
+            current_column = column + sign*column_step
+            while count < winning_length and 0 <= current_row < board_size and 0 <= current_column < board_size \
+                    and cells[current_row*board_size + current_column] == piece:
+                count += 1
+                current_row += sign*row_step
+                current_column += sign*column_step
+        if count >= winning_length:
+            return True
+    return False
+
+def compute_winner_by_scanning(board, board_size: int, winning_length: int):
+    """
+        Returns the winning piece, game_actions.TIE if the board is full without a winner, or None if the game is unfinished
+        by checking every line on the board, which is needed when the last move is unknown
+    """
+    for index, character in enumerate(board):
+        if character != EMPTY_CELL and is_winning_move(board, board_size, winning_length, index):
+            return character
+    if EMPTY_CELL not in board:
+        return game_actions.TIE
+    return None
+
+class GridBoard:
+    """A board_size by board_size board that checks for a winner incrementally after every move"""
+    __slots__ = ('board_size', 'winning_length', 'cells', 'number_of_pieces', 'winner')
+
+    def __init__(self, board_size: int, winning_length: int):
+        self.board_size = board_size
+        self.winning_length = winning_length
+        self.cells = bytearray(EMPTY_CELL.encode()*(board_size*board_size))
+        self.number_of_pieces = 0
+        self.winner = None
+
+    def is_cell_empty(self, index: int):
+        """Returns true if index refers to a cell on the board that neither piece occupies"""
+        return 0 <= index < len(self.cells) and self.cells[index] == ord(EMPTY_CELL)
+
+    def place_piece(self, index: int, piece: str):
+        """Puts the piece ('X' or 'O') on the cell at the index, which must be empty, and records whether it ended the game"""
+        self.cells[index] = ord(piece)
+        self.number_of_pieces += 1
+        if self.winner is not None:
+            return
+        if is_winning_move(self.cells, self.board_size, self.winning_length, index):
+            self.winner = piece
+        elif self.number_of_pieces == len(self.cells):
+            self.winner = game_actions.TIE
+
+    def compute_winner(self):
+        """Returns the winning piece, game_actions.TIE, or None if the game is unfinished"""
+        return self.winner
+
+    def compute_text(self):
+        """Returns the board as a string of 'X', 'O', and ' ' characters"""
+        return self.cells.decode('ascii')
@@ -0,0 +1,86 @@
+#This module answers hint requests on the standard board from a board to best moves table.
+#The table either searches each board the first time a hint is requested for it and memoizes the result or is read from a file mapped into memory that holds every board's best moves.
+import os
+import mmap
+import functools
+from array import array
+
+import game_actions
+from solver import Solver
+
+#The hint table file holds one 9 bit mask of best moves per board state table index, with bit i set if cell i is a best move.
+#Finished and unreachable boards have no best moves
+HINT_TABLE_ENTRY_SIZE = array('H').itemsize
+HINT_TABLE_FILE_SIZE = HINT_TABLE_ENTRY_SIZE*game_actions.NUMBER_OF_BOARD_STATES
+
+#Indexing this with a best move mask gives the tuple of moves in the mask
+MOVES_IN_MASK = tuple(tuple(cell for cell in range(9) if mask & (1 << cell)) for mask in range(1 << 9))
+
+def convert_moves_to_mask(moves):
+    mask = 0
+    for move in moves:
+        mask |= 1 << move
+    return mask
+
+class LazyHintTable:
+    """Searches for the best moves of a board the first time a hint is requested for it and remembers them afterwards, so nothing is solved at startup"""
+    def __init__(self, maximum_size: int = None, solver: Solver = None):
+        """
+            maximum_size: the largest number of boards to remember. None means every board is remembered
+            solver: the solver that searches boards. A solver that has not solved any boards is created if unspecified
+        """
+        self.solver = solver if solver is not None else Solver(should_solve_reachable_boards=False)
+        self._get_best_moves = functools.lru_cache(maxsize=maximum_size)(self.solver.compute_best_moves)
+
+    def get_best_moves(self, board: str):
+        """Returns the tuple of best moves for the unfinished board in increasing order"""
+        return self._get_best_moves(board)
+
+    def compute_size(self):
+        """Returns the number of boards remembered"""
+        return self._get_best_moves.cache_info().currsize
+
+    def close(self):
+        self._get_best_moves.cache_clear()
+
+class MemoryMappedHintTable:
+    """Reads best moves from a hint table file mapped into memory, so startup and hints need no search"""
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self.memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.memory_map)
+        if size != HINT_TABLE_FILE_SIZE:
+            self.memory_map.close()
+            raise ValueError(f"The hint table file {path} has {size} bytes instead of {HINT_TABLE_FILE_SIZE}")
+        self.masks = memoryview(self.memory_map).cast('H')
+
+    def get_best_moves(self, board: str):
+        """Returns the tuple of best moves for the unfinished board in increasing order"""
+        return MOVES_IN_MASK[self.masks[game_actions.compute_board_index(board)]]
+
+    def compute_size(self):
+        """Returns the number of bytes in the hint table file"""
+        return len(self.memory_map)
+
+    def close(self):
+        self.masks.release()
+        self.memory_map.close()
+
+def write_hint_table_file(path: str, solver: Solver = None):
+    """Solves every reachable board, unless a solver that already has is given, and writes their best moves to a hint table file"""
+    if solver is None:
+        solver = Solver()
+    masks = array('H', bytes(HINT_TABLE_FILE_SIZE))
+    for board, moves in solver.best_moves.items():
+        masks[game_actions.compute_board_index(board)] = convert_moves_to_mask(moves)
+    #Writing to a temporary file first keeps a partially written table from being mapped if writing fails
+    temporary_path = path + ".tmp"
+    with open(temporary_path, 'wb') as file:
+        masks.tofile(file)
+    os.replace(temporary_path, path)
+
+def open_memory_mapped_hint_table(path: str, solver: Solver = None):
+    """Opens the hint table file at the path, writing it first if it does not exist"""
+    if not os.path.exists(path):
+        write_hint_table_file(path, solver)
+    return MemoryMappedHintTable(path)
@@ -4,6 +4,9 @@ import file_utilities
 
 class Logger:
     """A logger is used to record logging messages."""
+    #Determines if handle_debug_message records anything. Concrete loggers set it when they are created
+    debugging_mode = False
+
     def _commit_message_to_log(self, value, category):
         """Concrete loggers must override this"""
         pass
@@ -0,0 +1,186 @@
+#This module pairs players who are looking for an opponent without naming one.
+#Waiting players are kept in buckets of similar ratings, each in the order the players joined, so a new player only looks at the few buckets near
+#their rating, taking the oldest player in them who is close enough. Players accept opponents further from their rating the longer they wait.
+import time
+import bisect
+from collections import OrderedDict
+
+#The rating of players who have not played a rated game
+DEFAULT_RATING = 1200
+
+class QueuedPlayer:
+    __slots__ = ('username', 'rating', 'enqueue_time')
+
+    def __init__(self, username: str, rating: float, enqueue_time: float):
+        self.username = username
+        self.rating = rating
+        self.enqueue_time = enqueue_time
+
+class MatchmakingQueue:
+    #The width of the rating range of each bucket
+    DEFAULT_BUCKET_WIDTH = 100
+    #The largest rating difference a player accepts when they join the queue. At least the bucket width, so players in the same bucket are always paired
+    DEFAULT_INITIAL_RATING_GAP = 100
+    #The amount the accepted rating difference grows by for each second a player waits
+    DEFAULT_RATING_GAP_GROWTH = 10
+    DEFAULT_MAXIMUM_RATING_GAP = 800
+    #The number of seconds between passes that pair players whose accepted rating differences have grown to reach each other
+    DEFAULT_PAIRING_INTERVAL = 1.0
+    def __init__(self, *, bucket_width: float = DEFAULT_BUCKET_WIDTH, initial_rating_gap: float = DEFAULT_INITIAL_RATING_GAP, rating_gap_growth: float = DEFAULT_RATING_GAP_GROWTH,
+                 maximum_rating_gap: float = DEFAULT_MAXIMUM_RATING_GAP, pairing_interval: float = DEFAULT_PAIRING_INTERVAL, time_function=time.monotonic):
+        """
+            Keeps the players waiting for an opponent and pairs them, each pairing taking O(log b) time for b nonempty buckets plus the buckets within the maximum rating gap
+            and the players in them who joined while their accepted rating difference could still reach the new player
+            bucket_width: must be assigned values explicitly
+            initial_rating_gap: must be assigned values explicitly
+            rating_gap_growth: must be assigned values explicitly
+            maximum_rating_gap: must be assigned values explicitly
+            pairing_interval: must be assigned values explicitly
+            time_function: must be assigned values explicitly. The function used to get the current time in seconds, which is settable to aid with testing
+        """
+        self.bucket_width = bucket_width
+        self.initial_rating_gap = initial_rating_gap
+        self.rating_gap_growth = rating_gap_growth
+        self.maximum_rating_gap = maximum_rating_gap
+        self.pairing_interval = pairing_interval
+        self.time_function = time_function
+        #Maps bucket indexes to ordered dictionaries mapping usernames to QueuedPlayer objects, oldest first
+        self.buckets = {}
+        #The indexes of the nonempty buckets in increasing order
+        self.bucket_indexes = []
+        self.queued_players = {}
+        self.next_pairing_time = None
+
+    def __len__(self):
+        return len(self.queued_players)
+
+    def __contains__(self, username):
+        return username in self.queued_players
+
+    def _compute_bucket_index(self, rating: float):
+        return int(rating//self.bucket_width)
+
+    def compute_rating_gap(self, player: QueuedPlayer, now: float):
+        """Returns the largest rating difference the player accepts after waiting until now"""
+        return min(self.maximum_rating_gap, self.initial_rating_gap + self.rating_gap_growth*(now - player.enqueue_time))
+
+    def _compute_distance_to_bucket(self, rating: float, bucket_index: int):
+        """Returns the smallest rating difference between the rating and any rating in the bucket"""
+        bucket_start = bucket_index*self.bucket_width
+        return max(0, bucket_start - rating, rating - (bucket_start + self.bucket_width))
+
+    def _can_pair(self, first_player: QueuedPlayer, second_player: QueuedPlayer, now: float):
+        #The player who waited longer decides, so nobody waits on a newer player's narrower range
+        rating_gap = max(self.compute_rating_gap(first_player, now), self.compute_rating_gap(second_player, now))
+        return abs(first_player.rating - second_player.rating) <= rating_gap
+
+    def _add_player(self, player: QueuedPlayer):
+        bucket_index = self._compute_bucket_index(player.rating)
+        bucket = self.buckets.get(bucket_index)
+        if bucket is None:
+            bucket = OrderedDict()
+            self.buckets[bucket_index] = bucket
+            bisect.insort(self.bucket_indexes, bucket_index)
+        bucket[player.username] = player
+        self.queued_players[player.username] = player
+        if self.next_pairing_time is None:
+            self.next_pairing_time = self.time_function() + self.pairing_interval
+
+    def remove_player(self, username: str):
+        """Takes the user out of the queue and returns their QueuedPlayer, or None if they were not queued"""
+        player = self.queued_players.pop(username, None)
+        if player is None:
+            return None
+        bucket_index = self._compute_bucket_index(player.rating)
+        bucket = self.buckets[bucket_index]
+        del bucket[username]
+        if not bucket:
+            del self.buckets[bucket_index]
+            del self.bucket_indexes[bisect.bisect_left(self.bucket_indexes, bucket_index)]
+        if len(self.queued_players) < 2:
+            self.next_pairing_time = None
+        return player
+
+    def _find_opponent(self, player: QueuedPlayer, now: float):
+        """Returns the oldest player of the nearest bucket holding anyone who can be paired with the player, or None. The player itself must not be queued"""
+        bucket_index = self._compute_bucket_index(player.rating)
+        #No player further away than the maximum rating gap can be paired, so the search stops there
+        bucket_reach = int(self.maximum_rating_gap//self.bucket_width) + 1
+        below = bisect.bisect_right(self.bucket_indexes, bucket_index) - 1
+        above = below + 1
+        while below >= 0 or above < len(self.bucket_indexes):
+            below_distance = bucket_index - self.bucket_indexes[below] if below >= 0 else None
+            above_distance = self.bucket_indexes[above] - bucket_index if above < len(self.bucket_indexes) else None
+            if above_distance is None or (below_distance is not None and below_distance <= above_distance):
+                distance, candidate_index = below_distance, self.bucket_indexes[below]
+                below -= 1
+            else:
+                distance, candidate_index = above_distance, self.bucket_indexes[above]
+                above += 1
+            if distance > bucket_reach:
+                return None
+            rating_distance = self._compute_distance_to_bucket(player.rating, candidate_index)
+            player_rating_gap = self.compute_rating_gap(player, now)
+            for candidate in self.buckets[candidate_index].values():
+                if self._can_pair(player, candidate, now):
+                    return candidate
+                #Players further along the bucket joined later and accept no larger differences, so once this one cannot reach the bucket neither can they
+                if max(player_rating_gap, self.compute_rating_gap(candidate, now)) < rating_distance:
+                    break
+        return None
+
+    def enqueue(self, username: str, rating: float):
+        """
+            Pairs the user, who must not be queued already, with a waiting player if one is close enough in rating and otherwise adds the user to the queue.
+            Returns the QueuedPlayer of the opponent, who is taken out of the queue, or None if the user is now waiting
+        """
+        now = self.time_function()
+        player = QueuedPlayer(username, rating, now)
+        opponent = self._find_opponent(player, now)
+        if opponent is None:
+            self._add_player(player)
+            return None
+        self.remove_player(opponent.username)
+        return opponent
+
+    def pair_waiting_players(self):
+        """
+            Pairs waiting players whose accepted rating differences have grown to reach each other and returns a list of (older player, newer player) pairs.
+            Only the oldest players of neighbouring buckets are compared, which keeps the pass O(b), so this pairing is approximate: a newer player of a bucket who is close enough
+            to a neighbouring bucket's oldest player waits for the next pass that reaches them, or for a new player to join near their rating
+        """
+        now = self.time_function()
+        pairs = []
+        previous_player = None
+        for bucket_index in self.bucket_indexes:
+            player = next(iter(self.buckets[bucket_index].values()))
+            if previous_player is not None and self._can_pair(previous_player, player, now):
+                pairs.append((previous_player, player) if previous_player.enqueue_time <= player.enqueue_time else (player, previous_player))
+                previous_player = None
+            else:
+                previous_player = player
+        for pair in pairs:
+            for player in pair:
+                del self.queued_players[player.username]
+                bucket_index = self._compute_bucket_index(player.rating)
+                bucket = self.buckets[bucket_index]
+                del bucket[player.username]
+                if not bucket:
+                    del self.buckets[bucket_index]
+        #Emptied buckets are dropped in one pass instead of one at a time
+        if pairs:
+            self.bucket_indexes = [bucket_index for bucket_index in self.bucket_indexes if bucket_index in self.buckets]
+        self.next_pairing_time = now + self.pairing_interval if len(self.queued_players) >= 2 else None
+        return pairs
+
+    def pair_waiting_players_if_due(self):
+        """Runs a pairing pass if the pairing interval has passed since the last one and returns the pairs like pair_waiting_players"""
+        if self.next_pairing_time is not None and self.time_function() >= self.next_pairing_time:
+            return self.pair_waiting_players()
+        return []
+
+    def compute_time_until_next_pairing(self):
+        """Returns the number of seconds until the next pairing pass or None if fewer than 2 players are waiting"""
+        if self.next_pairing_time is None:
+            return None
+        return max(0, self.next_pairing_time - self.time_function())
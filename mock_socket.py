@@ -207,4 +207,50 @@ class MockSelector:
         pass
 
     def get_map(self):
-        return self.sockets
\ No newline at end of file
+        return self.sockets
+
+class MockPreloadedSocket:
+    def __init__(self, address, *, sending_limit=None, should_record_sent_bytes=False):
+        """
+            Simulates a connected socket that receives bytes loaded into it ahead of time and counts sent bytes
+            address: the address of the socket
+            sending_limit: the most bytes accepted by a single send call. There is no limit if unspecified
+            should_record_sent_bytes: determines if sent bytes are kept in sent_bytes instead of discarded
+        """
+        self.address = address
+        self.receive_buffer = b""
+        self.sent_byte_count = 0
+        self.sending_limit = sending_limit
+        self.should_record_sent_bytes = should_record_sent_bytes
+        self.sent_bytes = bytearray()
+
+    def load(self, message_bytes):
+        """Makes the bytes available to be received"""
+        self.receive_buffer += message_bytes
+
+    def recv(self, amount_of_bytes_to_receive: int):
+        result = self.receive_buffer[:amount_of_bytes_to_receive]
+        self.receive_buffer = self.receive_buffer[amount_of_bytes_to_receive:]
+        return result
+
+    def send(self, message_bytes):
+        if self.sending_limit is not None:
+            message_bytes = message_bytes[:self.sending_limit]
+        self.sent_byte_count += len(message_bytes)
+        if self.should_record_sent_bytes:
+            self.sent_bytes += message_bytes
+        return len(message_bytes)
+
+    def close(self):
+        pass
+
+    def has_received_bytes(self):
+        return len(self.receive_buffer) > 0
+
+class MockIgnoringSelector:
+    """Simulates a selector for connection handlers that are driven directly instead of through select calls"""
+    def modify(self, *args, **kwargs):
+        pass
+
+    def unregister(self, *args):
+        pass
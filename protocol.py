@@ -127,7 +127,8 @@ class MessageHandler:
         if self.field_index < 0:
             self._advance_field()
         number_of_new_bytes = len(self.bytes) - self.bytes_index
-        if self.next_expected_size:
+        #A variable length field's expected size is None until its length is read, which can be 0 for an empty string
+        if self.next_expected_size is not None:
             if number_of_new_bytes >= self.next_expected_size:
                 self._advance_field()
         elif number_of_new_bytes >= self.protocol.compute_variable_length_field_max_size(self.field_index):
@@ -273,6 +274,14 @@ def create_single_byte_nonnegative_integer_message_protocol(type_code: int):
     protocol = create_protocol(type_code, field)
     return protocol
 
+def create_two_byte_nonnegative_integer_message_protocol(type_code: int, field_name: str='number'):
+    """
+        Returns a message protocol with the specified type code for messages having a single nonnegative two byte integer field
+    """
+    field = create_two_byte_nonnegative_integer_protocol_field(field_name)
+    protocol = create_protocol(type_code, field)
+    return protocol
+
 def create_username_and_password_message_protocol(type_code: int):
     """
         Returns a message protocol for a username and password field
@@ -307,6 +316,56 @@ def create_nine_character_single_string_message_protocol(type_code: int):
     """
     return create_fixed_length_string_message_protocol(type_code, 9)
 
+def create_game_number_protocol_field():
+    """Returns the field holding the number of the game a message is about, which starts every game message"""
+    return create_four_byte_nonnegative_integer_protocol_field("game")
+
+def create_game_number_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating the number of a game
+    """
+    return create_protocol(type_code, create_game_number_protocol_field())
+
+def create_game_board_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating a game's number and square board of any size as a string of its cells
+        along with the number of pieces in a row needed to win on it
+    """
+    winning_length_field = create_single_byte_nonnegative_integer_protocol_field("winning_length")
+    text_field = create_string_protocol_field("text", 2)
+    return create_protocol(type_code, [create_game_number_protocol_field(), winning_length_field, text_field])
+
+def create_game_move_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating a game's number followed by the single byte number of the cell to move on
+    """
+    cell_field = create_single_byte_nonnegative_integer_protocol_field("number")
+    return create_protocol(type_code, [create_game_number_protocol_field(), cell_field])
+
+def create_game_username_and_single_character_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating a game's number followed by the opponent's username and a single character
+    """
+    username_field = create_string_protocol_field('opponent', 1)
+    single_character_field = create_single_character_string_protocol_field("character")
+    return create_protocol(type_code, [create_game_number_protocol_field(), username_field, single_character_field])
+
+def create_game_number_and_username_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating a game's number followed by a username
+    """
+    username_field = creates_single_byte_length_field_string_protocol_field("username")
+    return create_protocol(type_code, [create_game_number_protocol_field(), username_field])
+
+def create_username_and_board_configuration_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating a username followed by a board size and the number of pieces in a row needed to win
+    """
+    username_field = creates_single_byte_length_field_string_protocol_field("username")
+    board_size_field = create_single_byte_nonnegative_integer_protocol_field("board_size")
+    winning_length_field = create_single_byte_nonnegative_integer_protocol_field("winning_length")
+    return create_protocol(type_code, [username_field, board_size_field, winning_length_field])
+
 def create_single_character_string_message_protocol(type_code: int):
     """
         Returns a message protocol for communicating a single character string
@@ -319,4 +378,12 @@ def create_username_and_single_character_message_protocol(type_code: int):
     """
     username_field = create_string_protocol_field('opponent', 1)
     single_character_field = create_single_character_string_protocol_field("character")
-    return create_protocol(type_code, [username_field, single_character_field])
\ No newline at end of file
+    return create_protocol(type_code, [username_field, single_character_field])
+
+def create_username_and_text_message_protocol(type_code: int):
+    """
+        Returns a message protocol for communicating a username followed by text
+    """
+    username_field = creates_single_byte_length_field_string_protocol_field("username")
+    text_field = create_string_protocol_field("text", 2)
+    return create_protocol(type_code, [username_field, text_field])
\ No newline at end of file
@@ -12,25 +12,53 @@ CHAT_MESSAGE_PROTOCOL_TYPE_CODE = 8
 GAME_CREATION_PROTOCOL_TYPE_CODE = 9
 GAME_PIECE_PROTOCOL_TYPE_CODE = 10
 GAME_ENDING_PROTOCOL_TYPE_CODE = 11
+SPECTATE_GAME_PROTOCOL_TYPE_CODE = 12
+HINT_PROTOCOL_TYPE_CODE = 13
+GAMES_LIST_PROTOCOL_TYPE_CODE = 14
+QUEUE_PROTOCOL_TYPE_CODE = 15
+LEAVE_QUEUE_PROTOCOL_TYPE_CODE = 16
+LEADERBOARD_PROTOCOL_TYPE_CODE = 17
+
+#Join requests with this game number name the game by the other player's username instead. Live games are numbered from 1
+UNNUMBERED_GAME = 0
 
 #For communicating with the client
 CLIENT_PROTOCOL_MAP = protocol.ProtocolMap([
     protocol.create_text_message_protocol(BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE),
     protocol.create_text_message_protocol(HELP_MESSAGE_PROTOCOL_TYPE_CODE),
     protocol.create_text_message_protocol(TEXT_MESSAGE_PROTOCOL_TYPE_CODE),
-    protocol.create_nine_character_single_string_message_protocol(GAME_UPDATE_PROTOCOL_TYPE_CODE),
-    protocol.create_single_character_string_message_protocol(GAME_PIECE_PROTOCOL_TYPE_CODE),
-    protocol.create_username_and_single_character_message_protocol(GAME_ENDING_PROTOCOL_TYPE_CODE)
+    protocol.create_game_board_message_protocol(GAME_UPDATE_PROTOCOL_TYPE_CODE),
+    protocol.create_game_username_and_single_character_message_protocol(GAME_PIECE_PROTOCOL_TYPE_CODE),
+    protocol.create_game_username_and_single_character_message_protocol(GAME_ENDING_PROTOCOL_TYPE_CODE),
+    protocol.create_username_and_text_message_protocol(CHAT_MESSAGE_PROTOCOL_TYPE_CODE),
 ])
 
+#Priorities for messages sent to the client, where 0 is the highest priority. Game critical messages are sent ahead of bulk text
+CLIENT_MESSAGE_PRIORITIES = {
+    GAME_UPDATE_PROTOCOL_TYPE_CODE: 0,
+    GAME_PIECE_PROTOCOL_TYPE_CODE: 0,
+    GAME_ENDING_PROTOCOL_TYPE_CODE: 1,
+    TEXT_MESSAGE_PROTOCOL_TYPE_CODE: 2,
+    CHAT_MESSAGE_PROTOCOL_TYPE_CODE: 2,
+    BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE: 3,
+    HELP_MESSAGE_PROTOCOL_TYPE_CODE: 3,
+}
+
 #For communicating with the server
 SERVER_PROTOCOL_MAP = protocol.ProtocolMap([
     protocol.create_protocol(BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE),
     protocol.create_text_message_protocol(HELP_MESSAGE_PROTOCOL_TYPE_CODE),
     protocol.create_username_and_password_message_protocol(ACCOUNT_CREATION_PROTOCOL_TYPE_CODE),
     protocol.create_username_and_password_message_protocol(SIGN_IN_PROTOCOL_TYPE_CODE),
-    protocol.create_username_message_protocol(JOIN_GAME_PROTOCOL_TYPE_CODE),
-    protocol.create_username_message_protocol(GAME_CREATION_PROTOCOL_TYPE_CODE),
-    protocol.create_protocol(QUIT_GAME_PROTOCOL_TYPE_CODE),
-    protocol.create_single_byte_nonnegative_integer_message_protocol(GAME_UPDATE_PROTOCOL_TYPE_CODE),
+    protocol.create_game_number_and_username_message_protocol(JOIN_GAME_PROTOCOL_TYPE_CODE),
+    protocol.create_username_and_board_configuration_message_protocol(GAME_CREATION_PROTOCOL_TYPE_CODE),
+    protocol.create_game_number_message_protocol(QUIT_GAME_PROTOCOL_TYPE_CODE),
+    protocol.create_game_move_message_protocol(GAME_UPDATE_PROTOCOL_TYPE_CODE),
+    protocol.create_username_message_protocol(SPECTATE_GAME_PROTOCOL_TYPE_CODE),
+    protocol.create_text_message_protocol(CHAT_MESSAGE_PROTOCOL_TYPE_CODE),
+    protocol.create_game_number_message_protocol(HINT_PROTOCOL_TYPE_CODE),
+    protocol.create_two_byte_nonnegative_integer_message_protocol(GAMES_LIST_PROTOCOL_TYPE_CODE, 'page'),
+    protocol.create_protocol(QUEUE_PROTOCOL_TYPE_CODE),
+    protocol.create_protocol(LEAVE_QUEUE_PROTOCOL_TYPE_CODE),
+    protocol.create_protocol(LEADERBOARD_PROTOCOL_TYPE_CODE),
 ])
\ No newline at end of file
@@ -97,6 +97,20 @@ def create_single_byte_nonnegative_integer_protocol_field(name):
     field = ConstantLengthProtocolField(name, "B", 1)
     return field
 
+def create_two_byte_nonnegative_integer_protocol_field(name):
+    """
+        Creates a protocol field for nonnegative integer values that fit in two bytes
+    """
+    field = ConstantLengthProtocolField(name, "H", 2)
+    return field
+
+def create_four_byte_nonnegative_integer_protocol_field(name):
+    """
+        Creates a protocol field for nonnegative integer values that fit in four bytes
+    """
+    field = ConstantLengthProtocolField(name, "I", 4)
+    return field
+
 def create_fixed_length_string_protocol_field(name, size):
     """Creates a fixed length string protocol field with specified name and size"""
     if size > 1:
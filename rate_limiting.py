@@ -0,0 +1,94 @@
+import time
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, time_function=time.monotonic):
+        """
+            A token bucket refills at a constant rate up to a maximum capacity. Every permitted action consumes a token.
+            rate: the number of tokens added to the bucket every second
+            capacity: the maximum number of tokens the bucket can hold, which is the largest permitted burst
+            time_function: the function used to get the current time in seconds, which is settable to aid with testing
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.time_function = time_function
+        self.last_update_time = time_function()
+
+    def _refill(self, now):
+        """Adds the tokens accumulated since the last update"""
+        elapsed_time = now - self.last_update_time
+        if elapsed_time > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed_time*self.rate)
+        self.last_update_time = now
+
+    def has_token(self, now):
+        """Returns true if the bucket has a token available at the specified time and false otherwise"""
+        self._refill(now)
+        return self.tokens >= 1
+
+    def count_available_tokens(self, now):
+        """Returns the number of whole tokens available at the specified time"""
+        self._refill(now)
+        return int(self.tokens)
+
+    def consume(self):
+        """Removes a token from the bucket. Only call this after has_token returns true"""
+        self.tokens -= 1
+
+    def try_consume(self):
+        """Consumes a token and returns true if one is available and otherwise returns false"""
+        if self.has_token(self.time_function()):
+            self.consume()
+            return True
+        return False
+
+class RateLimitConfiguration:
+    def __init__(self, rate: float, capacity: float, type_code_limits=None):
+        """
+            Describes the rate limits applied to every connection
+            rate: the number of messages per second a connection may send
+            capacity: the largest burst of messages a connection may send at once
+            type_code_limits: an optional dictionary mapping type codes to (rate, capacity) tuples for additional per protocol limits
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.type_code_limits = type_code_limits if type_code_limits is not None else {}
+
+class ConnectionRateLimiter:
+    def __init__(self, configuration: RateLimitConfiguration, time_function=time.monotonic):
+        """
+            Decides which messages received over a connection are responded to.
+            Messages must fit within both the connection limit and the limit for their type code if there is one.
+            Messages over the limit are dropped and counted by type code. Connection handlers also ask how many messages the connection limit
+            allows before reading, so the bytes of a connection that used up its burst are left unread instead of being decoded and dropped.
+            configuration: the RateLimitConfiguration for the connection
+            time_function: the function used to get the current time in seconds, which is settable to aid with testing
+        """
+        self.time_function = time_function
+        self.connection_bucket = TokenBucket(configuration.rate, configuration.capacity, time_function)
+        self.type_code_buckets = {}
+        for type_code, (rate, capacity) in configuration.type_code_limits.items():
+            self.type_code_buckets[type_code] = TokenBucket(rate, capacity, time_function)
+        self.dropped_message_counts = {}
+
+    def allow_message(self, type_code: int):
+        """Returns true if a message with the type code should be responded to and false if it should be dropped"""
+        now = self.time_function()
+        type_code_bucket = self.type_code_buckets.get(type_code)
+        if self.connection_bucket.has_token(now) and (type_code_bucket is None or type_code_bucket.has_token(now)):
+            self.connection_bucket.consume()
+            if type_code_bucket is not None:
+                type_code_bucket.consume()
+            return True
+        self.dropped_message_counts[type_code] = self.dropped_message_counts.get(type_code, 0) + 1
+        return False
+
+    def count_allowed_messages(self):
+        """Returns how many messages the connection limit allows right now, not counting the type code limits"""
+        return self.connection_bucket.count_available_tokens(self.time_function())
+
+    def get_dropped_message_count(self, type_code: int = None):
+        """Returns the number of dropped messages with the type code or the total number of dropped messages if no type code is given"""
+        if type_code is None:
+            return sum(self.dropped_message_counts.values())
+        return self.dropped_message_counts.get(type_code, 0)
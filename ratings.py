@@ -0,0 +1,133 @@
+#This module keeps the Elo ratings of players, updating them as rated games end and saving them to the database in the background.
+#The best ratings are cached in a sorted list, so the leaderboard is read from the front of it instead of sorting every rating.
+import bisect
+import heapq
+import sqlite3
+
+from database_management import RATING_TABLE
+from game_persistence import BatchedDatabaseWriter
+from matchmaking import DEFAULT_RATING
+
+RATING_SAVING_COMMAND = f"INSERT OR REPLACE INTO {RATING_TABLE.name} VALUES (?, ?, ?)"
+#The largest rating change a single game can make
+DEFAULT_K_FACTOR = 32
+
+#Scores of the first player, as used by the Elo formula
+WIN_SCORE = 1
+TIE_SCORE = 0.5
+LOSS_SCORE = 0
+
+def compute_expected_score(rating: float, opponent_rating: float):
+    """Returns the score a player is expected to get against the opponent, between 0 and 1"""
+    return 1/(1 + 10**((opponent_rating - rating)/400))
+
+def compute_rating_change(rating: float, opponent_rating: float, score: float, k_factor: float = DEFAULT_K_FACTOR):
+    """Returns the amount a player's rating changes by after scoring score against the opponent. The opponent's rating changes by the negative of it"""
+    return k_factor*(score - compute_expected_score(rating, opponent_rating))
+
+class PlayerRating:
+    __slots__ = ('username', 'rating', 'game_count')
+
+    def __init__(self, username: str, rating: float, game_count: int):
+        self.username = username
+        self.rating = rating
+        self.game_count = game_count
+
+    def compute_leaderboard_key(self):
+        """Returns the key that orders players from the best rating down, breaking ties by username"""
+        return (-self.rating, self.username)
+
+class RatingWriter(BatchedDatabaseWriter):
+    CHANGE_DESCRIPTION = "rating changes"
+
+    def record_rating(self, player_rating: PlayerRating):
+        self.record_change(RATING_SAVING_COMMAND, (player_rating.username, player_rating.rating, player_rating.game_count))
+
+#Compares greater than every leaderboard key
+UNBOUNDED_KEY = (float("inf"), "")
+
+class RatingTable:
+    #The number of best players kept in the leaderboard cache. Players leaving the cache only force it to be rebuilt once fewer than a page remain
+    DEFAULT_LEADERBOARD_CAPACITY = 1000
+    def __init__(self, player_ratings=(), *, writer: RatingWriter = None, k_factor: float = DEFAULT_K_FACTOR, leaderboard_capacity: int = DEFAULT_LEADERBOARD_CAPACITY):
+        """
+            Keeps every player's rating and a cache of the best ones
+            player_ratings: an iterable of PlayerRating objects to start with, such as the ones loaded from the database
+            writer: must be assigned values explicitly. If given, changed ratings are saved through the writer
+            k_factor: must be assigned values explicitly
+            leaderboard_capacity: must be assigned values explicitly. The number of best players kept sorted
+        """
+        self.writer = writer
+        self.k_factor = k_factor
+        self.leaderboard_capacity = leaderboard_capacity
+        self.player_ratings = {player_rating.username: player_rating for player_rating in player_ratings}
+        #Holds the leaderboard keys of exactly the players whose keys are at most the boundary key, in sorted order
+        self.leaderboard_keys = []
+        self.boundary_key = UNBOUNDED_KEY
+        self.leaderboard_rebuild_count = 0
+        self._rebuild_leaderboard()
+
+    def _rebuild_leaderboard(self):
+        """Refills the cache with the best players by scanning every rating"""
+        self.leaderboard_keys = heapq.nsmallest(self.leaderboard_capacity, (player_rating.compute_leaderboard_key() for player_rating in self.player_ratings.values()))
+        is_every_player_cached = len(self.leaderboard_keys) == len(self.player_ratings)
+        self.boundary_key = UNBOUNDED_KEY if is_every_player_cached else self.leaderboard_keys[-1]
+        self.leaderboard_rebuild_count += 1
+
+    def _remove_from_leaderboard(self, player_rating: PlayerRating):
+        key = player_rating.compute_leaderboard_key()
+        if key <= self.boundary_key:
+            del self.leaderboard_keys[bisect.bisect_left(self.leaderboard_keys, key)]
+
+    def _add_to_leaderboard(self, player_rating: PlayerRating):
+        key = player_rating.compute_leaderboard_key()
+        if key <= self.boundary_key:
+            bisect.insort(self.leaderboard_keys, key)
+            if len(self.leaderboard_keys) > self.leaderboard_capacity:
+                self.leaderboard_keys.pop()
+                self.boundary_key = self.leaderboard_keys[-1]
+
+    def get_player_rating(self, username: str):
+        """Returns the user's PlayerRating or None if they have not finished a rated game"""
+        return self.player_ratings.get(username)
+
+    def get_rating(self, username: str):
+        player_rating = self.player_ratings.get(username)
+        return DEFAULT_RATING if player_rating is None else player_rating.rating
+
+    def _change_rating(self, username: str, rating_change: float):
+        player_rating = self.player_ratings.get(username)
+        if player_rating is None:
+            player_rating = PlayerRating(username, DEFAULT_RATING, 0)
+            self.player_ratings[username] = player_rating
+        else:
+            self._remove_from_leaderboard(player_rating)
+        player_rating.rating += rating_change
+        player_rating.game_count += 1
+        self._add_to_leaderboard(player_rating)
+        if self.writer is not None:
+            self.writer.record_rating(player_rating)
+
+    def record_game(self, first_username: str, second_username: str, first_score: float):
+        """Updates both players' ratings after a game where the first player scored first_score and returns the first player's rating change"""
+        rating_change = compute_rating_change(self.get_rating(first_username), self.get_rating(second_username), first_score, self.k_factor)
+        self._change_rating(first_username, rating_change)
+        self._change_rating(second_username, -rating_change)
+        return rating_change
+
+    def get_leaderboard(self, count: int):
+        """Returns a list of the PlayerRating objects of up to count best rated players, best first, in O(count) time unless the cache has to be rebuilt"""
+        if len(self.leaderboard_keys) < min(count, len(self.player_ratings)):
+            self._rebuild_leaderboard()
+        return [self.player_ratings[username] for _, username in self.leaderboard_keys[:count]]
+
+    def __len__(self):
+        return len(self.player_ratings)
+
+def load_player_ratings_from_database_at_path(path: str):
+    """Returns a list of every PlayerRating saved in the database at the path"""
+    connection = sqlite3.connect(path)
+    try:
+        return [PlayerRating(*row) for row in connection.execute(f"SELECT * FROM {RATING_TABLE.name}")]
+    finally:
+        connection.close()
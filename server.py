@@ -11,30 +11,51 @@ import argparse
 import protocol
 from protocol import Message
 import protocol_definitions
+import game_actions
 import logging_utilities
 import connection_handler
+from rate_limiting import RateLimitConfiguration, ConnectionRateLimiter
+from connection_scheduling import ConnectionScheduler
+from chat import ChatRoom, ChatBatcher
+from matchmaking import MatchmakingQueue
+from ratings import RatingTable, RatingWriter, load_player_ratings_from_database_at_path, WIN_SCORE, TIE_SCORE, LOSS_SCORE
+from solver import get_solver
+from hints import LazyHintTable, open_memory_mapped_hint_table
 from game_manager import GameHandler, Game
+from game_archive import GameArchive, GameRecordFile
 from connection_table import ConnectionTable, ConnectionTableEntry
-from database_management import Account, create_database_at_path, retrieve_account_with_name_from_database_at_path, insert_account_into_database_at_path
+from game_persistence import GamePersistenceWriter, restore_games_from_database_at_path
+from database_management import Account, create_database_at_path, retrieve_account_with_name_from_database_at_path, insert_account_into_database_at_path, close_database_connections, AccountCache, configure_account_cache, get_account_cache
 import sqlite3 #Imported for database exceptions only
 
 class AssociatedConnectionState:
     """Data structure for holding variables associated with a connection"""
     def __init__(self):
         self.username = None
+        #Maps the numbers of the games the connection has joined to the games
+        self.joined_games = {}
+        #The most recently joined game, which chat messages go to and which spectators of the player watch
         self.current_game = None
+        self.spectated_game = None
 
     def __str__(self) -> str:
-        return f"Username: {self.username}, playing game: {self.current_game}"
+        return f"Username: {self.username}, playing games: {list(self.joined_games)}, current game: {self.current_game}, spectating game: {self.spectated_game}"
 
 help_messages = {
-    "": "Help topics include:\nregister\nlogin\ncreate-game\njoin-game\nmove\nquit\n\nType 'help' followed by the command you would like more information about.",
+    "": "Help topics include:\nregister\nlogin\ncreate-game\njoin-game\nmove\nquit\nselect\nspectate\nchat\nhint\ngames\nqueue\nleaderboard\n\nType 'help' followed by the command you would like more information about.",
     "register": "Upon successfully connecting to the server, you must register an account. To do this, type 'register' followed by your chosen username and password into the terminal, seperated by spaces.",
     "login": "After you have created an account, you will need to login. Type 'login' followed by your registered username and password into the terminal, seperated by spaces.",
-    "create-game": "To create a new game, type 'create' into the terminal followed by the username of your opponent. If you would like to start playing this game, you must join it as well.",
-    "join-game": "To join someone else's game, type 'join' followed by your opponent's username. If you create a game, you must still join it to start playing.",
-    "move": "To make a move, choose a space on the board and find it's corresponding coordinate. The columns are designated by 'a', 'b', or 'c'. The rows are '1', '2', or '3'. An example coordinate would be 'b3'. Type 'move' followed by the chosen coordinate into the terminal to make your move. You can only make a move on empty spaces.",
-    "quit": "To quit a game, enter 'quit' into the terminal."
+    "create-game": "To create a new game, type 'create' into the terminal followed by the username of your opponent. If you would like to start playing this game, you must join it as well. To play against the computer, create a game with 'computer' as your opponent. To play on a bigger board, add its size and how many pieces in a row win, such as 'create Alice 15 5' for a 15 by 15 board needing 5 in a row.",
+    "join-game": "To join someone else's game, type 'join' followed by your opponent's username, or by '#' and the game number shown by 'games', such as 'join #2'. If you create a game, you must still join it to start playing. You can join several games at once, and the game you joined last is selected. If you have several games with the same opponent, joining by username picks the newest one.",
+    "move": "To make a move, choose a space on the board and find it's corresponding coordinate. The columns are designated by 'a', 'b', or 'c'. The rows are '1', '2', or '3'. An example coordinate would be 'b3'. On bigger boards, the letters and numbers continue, such as 'o15' on a 15 by 15 board. Type 'move' followed by the chosen coordinate into the terminal to make your move. You can only make a move on empty spaces.",
+    "quit": "To quit the selected game, enter 'quit' into the terminal.",
+    "select": "To choose which of your joined games your moves, hints, and quitting apply to, type 'select' followed by the game's number, such as 'select 2'. Game numbers are shown with each board and in the 'games' list.",
+    "spectate": "To watch someone else's game, type 'spectate' followed by the username of one of its players. You will receive the board after every move until the game ends.",
+    "chat": "To send a chat message, type 'chat' followed by your message. While you are playing or spectating a game, the message goes to everyone in the game you joined or spectated last. Otherwise, it goes to everyone logged in who is not in a game.",
+    "hint": "To get advice on your turn, type 'hint'. You will be told the best moves on the board. Hints are only available on the standard 3 by 3 board.",
+    "games": "To list the games you are playing that have not finished, type 'games'. The games are listed 10 at a time, so type 'games' followed by a page number, such as 'games 2', to see more.",
+    "queue": "To be paired with an opponent of a similar rating, type 'queue'. When someone is found, a game is created and both of you join it. The longer you wait, the further from your rating your opponent may be. To stop waiting, type 'unqueue'.",
+    "leaderboard": "To see the best rated players, type 'leaderboard'. Everyone starts with a rating of 1200, which goes up when they win and down when they lose against other players. Games against the computer are not rated."
 }
 
 def create_listening_socket(address):
@@ -48,7 +69,15 @@ def create_listening_socket(address):
     return lsock
 
 class Server:
-    def __init__(self, host, port, selector, logger, database_path, listening_socket_creation_function):
+    #The default maximum number of messages responded to for each connection per selector loop iteration
+    DEFAULT_MESSAGE_BUDGET = 32
+    #The reserved username of the computer opponent, which plays perfectly on the standard board
+    BOT_USERNAME = "computer"
+    #The number of games listed on each page of the games command
+    GAMES_PAGE_SIZE = 10
+    #The number of players listed by the leaderboard command
+    LEADERBOARD_SIZE = 10
+    def __init__(self, host, port, selector, logger, database_path, listening_socket_creation_function, *, rate_limit_configuration: RateLimitConfiguration=None, message_budget: int=DEFAULT_MESSAGE_BUDGET, chat_flush_interval: float=ChatBatcher.DEFAULT_FLUSH_INTERVAL, hint_table_path: str=None, idle_game_timeout: float=GameHandler.DEFAULT_IDLE_GAME_TIMEOUT, should_persist_games: bool=False, game_record_path: str=None, move_time_limit: float=None):
         """
             Runs the server side of interactions with clients
             host: the server's host address
@@ -56,14 +85,41 @@ class Server:
             selector: the selector used to handle connection sockets
             logger: the logger to use for logging significant occurrences or errors
             listening_socket_creation_function: the function used to create a socket from an address, which is settable to aid with testing
+            rate_limit_configuration: must be assigned values explicitly. If given, messages from each connection are rate limited according to it before being responded to
+            message_budget: must be assigned values explicitly. The maximum number of messages responded to for each connection per loop iteration. None removes the limit
+            chat_flush_interval: must be assigned values explicitly. The number of seconds chat messages are held so that each recipient gets them in one write
+            hint_table_path: must be assigned values explicitly. If given, hints are read from the hint table file at the path, which is written first if missing.
+            Otherwise, each board is searched the first time a hint is requested for it and memoized. The game is only solved once a computer opponent first moves
+            idle_game_timeout: must be assigned values explicitly. The number of seconds an unfinished game may go without moves before it expires
+            should_persist_games: must be assigned values explicitly. If true, live games are saved to the database in the background and the games saved by an earlier run are restored
+            game_record_path: must be assigned values explicitly. If given, finished standard games are appended to the game record file at the path
+            move_time_limit: must be assigned values explicitly. If given, players have this many seconds for each move and lose when they run out. Games are untimed otherwise
         """
         self.selector = selector
         self.logger = logger
         self.database_path = database_path
         self.create_socket_from_address = listening_socket_creation_function
+        self.rate_limit_configuration = rate_limit_configuration
+        self.message_budget = message_budget
+        self.connection_scheduler = ConnectionScheduler(self._handle_connection_error)
         self.usernames_to_connections = {}
         self.connection_table = ConnectionTable(self.usernames_to_connections)
-        self.game_handler = GameHandler()
+        self.game_persistence = GamePersistenceWriter(database_path, logger=logger) if should_persist_games else None
+        self.game_record_file = GameRecordFile(game_record_path) if game_record_path is not None else None
+        self.game_handler = GameHandler(idle_game_timeout, archive=GameArchive(self.game_record_file), persistence=self.game_persistence, move_time_limit=move_time_limit)
+        if should_persist_games:
+            restored_game_count = restore_games_from_database_at_path(self.game_handler, database_path)
+            self.logger.log_message(f"restored {restored_game_count} games from the database")
+        self.lobby_chat_room = ChatRoom()
+        self.game_chat_rooms = {}
+        self.chat_batcher = ChatBatcher(chat_flush_interval)
+        self.matchmaking_queue = MatchmakingQueue()
+        self.rating_writer = RatingWriter(database_path, logger=logger)
+        self.rating_table = RatingTable(load_player_ratings_from_database_at_path(database_path), writer=self.rating_writer)
+        if hint_table_path is None:
+            self.hint_table = LazyHintTable()
+        else:
+            self.hint_table = open_memory_mapped_hint_table(hint_table_path)
         listening_socket = self.create_socket_from_address((host, port))
         self.selector.register(listening_socket, selectors.EVENT_READ, data=None)
         self._create_protocol_callback_handler()
@@ -79,20 +135,13 @@ class Server:
         self.protocol_callback_handler.register_callback_with_protocol(self.handle_game_join, protocol_definitions.JOIN_GAME_PROTOCOL_TYPE_CODE)
         self.protocol_callback_handler.register_callback_with_protocol(self.handle_game_quit, protocol_definitions.QUIT_GAME_PROTOCOL_TYPE_CODE)
         self.protocol_callback_handler.register_callback_with_protocol(self.handle_game_move, protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE)
-
-    def _compute_opponent_username(self, username: str):
-        state = self.connection_table.get_entry_state(username)
-        if state is not None and state.current_game is not None:
-            return state.current_game.compute_other_player(username)
-        return None
-
-    def _send_message_to_opponent(self, player_username: str, message: Message):
-        opponent_username = self._compute_opponent_username(player_username)
-        if opponent_username is not None:
-            self.connection_table.send_message_to_entry(message, opponent_username)
-
-    def _send_text_message_to_opponent(self, text, player_username: str):
-        self._send_message_to_opponent(player_username, Message(protocol_definitions.TEXT_MESSAGE_PROTOCOL_TYPE_CODE, text))
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_game_spectate, protocol_definitions.SPECTATE_GAME_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_chat_message, protocol_definitions.CHAT_MESSAGE_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_hint_request, protocol_definitions.HINT_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_games_list_request, protocol_definitions.GAMES_LIST_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_queue_request, protocol_definitions.QUEUE_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_queue_leave_request, protocol_definitions.LEAVE_QUEUE_PROTOCOL_TYPE_CODE)
+        self.protocol_callback_handler.register_callback_with_protocol(self.handle_leaderboard_request, protocol_definitions.LEADERBOARD_PROTOCOL_TYPE_CODE)
 
     def _send_text_message(self, text, connection_information):
         message = Message(protocol_definitions.TEXT_MESSAGE_PROTOCOL_TYPE_CODE, text)
@@ -111,6 +160,9 @@ class Server:
         self.connection_table.send_message_to_entry(message, connection_information)
 
     def handle_account_creation(self, values, connection_information):
+        if values['username'] == self.BOT_USERNAME:
+            self._send_text_message(f"The username {self.BOT_USERNAME} is reserved for the computer opponent!", connection_information)
+            return
         try:
             username = values['username']
             password = values['password']
@@ -128,88 +180,379 @@ class Server:
             text = f"No account with username matches your password!"
         else:
             text = f"You are signed in as {username}!"
-            state = self.connection_table.get_entry_state(connection_information)
+            entry = self.connection_table.get_entry(connection_information)
+            state = entry.get_state()
             state.username = username
             self.usernames_to_connections[username] = connection_information
+            if state.current_game is None:
+                self._enter_chat_room(self.lobby_chat_room, entry)
         self._send_text_message(text, connection_information)
 
+    def _create_game_update_message(self, game: Game):
+        return Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, (game.number, game.winning_length, game.compute_text()))
+
     def handle_game_creation(self, values, connection_information):
         creator_state = self.connection_table.get_entry_state(connection_information)
         creator_username = creator_state.username
         invited_user_username = values["username"]
-        is_game_created = self.game_handler.create_game(creator_username, invited_user_username)
-        if is_game_created:
-            text = "The game was created!"
-        else:
-            text = "The game could not be created."
-        self._send_text_message(text, connection_information)
-        if is_game_created:
-            self._send_text_message(f"{creator_username} invited you to a game!", invited_user_username)
+        board_size = values["board_size"]
+        winning_length = values["winning_length"]
+        if not game_actions.is_valid_board_configuration(board_size, winning_length):
+            text = f"Games need between {game_actions.MINIMUM_WINNING_LENGTH} and {game_actions.MAXIMUM_BOARD_SIZE} pieces in a row to win on a board with at least that many rows."
+            self._send_text_message(text, connection_information)
+            return
+        if invited_user_username == self.BOT_USERNAME and not (board_size == game_actions.DEFAULT_BOARD_SIZE and winning_length == game_actions.DEFAULT_WINNING_LENGTH):
+            self._send_text_message(f"{self.BOT_USERNAME} only plays on the standard 3 by 3 board.", connection_information)
+            return
+        self.game_handler.create_game(creator_username, invited_user_username, board_size, winning_length)
+        self._send_text_message("The game was created!", connection_information)
+        self._send_text_message(f"{creator_username} invited you to a game!", invited_user_username)
+
+    def _find_game_to_join(self, values, joiner_username):
+        """
+            Returns the live game named by a join request if the joiner plays in it and otherwise None.
+            A request naming the other player's username picks their most recently created game with the joiner
+        """
+        if values["game"] == protocol_definitions.UNNUMBERED_GAME:
+            return self.game_handler.get_game(joiner_username, values["username"])
+        game = self.game_handler.get_game_by_number(values["game"])
+        if game is None or joiner_username not in game.players:
+            return None
+        return game
+
+    def _join_game(self, joiner_entry: ConnectionTableEntry, game: Game):
+        """Makes the game the connection's current game and sends it its piece and the board"""
+        joiner_state = joiner_entry.get_state()
+        self._stop_spectating(joiner_entry, should_enter_lobby=False)
+        joiner_state.joined_games[game.number] = game
+        self._switch_current_game(joiner_entry, game)
+        player_piece = game.compute_player_piece(joiner_state.username)
+        piece_message = Message(protocol_definitions.GAME_PIECE_PROTOCOL_TYPE_CODE, (game.number, game.compute_other_player(joiner_state.username), player_piece))
+        joiner_entry.send_message_through_connection(piece_message)
+        joiner_entry.send_message_through_connection(self._create_game_update_message(game))
 
     def handle_game_join(self, values, connection_information):
         joiner_state = self.connection_table.get_entry_state(connection_information)
         joiner_username = joiner_state.username
-        other_player_username = values["username"]
-        if self.game_handler.game_exists(joiner_username, other_player_username):
-            game = self.game_handler.get_game(joiner_username, other_player_username)
-            if joiner_state.current_game is not None:
-                self.handle_game_quit({}, connection_information)
-            joiner_state.current_game = game
-            player_piece = game.compute_player_piece(joiner_username)
-            piece_message = Message(protocol_definitions.GAME_PIECE_PROTOCOL_TYPE_CODE, (player_piece,))
-            self.connection_table.send_message_to_entry(piece_message, connection_information)
-            game_text = game.compute_text()
-            game_message = Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, (game_text,))
-            self.connection_table.send_message_to_entry(game_message, connection_information)
-            self._send_text_message(f"{joiner_username} has joined your game!", other_player_username)
+        game = self._find_game_to_join(values, joiner_username)
+        if game is not None:
+            self._join_game(self.connection_table.get_entry(connection_information), game)
+            self._send_text_message(f"{joiner_username} has joined your game!", game.compute_other_player(joiner_username))
+
+    def _start_matched_game(self, creator_username: str, invited_username: str):
+        """Creates a game between two players paired by the matchmaking queue and joins both of them to it"""
+        game = self.game_handler.create_game(creator_username, invited_username)
+        for username in (creator_username, invited_username):
+            self._send_text_message(f"You were matched with {game.compute_other_player(username)}!", username)
+            self._join_game(self.connection_table.get_entry(username), game)
+
+    def handle_queue_request(self, values, connection_information):
+        username = self.connection_table.get_entry_state(connection_information).username
+        if username is None:
+            self._send_text_message("You must be logged in to look for an opponent.", connection_information)
+        elif username in self.matchmaking_queue:
+            self._send_text_message("You are already waiting for an opponent.", connection_information)
+        else:
+            opponent = self.matchmaking_queue.enqueue(username, self.rating_table.get_rating(username))
+            if opponent is None:
+                self._send_text_message("You are waiting for an opponent. Type 'unqueue' to stop waiting.", connection_information)
+            else:
+                self._start_matched_game(opponent.username, username)
+
+    def handle_queue_leave_request(self, values, connection_information):
+        username = self.connection_table.get_entry_state(connection_information).username
+        if username is not None and self.matchmaking_queue.remove_player(username) is not None:
+            self._send_text_message("You stopped waiting for an opponent.", connection_information)
+        else:
+            self._send_text_message("You are not waiting for an opponent.", connection_information)
+
+    def _pair_queued_players(self):
+        """Starts games between waiting players whose accepted rating differences have grown to reach each other"""
+        for older_player, newer_player in self.matchmaking_queue.pair_waiting_players_if_due():
+            self._start_matched_game(older_player.username, newer_player.username)
 
     def handle_game_quit(self, values, connection_information):
-        state = self.connection_table.get_entry_state(connection_information)
-        game = state.current_game
+        entry = self.connection_table.get_entry(connection_information)
+        state = entry.get_state()
+        game = state.joined_games.get(values["game"])
         if game is not None:
-            self._send_text_message_to_opponent(f"{state.username} has left your game!", state.username)
+            self._send_text_message(f"{state.username} has left your game!", game.compute_other_player(state.username))
+            self._leave_game(entry, game)
         else:
-            self._send_text_message(f"You are not in a game, so you cannot quit one.", connection_information)
-
-    def _message_clients_about_game_ending(self, player_username, opponent_username, victory_condition, game: Game):
-        player_outcome = game.compute_player_outcome(victory_condition, player_username)
-        self.connection_table.send_message_to_entry(Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, (opponent_username, player_outcome)), player_username)
-        opponent_outcome = game.compute_player_outcome(victory_condition, opponent_username)
-        self._send_message_to_opponent(player_username, Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, (player_username, opponent_outcome)))
+            self._send_text_message(f"You are not in that game, so you cannot quit it.", connection_information)
+
+    def _switch_current_game(self, entry: ConnectionTableEntry, game: Game):
+        """Makes the game, which may be None, the connection's current game and moves its chat to the game's chat room or the lobby"""
+        self._leave_chat_rooms(entry)
+        entry.get_state().current_game = game
+        self._enter_chat_room(self.lobby_chat_room if game is None else self._get_game_chat_room(game), entry)
+
+    def _leave_game(self, entry: ConnectionTableEntry, game: Game):
+        """Removes the game from the connection's joined games, making its most recently joined remaining game current if needed"""
+        state = entry.get_state()
+        state.joined_games.pop(game.number, None)
+        if state.current_game is game:
+            self._switch_current_game(entry, next(reversed(state.joined_games.values()), None))
+
+    def _remove_players_from_game(self, game: Game):
+        for username in set(game.players):
+            if self._is_playing_game(username, game):
+                self._leave_game(self.connection_table.get_entry(username), game)
+
+    def _is_rated_game(self, game: Game):
+        return self.BOT_USERNAME not in game.players and game.creator_username != game.invited_username
+
+    def _record_rated_game(self, victory_condition, game: Game):
+        """Updates the players' ratings with the game's result if the game is rated and was played to a result"""
+        if victory_condition == game_actions.EXPIRED or not self._is_rated_game(game):
+            return
+        if victory_condition == game_actions.TIE:
+            creator_score = TIE_SCORE
+        elif victory_condition == game.compute_player_piece(game.creator_username):
+            creator_score = WIN_SCORE
+        else:
+            creator_score = LOSS_SCORE
+        self.rating_table.record_game(game.creator_username, game.invited_username, creator_score)
+
+    def _message_clients_about_game_ending(self, victory_condition, game: Game):
+        self._record_rated_game(victory_condition, game)
+        for username in set(game.players):
+            if self._is_playing_game(username, game):
+                outcome = game.compute_player_outcome(victory_condition, username)
+                message = Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, (game.number, game.compute_other_player(username), outcome))
+                self.connection_table.send_message_to_entry(message, username)
+
+    def _message_spectators_about_game_ending(self, victory_condition, game: Game):
+        """Tells the spectators how the game ended and stops them from spectating it"""
+        if victory_condition == game_actions.TIE:
+            text = f"The game between {game.creator_username} and {game.invited_username} ended in a tie!"
+        else:
+            winner_username = game.creator_username if victory_condition == game.compute_player_piece(game.creator_username) else game.invited_username
+            text = f"{winner_username} won the game between {game.creator_username} and {game.invited_username}!"
+        spectators = list(game.get_spectators())
+        self.connection_table.broadcast_message_to_entries(Message(protocol_definitions.TEXT_MESSAGE_PROTOCOL_TYPE_CODE, (text,)), spectators)
+        for spectator_entry in spectators:
+            self._stop_spectating(spectator_entry)
+
+    def _end_expired_games(self):
+        """Tells the players and spectators of games that expired for being idle and takes the players out of them"""
+        for game in self.game_handler.expire_idle_games():
+            self._message_clients_about_game_ending(game_actions.EXPIRED, game)
+            spectators = list(game.get_spectators())
+            text = f"The game between {game.creator_username} and {game.invited_username} expired."
+            self.connection_table.broadcast_message_to_entries(Message(protocol_definitions.TEXT_MESSAGE_PROTOCOL_TYPE_CODE, (text,)), spectators)
+            for spectator_entry in spectators:
+                self._stop_spectating(spectator_entry)
+            self._remove_players_from_game(game)
+            self._close_game_chat_room(game)
+
+    def _end_timed_out_games(self):
+        """Tells the players and spectators of games whose current player ran out of time how they ended and takes the players out of them"""
+        for game, victory_condition in self.game_handler.end_timed_out_games():
+            self._message_clients_about_game_ending(victory_condition, game)
+            text = f"{game.get_current_turn()} ran out of time in game #{game.number}."
+            for username in set(game.players):
+                if self._is_playing_game(username, game):
+                    self._send_text_message(text, username)
+            self._message_spectators_about_game_ending(victory_condition, game)
+            self._remove_players_from_game(game)
+            self._close_game_chat_room(game)
+
+    def _close_game_chat_room(self, game: Game):
+        """Discards the chat room for the game and moves the players still in it to the lobby"""
+        chat_room = self.game_chat_rooms.pop(game, None)
+        if chat_room is not None:
+            for entry in chat_room.get_members():
+                self._enter_chat_room(self.lobby_chat_room, entry)
+
+    def _stop_spectating(self, spectator_entry: ConnectionTableEntry, *, should_enter_lobby: bool = True):
+        """
+            Removes the connection from the spectators of the game it is spectating if any
+            should_enter_lobby: must be assigned values explicitly. If true, a signed in connection without a current game is moved to the lobby.
+            Callers about to move the connection elsewhere pass false, so the lobby history is not sent for nothing
+        """
+        spectator_state = spectator_entry.get_state()
+        if spectator_state.spectated_game is not None:
+            spectator_state.spectated_game.remove_spectator(spectator_entry)
+            if spectator_state.spectated_game in self.game_chat_rooms:
+                self.game_chat_rooms[spectator_state.spectated_game].remove_member(spectator_entry)
+            spectator_state.spectated_game = None
+            if should_enter_lobby and spectator_state.current_game is None and spectator_state.username is not None:
+                self._enter_chat_room(self.lobby_chat_room, spectator_entry)
+
+    def handle_game_spectate(self, values, connection_information):
+        spectator_entry = self.connection_table.get_entry(connection_information)
+        player_username = values["username"]
+        player_entry = self.connection_table.get_entry(player_username)
+        game = None if player_entry is None else player_entry.get_state().current_game
+        if game is None or game.is_over():
+            self._send_text_message(f"{player_username} is not playing a game you can spectate.", connection_information)
+            return
+        self._stop_spectating(spectator_entry, should_enter_lobby=False)
+        self._leave_chat_rooms(spectator_entry)
+        game.add_spectator(spectator_entry)
+        spectator_entry.get_state().spectated_game = game
+        self._enter_chat_room(self._get_game_chat_room(game), spectator_entry)
+        self._send_text_message(f"You are now spectating {player_username}'s game.", connection_information)
+        self.connection_table.send_message_to_entry(self._create_game_update_message(game), connection_information)
+
+    def _get_game_chat_room(self, game: Game):
+        """Returns the chat room for the players and spectators of the game, creating it if needed"""
+        chat_room = self.game_chat_rooms.get(game)
+        if chat_room is None:
+            chat_room = ChatRoom()
+            self.game_chat_rooms[game] = chat_room
+        return chat_room
+
+    def _compute_chat_room(self, state: AssociatedConnectionState):
+        """Returns the chat room that chat messages from the connection with the state go to"""
+        if state.current_game is not None and state.current_game in self.game_chat_rooms:
+            return self.game_chat_rooms[state.current_game]
+        if state.spectated_game is not None:
+            return self._get_game_chat_room(state.spectated_game)
+        return self.lobby_chat_room
+
+    def _enter_chat_room(self, chat_room: ChatRoom, entry: ConnectionTableEntry):
+        """Adds the connection to the chat room and sends it the recent history of the room"""
+        chat_room.add_member(entry)
+        history = chat_room.get_history()
+        if history:
+            messages = [message for message, _ in history]
+            entry.send_packed_messages_through_connection(messages, b"".join(message_bytes for _, message_bytes in history))
+
+    def _leave_chat_rooms(self, entry: ConnectionTableEntry):
+        """Removes the connection from the lobby and the chat room of the game it is playing if any"""
+        self.lobby_chat_room.remove_member(entry)
+        current_game = entry.get_state().current_game
+        if current_game is not None and current_game in self.game_chat_rooms:
+            self.game_chat_rooms[current_game].remove_member(entry)
+
+    def handle_chat_message(self, values, connection_information):
+        state = self.connection_table.get_entry_state(connection_information)
+        if state.username is None:
+            self._send_text_message("You must be logged in to chat.", connection_information)
+            return
+        chat_room = self._compute_chat_room(state)
+        message = Message(protocol_definitions.CHAT_MESSAGE_PROTOCOL_TYPE_CODE, (state.username, values["text"]))
+        message_bytes = self.connection_table.pack_message(message)
+        chat_room.record_message(message, message_bytes)
+        self.chat_batcher.queue_message_for_recipients(message, message_bytes, chat_room.get_members())
+
+    def _is_playing_game(self, username: str, game: Game):
+        """Returns true if the user is connected and has joined the game"""
+        entry = self.connection_table.get_entry(username)
+        return entry is not None and entry.get_state().joined_games.get(game.number) is game
+
+    def _send_move_to_game(self, game: Game, player_username: str):
+        """Sends the board after the player's move to the players in the game and its spectators and returns the game's victory condition"""
+        recipients = [self.connection_table.get_entry(username) for username in set(game.players) if self._is_playing_game(username, game)]
+        recipients.extend(game.get_spectators())
+        self.connection_table.broadcast_message_to_entries(self._create_game_update_message(game), recipients)
+        return game.check_winner()
+
+    def _make_bot_move_if_its_turn(self, game: Game):
+        """Plays the computer opponent's move if it is its turn and returns the game's victory condition afterwards"""
+        if game.get_current_turn() != self.BOT_USERNAME:
+            return game.check_winner()
+        #The game is solved on the computer opponent's first move, after which every move is a table lookup
+        move_index = get_solver().get_best_move(game.compute_text())
+        self.game_handler.make_move(game, self.BOT_USERNAME, move_index + 1)
+        return self._send_move_to_game(game, self.BOT_USERNAME)
 
     def handle_game_move(self, values, connection_information):
         state = self.connection_table.get_entry_state(connection_information)
-        game: Game = state.current_game
+        game: Game = state.joined_games.get(values["game"])
         if game is None:
-            self._send_text_message("You are not in a game, so you cannot make moves.", connection_information)
+            self._send_text_message("You are not in that game, so you cannot make moves in it.", connection_information)
         elif game.get_current_turn() != state.username:
             self._send_text_message("Not your turn.", connection_information)
         else:
-            if game.make_move(state.username, values["number"]):
-                game_text = game.compute_text()
-                game_message = Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, (game_text,))
-                other_player_username = game.compute_other_player(state.username)
-                self.connection_table.send_message_to_entry(game_message, connection_information)
-                if other_player_username in self.usernames_to_connections:
-                    other_player_connection_information = self.usernames_to_connections[other_player_username]
-                    other_player_game_state = self.connection_table.get_entry_state(other_player_connection_information)
-                    if other_player_game_state.current_game is not None and other_player_game_state.current_game.compute_other_player(other_player_username) == state.username:
-                        self.connection_table.send_message_to_entry(game_message, other_player_connection_information)
-                victory_condition = game.check_winner()
+            if self.game_handler.make_move(game, state.username, values["number"]):
+                victory_condition = self._send_move_to_game(game, state.username)
+                if victory_condition is None:
+                    victory_condition = self._make_bot_move_if_its_turn(game)
                 if victory_condition is not None:
-                    self._message_clients_about_game_ending(state.username, other_player_username, victory_condition, game)
+                    self._message_clients_about_game_ending(victory_condition, game)
+                    self._message_spectators_about_game_ending(victory_condition, game)
+                    self._remove_players_from_game(game)
+                    self._close_game_chat_room(game)
             else:
                 self._send_text_message("This tile is already taken.", connection_information)
 
 
+    def handle_hint_request(self, values, connection_information):
+        state = self.connection_table.get_entry_state(connection_information)
+        game: Game = state.joined_games.get(values["game"])
+        if game is None or game.is_over():
+            text = "You are not in that game, so there is nothing to give hints about."
+        elif game.board_size != game_actions.DEFAULT_BOARD_SIZE or game.winning_length != game_actions.DEFAULT_WINNING_LENGTH:
+            text = "Hints are only available on the standard 3 by 3 board."
+        elif game.get_current_turn() != state.username:
+            text = "Hints are only given on your turn."
+        else:
+            best_moves = self.hint_table.get_best_moves(game.compute_text())
+            move_texts = [game_actions.convert_move_number_to_move_text(move + 1) for move in best_moves]
+            if len(move_texts) == 1:
+                text = f"Hint: the best move is {move_texts[0]}."
+            else:
+                text = f"Hint: the best moves are {', '.join(move_texts)}."
+        self._send_text_message(text, connection_information)
+
+    def _compute_game_listing(self, game: Game, username: str):
+        opponent_username = game.compute_other_player(username)
+        turn_text = "your turn" if game.get_current_turn() == username else f"{opponent_username}'s turn"
+        return f"#{game.number} {opponent_username}: {game.board_size}x{game.board_size} board, {game.winning_length} in a row, {turn_text}"
+
+    def handle_games_list_request(self, values, connection_information):
+        username = self.connection_table.get_entry_state(connection_information).username
+        page = max(1, values["page"])
+        game_count = self.game_handler.count_user_games(username) if username is not None else 0
+        page_count = -(-game_count//self.GAMES_PAGE_SIZE)
+        if username is None:
+            text = "You must be logged in to list your games."
+        elif game_count == 0:
+            text = "You have no open games."
+        elif page > page_count:
+            text = f"There is no page {page}. You have {page_count} {'page' if page_count == 1 else 'pages'} of open games."
+        else:
+            games = self.game_handler.get_user_games(username, (page - 1)*self.GAMES_PAGE_SIZE, self.GAMES_PAGE_SIZE)
+            lines = [f"Your open games (page {page} of {page_count}):"]
+            lines.extend(self._compute_game_listing(game, username) for game in games)
+            text = "\n".join(lines)
+        self._send_text_message(text, connection_information)
+
+    def handle_leaderboard_request(self, values, connection_information):
+        player_ratings = self.rating_table.get_leaderboard(self.LEADERBOARD_SIZE)
+        if not player_ratings:
+            lines = ["Nobody has finished a rated game yet."]
+        else:
+            lines = ["The best rated players:"]
+            lines.extend(f"{rank}. {player_rating.username}: {player_rating.rating:.0f} ({player_rating.game_count} {'game' if player_rating.game_count == 1 else 'games'})" for rank, player_rating in enumerate(player_ratings, 1))
+        username = self.connection_table.get_entry_state(connection_information).username
+        if username is not None:
+            lines.append(f"Your rating: {self.rating_table.get_rating(username):.0f}")
+        self._send_text_message("\n".join(lines), connection_information)
+
     def cleanup_connection(self, connection_information):
         """Performs cleanup when a connection gets closed"""
-        state = self.connection_table.get_entry_state(connection_information)
+        entry = self.connection_table.get_entry(connection_information)
+        state = entry.get_state()
+        self._stop_spectating(entry, should_enter_lobby=False)
+        self._leave_chat_rooms(entry)
+        self.chat_batcher.discard_recipient(entry)
         self.connection_table.remove_entry(connection_information)
         username = state.username
+        if username is not None:
+            self.matchmaking_queue.remove_player(username)
         if username is not None and username in self.usernames_to_connections:
             self.usernames_to_connections.pop(username, None)
 
+    def _create_rate_limiter(self):
+        """Returns a rate limiter for a new connection or None if rate limiting is disabled"""
+        if self.rate_limit_configuration is None:
+            return None
+        return ConnectionRateLimiter(self.rate_limit_configuration)
+
     def create_connection_handler(self, selector, connection, address):
         connection_information = connection_handler.ConnectionInformation(connection, address)
         handler = connection_handler.ConnectionHandler(
@@ -218,7 +561,9 @@ class Server:
             self.logger,
             self.protocol_callback_handler, 
             is_server = True,
-            on_close_callback=self.cleanup_connection
+            on_close_callback=self.cleanup_connection,
+            rate_limiter=self._create_rate_limiter(),
+            message_budget=self.message_budget
         )
         return handler
 
@@ -231,29 +576,56 @@ class Server:
         connection_table_entry = ConnectionTableEntry(connection_handler, AssociatedConnectionState())
         self.connection_table.insert_entry(connection_table_entry)
 
+    def _handle_connection_error(self, handler: connection_handler.ConnectionHandler):
+        """Logs the exception raised while processing the connection and closes it"""
+        self.logger.log_message(
+            f"main: error: exception for {handler.connection_information.addr}:\n{traceback.format_exc()}",
+        )
+        handler.close()
+
     def close(self):
         self.should_close = True
 
+    def _compute_select_timeout(self):
+        """Returns how long the selector may wait for events without delaying pending work"""
+        timeouts = [
+            self.connection_scheduler.compute_select_timeout(),
+            self.chat_batcher.compute_time_until_flush(),
+            self.game_handler.compute_time_until_next_expiry(),
+            self.game_handler.compute_time_until_next_move_deadline(),
+            self.matchmaking_queue.compute_time_until_next_pairing(),
+        ]
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        return min(timeouts, default=None)
+
     def listen_for_socket_events(self):
         try:
             while not self.should_close:
-                events = self.selector.select(timeout=None)
+                events = self.selector.select(timeout=self._compute_select_timeout())
+                #Connections left with pending messages by earlier iterations get their turn before new reads
+                self.connection_scheduler.service_ready_connections()
                 for key, mask in events:
                     if key.data is None:
                         self.accept_wrapper(key.fileobj)
                     else:
-                        message = key.data
-                        try:
-                            message.process_events(mask)
-                        except Exception:
-                            self.logger.log_message(
-                                f"main: error: exception for {message.connection_information.addr}:\n{traceback.format_exc()}",
-                            )
-                            message.close()
+                        self.connection_scheduler.process_events(key.data, mask)
+                self.chat_batcher.flush_if_due()
+                self._end_expired_games()
+                self._end_timed_out_games()
+                self._pair_queued_players()
         except KeyboardInterrupt:
             print("caught keyboard interrupt, exiting")
         finally:
             self.selector.close()
+            self.hint_table.close()
+            self.rating_writer.close()
+            close_database_connections()
+            account_cache = get_account_cache()
+            self.logger.log_message(f"account cache: {account_cache.compute_hit_rate():.1%} hit rate over {account_cache.hit_count + account_cache.miss_count} lookups, {account_cache.eviction_count} evictions")
+            if self.game_persistence is not None:
+                self.game_persistence.close()
+            if self.game_record_file is not None:
+                self.game_record_file.close()
 
     def get_connection_table(self):
         return self.connection_table
@@ -270,6 +642,15 @@ def main():
     parser = argparse.ArgumentParser(prog='server.py', description='The server program for hosting tictactoe games.', usage=f"usage: {sys.argv[0]} [-i <host>] -p <port>")
     parser.add_argument("-i", default="0.0.0.0")
     parser.add_argument("-p", type=int)
+    parser.add_argument("--rate-limit", type=float, help="the number of messages per second each connection may send. Unlimited if unspecified")
+    parser.add_argument("--burst", type=float, help="the largest burst of messages each connection may send at once. Defaults to the rate limit")
+    parser.add_argument("--message-budget", type=int, default=Server.DEFAULT_MESSAGE_BUDGET, help="the maximum number of messages responded to for each connection per loop iteration")
+    parser.add_argument("--idle-game-timeout", type=float, default=GameHandler.DEFAULT_IDLE_GAME_TIMEOUT, help="the number of seconds an unfinished game may go without moves before it expires")
+    parser.add_argument("--move-time-limit", type=float, help="the number of seconds players have for each move before they lose. Games are untimed if unspecified")
+    parser.add_argument("--persist-games", action="store_true", help="save live games to the database so that they are restored when the server restarts")
+    parser.add_argument("--game-records", help="the path of an append-only file that finished standard games are recorded in")
+    parser.add_argument("--account-cache-size", type=int, default=AccountCache.DEFAULT_MAXIMUM_SIZE, help="the number of recently looked up account names kept in memory, including names without accounts")
+    parser.add_argument("--hint-table", help="the path of a hint table file to memory map, which is written if missing. Boards are searched and memoized as hints are requested if unspecified")
     arguments = parser.parse_args()
 
     #Handle the arguments
@@ -277,6 +658,10 @@ def main():
         parser.print_usage()
         sys.exit(1)
     host, port = arguments.i, arguments.p
+    rate_limit_configuration = None
+    if arguments.rate_limit is not None:
+        burst = arguments.burst if arguments.burst is not None else arguments.rate_limit
+        rate_limit_configuration = RateLimitConfiguration(arguments.rate_limit, burst)
 
     #Make the logger and logging directory
     os.makedirs("logs", exist_ok=True)
@@ -287,11 +672,13 @@ def main():
     DATABASE_PATH = os.path.join(DATA_STORING_DIRECTORY, 'database.db')
     create_database_at_path(DATABASE_PATH)
 
+    configure_account_cache(arguments.account_cache_size)
+
     #Create the selector
     sel = selectors.DefaultSelector()
 
     #Initialize the server and listen for socket events
-    server = Server(host, port, sel, logger, DATABASE_PATH, create_listening_socket)
+    server = Server(host, port, sel, logger, DATABASE_PATH, create_listening_socket, rate_limit_configuration=rate_limit_configuration, message_budget=arguments.message_budget, hint_table_path=arguments.hint_table, idle_game_timeout=arguments.idle_game_timeout, should_persist_games=arguments.persist_games, game_record_path=arguments.game_records, move_time_limit=arguments.move_time_limit)
     server.listen_for_socket_events()
 
 
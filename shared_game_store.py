@@ -0,0 +1,168 @@
+#This module keeps standard games in fixed size slots of a multiprocessing.shared_memory block, so worker processes can read and move in
+#the same games without pickling Game objects between them. Larger boards are left to game_manager.Game.
+#Each slot holds the game's two bitboards, whose turn it is, the players' ids, and a sequence number. Writers hold the lock for the slot's stripe
+#and make the sequence number odd while they change the slot, so readers retry instead of taking a lock when they see a write in progress.
+import os
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
+
+from bitboard import compute_winner_from_bitboards, convert_bitboards_to_text, NUMBER_OF_CELLS
+
+#The header holds the first free slot and the number of free slots
+HEADER = struct.Struct("<II")
+#sequence, next free slot, game number, creator id, invited id, X bitboard, O bitboard, turn, state
+SLOT = struct.Struct("<QIIIIHHBB2x")
+SEQUENCE = struct.Struct("<Q")
+SLOT_SIZE = SLOT.size
+#Marks the end of the free slot list
+NO_SLOT = 0xFFFFFFFF
+
+FREE_STATE = 0
+LIVE_STATE = 1
+
+#Turns are stored as the index of the player whose turn it is, which is 0 for the creator, who plays X
+TURN_PIECES = ('X', 'O')
+
+class SharedGameSlot:
+    """A consistent copy of a slot read from a SharedGameStore"""
+    __slots__ = ('slot', 'sequence', 'game_number', 'creator_id', 'invited_id', 'x_bitboard', 'o_bitboard', 'turn')
+
+    def __init__(self, slot: int, sequence: int, game_number: int, creator_id: int, invited_id: int, x_bitboard: int, o_bitboard: int, turn: int):
+        self.slot = slot
+        self.sequence = sequence
+        self.game_number = game_number
+        self.creator_id = creator_id
+        self.invited_id = invited_id
+        self.x_bitboard = x_bitboard
+        self.o_bitboard = o_bitboard
+        self.turn = turn
+
+    def compute_current_piece(self):
+        return TURN_PIECES[self.turn]
+
+    def compute_current_player_id(self):
+        return self.invited_id if self.turn else self.creator_id
+
+    def compute_winner(self):
+        """Returns the winning piece, game_actions.TIE, or None if the game is unfinished"""
+        return compute_winner_from_bitboards(self.x_bitboard, self.o_bitboard)
+
+    def compute_text(self):
+        """Returns the board as a string of 'X', 'O', and ' ' characters"""
+        return convert_bitboards_to_text(self.x_bitboard, self.o_bitboard)
+
+class SharedGameStore:
+    #The number of locks slots are spread over. Moves in slots with different locks never wait for each other
+    DEFAULT_LOCK_STRIPE_COUNT = 64
+    def __init__(self, slot_count: int, *, lock_stripe_count: int = DEFAULT_LOCK_STRIPE_COUNT):
+        """
+            Creates a shared memory block with room for slot_count standard games.
+            The store can be passed to worker processes when they are started, which attach to the same block.
+            lock_stripe_count: must be assigned values explicitly. The number of locks the slots are spread over
+        """
+        self.slot_count = slot_count
+        self.memory = shared_memory.SharedMemory(create=True, size=HEADER.size + slot_count*SLOT_SIZE)
+        #Forked workers inherit this object as is, so the creating process is remembered by its id
+        self.owner_process_id = os.getpid()
+        self.allocator_lock = multiprocessing.Lock()
+        self.slot_locks = [multiprocessing.Lock() for _ in range(lock_stripe_count)]
+        #Every slot starts out free, linked to the one after it
+        HEADER.pack_into(self.memory.buf, 0, 0 if slot_count else NO_SLOT, slot_count)
+        for slot in range(slot_count):
+            next_free_slot = slot + 1 if slot + 1 < slot_count else NO_SLOT
+            SLOT.pack_into(self.memory.buf, self._compute_offset(slot), 0, next_free_slot, 0, 0, 0, 0, 0, 0, FREE_STATE)
+
+    def __getstate__(self):
+        return {'slot_count': self.slot_count, 'name': self.memory.name, 'allocator_lock': self.allocator_lock, 'slot_locks': self.slot_locks}
+
+    def __setstate__(self, state):
+        self.slot_count = state['slot_count']
+        self.memory = shared_memory.SharedMemory(name=state['name'])
+        self.owner_process_id = None
+        self.allocator_lock = state['allocator_lock']
+        self.slot_locks = state['slot_locks']
+
+    def _compute_offset(self, slot: int):
+        return HEADER.size + slot*SLOT_SIZE
+
+    def _check_slot(self, slot: int):
+        """Raises a ValueError if the slot is not one of the store's slots, so it is never read or written past the slot area"""
+        if not 0 <= slot < self.slot_count:
+            raise ValueError(f"Slot {slot} is not between 0 and {self.slot_count - 1}")
+
+    def _get_slot_lock(self, slot: int):
+        return self.slot_locks[slot % len(self.slot_locks)]
+
+    def _write_slot(self, slot: int, *values):
+        """Replaces everything but the sequence number of a slot while its lock is held, bumping the sequence number around the write"""
+        offset = self._compute_offset(slot)
+        sequence = SEQUENCE.unpack_from(self.memory.buf, offset)[0]
+        SEQUENCE.pack_into(self.memory.buf, offset, sequence + 1)
+        SLOT.pack_into(self.memory.buf, offset, sequence + 1, *values)
+        SEQUENCE.pack_into(self.memory.buf, offset, sequence + 2)
+
+    def allocate_slot(self, game_number: int, creator_id: int, invited_id: int):
+        """Starts a game with an empty board in a free slot and returns the slot, or None if every slot is taken"""
+        with self.allocator_lock:
+            free_slot, free_slot_count = HEADER.unpack_from(self.memory.buf, 0)
+            if free_slot == NO_SLOT:
+                return None
+            next_free_slot = SLOT.unpack_from(self.memory.buf, self._compute_offset(free_slot))[1]
+            HEADER.pack_into(self.memory.buf, 0, next_free_slot, free_slot_count - 1)
+            with self._get_slot_lock(free_slot):
+                self._write_slot(free_slot, NO_SLOT, game_number, creator_id, invited_id, 0, 0, 0, LIVE_STATE)
+        return free_slot
+
+    def free_slot(self, slot: int):
+        """Ends the game in the slot and makes the slot available again. Raises a ValueError if the slot is out of range or already free"""
+        self._check_slot(slot)
+        with self.allocator_lock:
+            #Freeing a slot twice would put it on the free list twice and hand it to two games
+            if SLOT.unpack_from(self.memory.buf, self._compute_offset(slot))[-1] == FREE_STATE:
+                raise ValueError(f"Slot {slot} is already free")
+            free_slot, free_slot_count = HEADER.unpack_from(self.memory.buf, 0)
+            with self._get_slot_lock(slot):
+                self._write_slot(slot, free_slot, 0, 0, 0, 0, 0, 0, FREE_STATE)
+            HEADER.pack_into(self.memory.buf, 0, slot, free_slot_count + 1)
+
+    def count_free_slots(self):
+        return HEADER.unpack_from(self.memory.buf, 0)[1]
+
+    def make_move(self, slot: int, player_id: int, cell: int):
+        """Places the player's piece on the cell if the slot holds an unfinished game where it is their turn and the cell is empty. Returns true if the move was made"""
+        self._check_slot(slot)
+        offset = self._compute_offset(slot)
+        with self._get_slot_lock(slot):
+            _, next_free_slot, game_number, creator_id, invited_id, x_bitboard, o_bitboard, turn, state = SLOT.unpack_from(self.memory.buf, offset)
+            current_player_id = invited_id if turn else creator_id
+            if state != LIVE_STATE or player_id != current_player_id or not 0 <= cell < NUMBER_OF_CELLS:
+                return False
+            cell_mask = 1 << cell
+            if (x_bitboard | o_bitboard) & cell_mask or compute_winner_from_bitboards(x_bitboard, o_bitboard) is not None:
+                return False
+            if turn:
+                o_bitboard |= cell_mask
+            else:
+                x_bitboard |= cell_mask
+            self._write_slot(slot, next_free_slot, game_number, creator_id, invited_id, x_bitboard, o_bitboard, 1 - turn, state)
+        return True
+
+    def read_slot(self, slot: int):
+        """Returns a SharedGameSlot copied from the slot without taking its lock, or None if the slot is free"""
+        self._check_slot(slot)
+        offset = self._compute_offset(slot)
+        while True:
+            sequence, _, game_number, creator_id, invited_id, x_bitboard, o_bitboard, turn, state = SLOT.unpack_from(self.memory.buf, offset)
+            #An odd sequence number means a write was in progress, and a changed one means a write happened while copying
+            if sequence % 2 == 0 and SEQUENCE.unpack_from(self.memory.buf, offset)[0] == sequence:
+                break
+        if state != LIVE_STATE:
+            return None
+        return SharedGameSlot(slot, sequence, game_number, creator_id, invited_id, x_bitboard, o_bitboard, turn)
+
+    def close(self):
+        """Detaches from the shared memory block. The process that created the store also frees the block"""
+        self.memory.close()
+        if os.getpid() == self.owner_process_id:
+            self.memory.unlink()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#This module plays games against themselves through GameHandler without sockets or threads, so the game layer can be benchmarked on its own.
+#Policies are functions that take a Game whose turn it is and return the move number to play, numbered from 1 like moves sent by clients.
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+import game_actions
+from game_manager import GameHandler, Game
+from solver import get_solver
+
+def compute_empty_cells(game: Game):
+    return [cell for cell, character in enumerate(game.compute_text()) if character == ' ']
+
+def create_random_policy(seed=0):
+    """Returns a policy that moves on a random empty cell, choosing the same moves every time for the same seed"""
+    generator = random.Random(seed)
+    def play_random_move(game: Game):
+        return generator.choice(compute_empty_cells(game)) + 1
+    return play_random_move
+
+def create_scripted_policy(move_order):
+    """Returns a policy that moves on the first empty cell in the move order, which lists move numbers"""
+    def play_scripted_move(game: Game):
+        text = game.compute_text()
+        for move in move_order:
+            if text[move - 1] == ' ':
+                return move
+        raise ValueError("Every cell in the move order is taken")
+    return play_scripted_move
+
+def perfect_policy(game: Game):
+    """Plays a best move on the standard board"""
+    return get_solver().get_best_move(game.compute_text()) + 1
+
+POLICIES = {
+    "random": create_random_policy,
+    "scripted": lambda seed: create_scripted_policy(random.Random(seed).sample(range(1, 10), 9)),
+    "perfect": lambda seed: perfect_policy,
+}
+
+class SimulationResults:
+    def __init__(self, game_count: int, move_count: int, elapsed_time: float, outcome_counts, peak_memory: int = None):
+        """
+            Summarizes a simulation run
+            outcome_counts: a dictionary mapping each winning piece and game_actions.TIE to the number of games that ended with it
+            peak_memory: the largest number of bytes allocated at once during the run, or None if allocations were not traced
+        """
+        self.game_count = game_count
+        self.move_count = move_count
+        self.elapsed_time = elapsed_time
+        self.outcome_counts = outcome_counts
+        self.peak_memory = peak_memory
+
+    def compute_games_per_second(self):
+        return self.game_count/self.elapsed_time
+
+    def compute_moves_per_second(self):
+        return self.move_count/self.elapsed_time
+
+    def __str__(self) -> str:
+        text = (f"{self.game_count} games and {self.move_count} moves in {self.elapsed_time:.2f}s: "
+                f"{self.compute_games_per_second():.0f} games/s, {self.compute_moves_per_second():.0f} moves/s, outcomes {self.outcome_counts}")
+        if self.peak_memory is not None:
+            text += f", peak allocated memory {self.peak_memory/2**20:.1f}MiB"
+        return text
+
+class SelfPlaySimulator:
+    def __init__(self, x_policy, o_policy, *, concurrent_game_count: int = 1000, board_size: int = game_actions.DEFAULT_BOARD_SIZE, winning_length: int = game_actions.DEFAULT_WINNING_LENGTH):
+        """
+            Plays games between two policies through a GameHandler, keeping a fixed number of games in progress and making one move in each in turn, like a busy server would
+            x_policy: the policy of the players that create the games and play X
+            o_policy: the policy of the invited players, who play O
+            concurrent_game_count: must be assigned values explicitly. The number of games in progress at once
+            board_size: must be assigned values explicitly
+            winning_length: must be assigned values explicitly
+        """
+        self.policies = {'X': x_policy, 'O': o_policy}
+        self.concurrent_game_count = concurrent_game_count
+        self.board_size = board_size
+        self.winning_length = winning_length
+
+    def run(self, game_count: int, *, should_trace_allocations: bool = False):
+        """
+            Plays game_count games in a new GameHandler and returns the SimulationResults
+            should_trace_allocations: must be assigned values explicitly. If true, the peak allocated memory is measured with tracemalloc, which slows the run down
+        """
+        if should_trace_allocations:
+            tracemalloc.start()
+        game_handler = GameHandler()
+        outcome_counts = {'X': 0, 'O': 0, game_actions.TIE: 0}
+        move_count = 0
+        started_game_count = 0
+        start = time.perf_counter()
+        games = []
+        for slot in range(min(self.concurrent_game_count, game_count)):
+            games.append(self._create_game(game_handler, f"creator{slot}", f"invited{slot}"))
+            started_game_count += 1
+        while games:
+            next_games = []
+            for game in games:
+                piece = game.compute_player_piece(game.get_current_turn())
+                move = self.policies[piece](game)
+                if not game_handler.make_move(game, game.get_current_turn(), move):
+                    raise ValueError(f"The {piece} policy chose the taken or invalid move {move}")
+                move_count += 1
+                winner = game.check_winner()
+                if winner is None:
+                    next_games.append(game)
+                else:
+                    outcome_counts[winner] += 1
+                    if started_game_count < game_count:
+                        #The finished game was retired, so its players can start the next game
+                        next_games.append(self._create_game(game_handler, game.creator_username, game.invited_username))
+                        started_game_count += 1
+            games = next_games
+        elapsed_time = time.perf_counter() - start
+        peak_memory = None
+        if should_trace_allocations:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return SimulationResults(game_count, move_count, elapsed_time, outcome_counts, peak_memory)
+
+    def _create_game(self, game_handler: GameHandler, creator_username: str, invited_username: str):
+        return game_handler.create_game(creator_username, invited_username, self.board_size, self.winning_length)
+
+def main():
+    parser = argparse.ArgumentParser(prog='simulation.py', description='Plays games between move policies through the game layer and reports the throughput.')
+    parser.add_argument("--games", type=int, default=100000, help="the number of games to play")
+    parser.add_argument("--concurrent", type=int, default=1000, help="the number of games in progress at once")
+    parser.add_argument("--x-policy", choices=list(POLICIES), default="random")
+    parser.add_argument("--o-policy", choices=list(POLICIES), default="random")
+    parser.add_argument("--board-size", type=int, default=game_actions.DEFAULT_BOARD_SIZE)
+    parser.add_argument("--winning-length", type=int, default=game_actions.DEFAULT_WINNING_LENGTH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-allocations", action="store_true", help="measure the peak allocated memory, which slows the run down")
+    arguments = parser.parse_args()
+    if not game_actions.is_valid_board_configuration(arguments.board_size, arguments.winning_length):
+        print("The board size and winning length are not a valid board configuration.")
+        sys.exit(1)
+    is_standard_board = arguments.board_size == game_actions.DEFAULT_BOARD_SIZE and arguments.winning_length == game_actions.DEFAULT_WINNING_LENGTH
+    if "perfect" in (arguments.x_policy, arguments.o_policy) and not is_standard_board:
+        print("The perfect policy only plays on the standard 3 by 3 board.")
+        sys.exit(1)
+    simulator = SelfPlaySimulator(
+        POLICIES[arguments.x_policy](arguments.seed),
+        POLICIES[arguments.o_policy](arguments.seed + 1),
+        concurrent_game_count=arguments.concurrent,
+        board_size=arguments.board_size,
+        winning_length=arguments.winning_length
+    )
+    print(simulator.run(arguments.games, should_trace_allocations=arguments.trace_allocations))
+
+if __name__ == '__main__':
+    main()
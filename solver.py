@@ -0,0 +1,132 @@
+#This module solves standard tictactoe with negamax search so that the server can play perfectly.
+#Boards are strings of 9 'X', 'O', and ' ' characters, and moves are cell indices from 0 to 8.
+import game_actions
+
+EMPTY_BOARD = ' '*9
+
+def _rotate_cells(cells):
+    """Returns the cell order after rotating the board a quarter turn clockwise"""
+    return tuple(cells[3*(2 - column) + row] for row in range(3) for column in range(3))
+
+def _reflect_cells(cells):
+    """Returns the cell order after mirroring the board left to right"""
+    return tuple(cells[3*row + 2 - column] for row in range(3) for column in range(3))
+
+def _compute_symmetries():
+    symmetries = []
+    cells = tuple(range(9))
+    for _ in range(4):
+        symmetries.append(cells)
+        symmetries.append(_reflect_cells(cells))
+        cells = _rotate_cells(cells)
+    return tuple(symmetries)
+
+#The 8 rotations and reflections of the board, each given as the cell that ends up at every index
+SYMMETRIES = _compute_symmetries()
+
+def transform_board(board: str, symmetry):
+    return "".join([board[cell] for cell in symmetry])
+
+def compute_canonical_board(board: str):
+    """Returns the same board for every rotation and reflection of the board"""
+    return min(transform_board(board, symmetry) for symmetry in SYMMETRIES)
+
+#Transposition table bounds. Alpha-beta pruning can stop searching a board once its value is known to be outside the search window
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+class Solver:
+    def __init__(self, *, should_solve_reachable_boards: bool=True):
+        """
+            Solves tictactoe boards and records the best moves for each.
+            Boards are scored from the perspective of the player about to move. A win scores 1 more than the number of empty cells left
+            when it happens, so the solver prefers quick wins and slow losses, and a tie scores 0.
+            should_solve_reachable_boards: must be assigned values explicitly. If true, every board reachable from the empty board is solved up front
+        """
+        #Maps canonical boards to (value, bound) pairs, so a board and its rotations and reflections are only searched once
+        self.transposition_table = {}
+        #Maps every reachable unfinished board to the tuple of its best moves, so playing a move never needs a search
+        self.best_moves = {}
+        if should_solve_reachable_boards:
+            self._solve_reachable_boards()
+
+    def _solve_reachable_boards(self):
+        boards_to_solve = [EMPTY_BOARD]
+        while boards_to_solve:
+            board = boards_to_solve.pop()
+            if board in self.best_moves or game_actions.check_winner(board) is not None:
+                continue
+            self.best_moves[board] = self.compute_best_moves(board)
+            piece = game_actions.compute_current_player(board)
+            boards_to_solve.extend(child for _, child in self._compute_children(board, piece))
+
+    def compute_best_moves(self, board: str):
+        """Searches for the best moves of the unfinished board and returns them as a tuple in increasing order"""
+        piece = game_actions.compute_current_player(board)
+        move_values = {move: -self.compute_value(child) for move, child in self._compute_children(board, piece)}
+        best_value = max(move_values.values())
+        return tuple(move for move, value in move_values.items() if value == best_value)
+
+    def _compute_children(self, board: str, piece: str):
+        for move, character in enumerate(board):
+            if character == ' ':
+                yield move, board[:move] + piece + board[move + 1:]
+
+    def compute_value(self, board: str):
+        """Returns the value of the board for the player about to move with perfect play from both players"""
+        return self._negamax(board, -len(board) - 1, len(board) + 1)
+
+    def _negamax(self, board: str, alpha: int, beta: int):
+        original_alpha = alpha
+        key = compute_canonical_board(board)
+        entry = self.transposition_table.get(key)
+        if entry is not None:
+            value, bound = entry
+            if bound == EXACT:
+                return value
+            elif bound == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+        winner = game_actions.check_winner(board)
+        if winner == game_actions.TIE:
+            value = 0
+        elif winner is not None:
+            #The winner made the last move, so the player about to move lost
+            value = -(board.count(' ') + 1)
+        else:
+            value = -len(board) - 1
+            piece = game_actions.compute_current_player(board)
+            for _, child in self._compute_children(board, piece):
+                value = max(value, -self._negamax(child, -beta, -alpha))
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+        if value <= original_alpha:
+            bound = UPPER_BOUND
+        elif value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table[key] = (value, bound)
+        return value
+
+    def get_best_moves(self, board: str):
+        """Returns the tuple of best moves for the unfinished board in increasing order"""
+        return self.best_moves[board]
+
+    def get_best_move(self, board: str):
+        """Returns a best move for the unfinished board"""
+        return self.best_moves[board][0]
+
+_solver = None
+
+def get_solver() -> Solver:
+    """Returns the solver, solving the game on first use"""
+    global _solver
+    if _solver is None:
+        _solver = Solver()
+    return _solver
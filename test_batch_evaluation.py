@@ -0,0 +1,31 @@
+import batch_evaluation
+from batch_evaluation import *
+import game_actions
+
+import unittest
+
+ALL_BOARDS = [game_actions.convert_board_index_to_board(index) for index in range(game_actions.NUMBER_OF_BOARD_STATES)]
+
+class TestBatchEvaluation(unittest.TestCase):
+    def _assert_matches_scalar_functions(self, results, boards):
+        winner_codes, current_player_codes, legal_move_masks = results
+        self.assertEqual(len(winner_codes), len(boards))
+        for board, winner_code, current_player_code, legal_move_mask in zip(boards, winner_codes, current_player_codes, legal_move_masks):
+            self.assertEqual(CODE_PIECES[winner_code], game_actions.check_winner(board), board)
+            self.assertEqual(CODE_PIECES[current_player_code], game_actions.compute_current_player(board), board)
+            self.assertEqual(legal_move_mask, game_actions.compute_legal_move_mask(board), board)
+
+    def test_fallback_matches_check_winner_on_every_board(self):
+        cell_codes = [board.encode().translate(batch_evaluation._BOARD_TEXT_TRANSLATION) for board in ALL_BOARDS]
+        self._assert_matches_scalar_functions(batch_evaluation._evaluate_boards_one_at_a_time(cell_codes), ALL_BOARDS)
+
+    @unittest.skipUnless(is_numpy_available(), "NumPy is not installed")
+    def test_numpy_matches_check_winner_on_every_board(self):
+        self._assert_matches_scalar_functions(batch_evaluation._evaluate_boards_with_numpy(convert_boards_to_cell_codes(ALL_BOARDS)), ALL_BOARDS)
+
+    def test_evaluate_boards_accepts_converted_boards(self):
+        boards = ["XXX OO   ", "         "]
+        self._assert_matches_scalar_functions(evaluate_boards(convert_boards_to_cell_codes(boards)), boards)
+
+if __name__ == '__main__':
+    unittest.main()
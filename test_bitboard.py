@@ -0,0 +1,66 @@
+from bitboard import *
+from game_manager import Game
+import game_actions
+
+import unittest
+
+def compute_reachable_boards():
+    """Returns every board reachable by playing legal moves until the game ends"""
+    boards = set()
+    def explore(board):
+        if board in boards:
+            return
+        boards.add(board)
+        if game_actions.check_winner(board) is not None:
+            return
+        piece = game_actions.compute_current_player(board)
+        for index in range(9):
+            if board[index] == ' ':
+                explore(board[:index] + piece + board[index + 1:])
+    explore(' '*9)
+    return boards
+
+class TestBitBoardWinDetection(unittest.TestCase):
+    def test_matches_check_winner_on_every_reachable_board(self):
+        for board in compute_reachable_boards():
+            self.assertEqual(compute_winner_from_bitboards(*convert_board_to_bitboards(board)), game_actions.check_winner(board), board)
+
+    def test_converts_to_and_from_text(self):
+        board = 'XO  X   O'
+        self.assertEqual(convert_bitboards_to_text(*convert_board_to_bitboards(board)), board)
+
+class TestBitBoard(unittest.TestCase):
+    def test_rejects_occupied_and_out_of_range_cells(self):
+        board = BitBoard()
+        board.place_piece(4, 'X')
+        self.assertFalse(board.is_cell_empty(4))
+        self.assertTrue(board.is_cell_empty(0))
+        self.assertFalse(board.is_cell_empty(-1))
+        self.assertFalse(board.is_cell_empty(9))
+
+    def test_cached_text_is_updated_after_move(self):
+        board = BitBoard()
+        self.assertEqual(board.compute_text(), ' '*9)
+        board.place_piece(0, 'O')
+        self.assertEqual(board.compute_text(), 'O' + ' '*8)
+
+class TestGame(unittest.TestCase):
+    def test_plays_game_to_victory(self):
+        game = Game("Bob", "Alice")
+        for username, move in [("Bob", 1), ("Alice", 4), ("Bob", 2), ("Alice", 5)]:
+            self.assertTrue(game.make_move(username, move))
+            self.assertIsNone(game.check_winner())
+        self.assertTrue(game.make_move("Bob", 3))
+        self.assertEqual(game.compute_text(), 'XXXOO    ')
+        self.assertEqual(game.check_winner(), 'X')
+        self.assertTrue(game.is_over())
+
+    def test_rejects_taken_tile_and_wrong_turn(self):
+        game = Game("Bob", "Alice")
+        self.assertFalse(game.make_move("Alice", 1))
+        self.assertTrue(game.make_move("Bob", 1))
+        self.assertFalse(game.make_move("Alice", 1))
+        self.assertEqual(game.get_current_turn(), "Alice")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from chat import ChatRoom, ChatBatcher
+from protocol import Message
+from testing_utilities import FakeClock
+
+class RecordingRecipient:
+    def __init__(self):
+        self.writes = []
+
+    def send_packed_messages_through_connection(self, messages, message_bytes):
+        self.writes.append((messages, message_bytes))
+
+def create_chat_message(number):
+    return Message(8, ("user", f"message {number}")), f"message {number};".encode("utf-8")
+
+class TestChatRoom(unittest.TestCase):
+    def test_history_keeps_most_recent_messages(self):
+        room = ChatRoom(history_size=3)
+        for number in range(5):
+            room.record_message(*create_chat_message(number))
+        self.assertEqual(room.get_history(), [create_chat_message(number) for number in range(2, 5)])
+
+    def test_members_can_be_added_and_removed(self):
+        room = ChatRoom()
+        room.add_member("Bob")
+        room.add_member("Alice")
+        room.remove_member("Bob")
+        room.remove_member("Carol")
+        self.assertEqual(room.get_members(), {"Alice"})
+
+class TestChatBatcher(unittest.TestCase):
+    def test_messages_for_recipient_are_sent_in_one_write(self):
+        clock = FakeClock()
+        batcher = ChatBatcher(0.05, clock)
+        bob = RecordingRecipient()
+        alice = RecordingRecipient()
+        first_message, first_bytes = create_chat_message(1)
+        second_message, second_bytes = create_chat_message(2)
+        batcher.queue_message_for_recipients(first_message, first_bytes, [bob, alice])
+        batcher.queue_message_for_recipients(second_message, second_bytes, [bob])
+        batcher.flush()
+        self.assertEqual(bob.writes, [([first_message, second_message], first_bytes + second_bytes)])
+        self.assertEqual(alice.writes, [([first_message], first_bytes)])
+
+    def test_flushes_only_after_interval(self):
+        clock = FakeClock()
+        batcher = ChatBatcher(0.05, clock)
+        bob = RecordingRecipient()
+        self.assertIsNone(batcher.compute_time_until_flush())
+        batcher.queue_message_for_recipients(*create_chat_message(1), [bob])
+        clock.advance(0.03)
+        batcher.flush_if_due()
+        self.assertEqual(bob.writes, [])
+        self.assertAlmostEqual(batcher.compute_time_until_flush(), 0.02)
+        clock.advance(0.03)
+        batcher.flush_if_due()
+        self.assertEqual(len(bob.writes), 1)
+        self.assertFalse(batcher.has_pending_messages())
+        self.assertIsNone(batcher.compute_time_until_flush())
+
+    def test_discarded_recipients_are_not_sent_queued_messages(self):
+        batcher = ChatBatcher(0.05, FakeClock())
+        bob = RecordingRecipient()
+        alice = RecordingRecipient()
+        message, message_bytes = create_chat_message(1)
+        batcher.queue_message_for_recipients(message, message_bytes, [bob, alice])
+        batcher.discard_recipient(bob)
+        batcher.flush()
+        self.assertEqual(bob.writes, [])
+        self.assertEqual(alice.writes, [([message], message_bytes)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,22 @@
 from server import Server, help_messages
 import protocol_definitions
+import game_actions
 from protocol import Message
 import connection_handler
+from ratings import WIN_SCORE
 import unittest
 from testing_utilities import *
 
 def create_text_message(text: str):
     return Message(protocol_definitions.TEXT_MESSAGE_PROTOCOL_TYPE_CODE, {"text": text})
 
-EMPTY_GAME_BOARD = {'text': " "*9}
-EMPTY_GAME_BOARD_MESSAGE = Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, EMPTY_GAME_BOARD)
-PLAYING_X_MESSAGE = Message(protocol_definitions.GAME_PIECE_PROTOCOL_TYPE_CODE, {"character": "X"})
-PLAYING_O_MESSAGE = Message(protocol_definitions.GAME_PIECE_PROTOCOL_TYPE_CODE, {"character": "O"})
+def create_board_message(text: str, winning_length: int = 3, game: int = 1):
+    return Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, {'game': game, 'winning_length': winning_length, 'text': text})
+
+def create_piece_message(opponent: str, character: str, game: int = 1):
+    return Message(protocol_definitions.GAME_PIECE_PROTOCOL_TYPE_CODE, {'game': game, 'opponent': opponent, 'character': character})
+
+EMPTY_GAME_BOARD_MESSAGE = create_board_message(" "*9)
 GAME_CREATION_MESSAGE = create_text_message("The game was created!")
 
 class TestMocking(unittest.TestCase):
@@ -31,7 +36,7 @@ class TestMocking(unittest.TestCase):
         expected_messages = [
             SkipItem(), 
             GAME_CREATION_MESSAGE,
-            PLAYING_X_MESSAGE,
+            create_piece_message("Alice", "X"),
             EMPTY_GAME_BOARD_MESSAGE
         ]
         testcase = TestCase(should_perform_automatic_login=True)
@@ -52,7 +57,7 @@ class TestMocking(unittest.TestCase):
             create_text_message("Bob invited you to a game!"),
             create_text_message("Bob has joined your game!"),
             create_text_message("Bob has left your game!"),
-            PLAYING_O_MESSAGE,
+            create_piece_message("Bob", "O"),
             EMPTY_GAME_BOARD_MESSAGE,
         ]
         testcase.assert_received_values_match_log(expected_alice_messages, "Alice")
@@ -66,7 +71,7 @@ class TestMocking(unittest.TestCase):
         expected_alice_messages = [
             SkipItem(),
             create_text_message("Bob invited you to a game!"),
-            PLAYING_O_MESSAGE,
+            create_piece_message("Bob", "O"),
             EMPTY_GAME_BOARD_MESSAGE,
         ]
         expected_bob_messages = [
@@ -79,5 +84,253 @@ class TestMocking(unittest.TestCase):
         testcase.assert_received_values_match_log(expected_alice_messages, "Alice")
         testcase.assert_received_values_match_log(expected_bob_messages, 'Bob')
 
+    def test_spectator_receives_board_updates(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        testcase.create_client("Carol")
+        wait_for_alice_to_join = lambda client: ReceivedMessagesLengthWaitingCommand(4)(testcase.clients["Alice"])
+        wait_for_carol_to_spectate = lambda client: ReceivedMessagesLengthWaitingCommand(3)(testcase.clients["Carol"])
+        testcase.buffer_client_commands("Bob", ["create Alice", 2, "join Alice", 5, wait_for_carol_to_spectate, "move a1", 6])
+        testcase.buffer_client_commands("Alice", [2, "join Bob", 5])
+        testcase.buffer_client_commands("Carol", [wait_for_alice_to_join, "spectate Bob", 4])
+        testcase.run()
+        expected_carol_messages = [
+            SkipItem(),
+            EMPTY_GAME_BOARD_MESSAGE,
+            create_text_message("You are now spectating Bob's game."),
+            create_board_message("X" + " "*8),
+        ]
+        testcase.assert_received_values_match_log(expected_carol_messages, "Carol")
+
+    def test_cannot_spectate_player_without_game(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Carol")
+        testcase.buffer_client_commands("Carol", ["spectate Bob", 2])
+        testcase.run()
+        expected_carol_messages = [
+            SkipItem(),
+            create_text_message("Bob is not playing a game you can spectate."),
+        ]
+        testcase.assert_received_values_match_log(expected_carol_messages, "Carol")
+
+    def test_lobby_chat(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        testcase.buffer_client_commands("Bob", ["chat hello everyone", 2])
+        testcase.buffer_client_commands("Alice", [2])
+        testcase.run()
+        expected_messages = [
+            SkipItem(),
+            Message(protocol_definitions.CHAT_MESSAGE_PROTOCOL_TYPE_CODE, {'username': 'Bob', 'text': 'hello everyone'}),
+        ]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+        testcase.assert_received_values_match_log(expected_messages, "Alice")
+
+    def test_game_on_larger_board(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        testcase.buffer_client_commands("Bob", ["create Alice 5 4", 2, "join Alice", 4, "move e5", 5])
+        testcase.buffer_client_commands("Alice", [2])
+        testcase.run()
+        expected_messages = [
+            SkipItem(),
+            GAME_CREATION_MESSAGE,
+            create_piece_message("Alice", "X"),
+            create_board_message(" "*25, winning_length=4),
+            create_board_message(" "*24 + "X", winning_length=4),
+        ]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+
+    def test_cannot_create_game_with_invalid_board(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.buffer_client_commands("Bob", [lambda client: client.send_message(Message(protocol_definitions.GAME_CREATION_PROTOCOL_TYPE_CODE, ("Alice", 20, 5))), 2])
+        testcase.run()
+        expected_messages = [
+            SkipItem(),
+            create_text_message("Games need between 3 and 15 pieces in a row to win on a board with at least that many rows."),
+        ]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+
+    def test_computer_opponent_replies_to_moves_and_wins(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.buffer_client_commands("Bob", ["create computer", 2, "join computer", 4, "move a1", 6, "move a2", 8, "move b3", 11])
+        testcase.run()
+        expected_messages = [
+            SkipItem(),
+            GAME_CREATION_MESSAGE,
+            create_piece_message("computer", "X"),
+            EMPTY_GAME_BOARD_MESSAGE,
+            create_board_message("X        "),
+            create_board_message("X   O    "),
+            create_board_message("XX  O    "),
+            create_board_message("XXO O    "),
+            create_board_message("XXO OX   "),
+            create_board_message("XXO OXO  "),
+            Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, {'game': 1, 'opponent': 'computer', 'character': game_actions.LOSS}),
+        ]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+
+    def test_hint_gives_best_move(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.buffer_client_commands("Bob", ["create computer", 2, "join computer", 4, "move a1", 6, "move a2", 8, "hint", 9])
+        testcase.run()
+        expected_messages = [SkipItem()]*8 + [create_text_message("Hint: the best move is c1.")]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+
+    def test_several_games_against_the_computer_at_once(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.buffer_client_commands("Bob", ["create computer", 2, "create computer", 3, "join #1", 5, "join #2", 7, "move a1", 9, "select 1", "move a1", 11])
+        testcase.run()
+        expected_messages = [SkipItem()]*3 + [
+            create_piece_message("computer", "X"),
+            EMPTY_GAME_BOARD_MESSAGE,
+            create_piece_message("computer", "X", game=2),
+            create_board_message(" "*9, game=2),
+            create_board_message("X        ", game=2),
+            create_board_message("X   O    ", game=2),
+            create_board_message("X        "),
+            create_board_message("X   O    "),
+        ]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+
+    def test_games_lists_open_games(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.buffer_client_commands("Bob", ["create Alice", 2, "create Carol 5 4", 3, "join Alice", 5, "move a1", 6, "games", 7, "games 2", 8])
+        testcase.run()
+        expected_messages = [SkipItem()]*6 + [
+            create_text_message("Your open games (page 1 of 1):\n#1 Alice: 3x3 board, 3 in a row, Alice's turn\n#2 Carol: 5x5 board, 4 in a row, your turn"),
+            create_text_message("There is no page 2. You have 1 page of open games."),
+        ]
+        testcase.assert_received_values_match_log(expected_messages, "Bob")
+
+    def test_moves_are_routed_to_concurrent_games_by_number(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        testcase.create_client("Carol")
+        testcase.buffer_client_commands("Bob", ["create Alice", 2, "join Alice", 4, "create Carol", 5, "join Carol", 7, "select 1", "move a1", 8])
+        testcase.buffer_client_commands("Alice", [2])
+        testcase.buffer_client_commands("Carol", [2])
+        testcase.run()
+        expected_bob_messages = [
+            SkipItem(),
+            GAME_CREATION_MESSAGE,
+            create_piece_message("Alice", "X"),
+            EMPTY_GAME_BOARD_MESSAGE,
+            GAME_CREATION_MESSAGE,
+            create_piece_message("Carol", "X", game=2),
+            create_board_message(" "*9, game=2),
+            create_board_message("X" + " "*8),
+        ]
+        testcase.assert_received_values_match_log(expected_bob_messages, "Bob")
+
+    def test_expired_games_end_for_their_players(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        def expire_games_after_alice_joins(client):
+            ReceivedMessagesLengthWaitingCommand(4)(testcase.clients["Alice"])
+            testcase.server.server.game_handler.idle_game_timeout = 0
+        testcase.buffer_client_commands("Bob", ["create Alice", 2, "join Alice", 4, expire_games_after_alice_joins, 6])
+        testcase.buffer_client_commands("Alice", [2, "join Bob", 5])
+        testcase.run()
+        expected_bob_messages = [SkipItem()]*5 + [
+            Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, {'game': 1, 'opponent': 'Alice', 'character': game_actions.EXPIRED}),
+        ]
+        testcase.assert_received_values_match_log(expected_bob_messages, "Bob")
+        self.assertEqual(testcase.clients["Bob"].client.games, {})
+        self.assertEqual(testcase.clients["Alice"].client.games, {})
+
+    def test_join_by_game_number(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Carol")
+        testcase.buffer_client_commands("Bob", ["create Alice", 2, "create Carol", 3, "join #2", 5, "join #1", 7, "join #9", "games", 8])
+        testcase.run()
+        expected_bob_messages = [
+            SkipItem(),
+            GAME_CREATION_MESSAGE,
+            GAME_CREATION_MESSAGE,
+            create_piece_message("Carol", "X", game=2),
+            create_board_message(" "*9, game=2),
+            create_piece_message("Alice", "X"),
+            EMPTY_GAME_BOARD_MESSAGE,
+            create_text_message("Your open games (page 1 of 1):\n#1 Alice: 3x3 board, 3 in a row, your turn\n#2 Carol: 3x3 board, 3 in a row, your turn"),
+        ]
+        testcase.assert_received_values_match_log(expected_bob_messages, "Bob")
+
+    def test_queued_players_are_matched_into_a_game(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        def wait_for_bob_to_queue(client):
+            ReceivedMessagesLengthWaitingCommand(2)(testcase.clients["Bob"])
+        testcase.buffer_client_commands("Bob", ["queue", 5])
+        testcase.buffer_client_commands("Alice", [1, wait_for_bob_to_queue, "queue", 4])
+        testcase.run()
+        expected_bob_messages = [
+            SkipItem(),
+            create_text_message("You are waiting for an opponent. Type 'unqueue' to stop waiting."),
+            create_piece_message("Alice", "X"),
+            EMPTY_GAME_BOARD_MESSAGE,
+            create_text_message("You were matched with Alice!"),
+        ]
+        testcase.assert_received_values_match_log(expected_bob_messages, "Bob")
+        expected_alice_messages = [
+            SkipItem(),
+            create_piece_message("Bob", "O"),
+            EMPTY_GAME_BOARD_MESSAGE,
+            create_text_message("You were matched with Bob!"),
+        ]
+        testcase.assert_received_values_match_log(expected_alice_messages, "Alice")
+        self.assertEqual(len(testcase.server.server.matchmaking_queue), 0)
+
+    def test_player_who_runs_out_of_time_loses(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        testcase.create_client("Alice")
+        def time_moves_after_alice_joins(client):
+            ReceivedMessagesLengthWaitingCommand(5)(testcase.clients["Alice"])
+            testcase.server.server.game_handler.get_game_by_number(1).move_time_limit = 0
+        testcase.buffer_client_commands("Bob", ["create Alice", 2, "join Alice", 5, time_moves_after_alice_joins, "move a1", 8])
+        testcase.buffer_client_commands("Alice", [2, "join Bob", 8])
+        testcase.run()
+        expected_bob_messages = [SkipItem()]*5 + [
+            create_board_message("X" + " "*8),
+            Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, {'game': 1, 'opponent': 'Alice', 'character': game_actions.VICTORY}),
+            create_text_message("Alice ran out of time in game #1."),
+        ]
+        testcase.assert_received_values_match_log(expected_bob_messages, "Bob")
+        expected_alice_messages = [SkipItem()]*5 + [
+            create_board_message("X" + " "*8),
+            Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, {'game': 1, 'opponent': 'Bob', 'character': game_actions.LOSS}),
+            create_text_message("Alice ran out of time in game #1."),
+        ]
+        testcase.assert_received_values_match_log(expected_alice_messages, "Alice")
+        self.assertEqual(testcase.clients["Alice"].client.games, {})
+        rating_table = testcase.server.server.rating_table
+        self.assertEqual((rating_table.get_rating("Bob"), rating_table.get_rating("Alice")), (1216, 1184))
+
+    def test_leaderboard_lists_best_rated_players(self):
+        testcase = TestCase(should_perform_automatic_login=True)
+        testcase.create_client("Bob")
+        def record_game(client):
+            testcase.server.server.rating_table.record_game("Alice", "Bob", WIN_SCORE)
+        testcase.buffer_client_commands("Bob", [record_game, "leaderboard", 2])
+        testcase.run()
+        expected_bob_messages = [
+            SkipItem(),
+            create_text_message("The best rated players:\n1. Alice: 1216 (1 game)\n2. Bob: 1184 (1 game)\nYour rating: 1184"),
+        ]
+        testcase.assert_received_values_match_log(expected_bob_messages, "Bob")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import unittest
+
+import protocol
+import protocol_definitions
+from protocol import Message
+from connection_handler import MessageSender, ConnectionInformation
+from logging_utilities import PrimaryMemoryLogger
+from mock_socket import MockPreloadedSocket
+
+def create_message_sender(sending_limit=None, priorities=protocol_definitions.CLIENT_MESSAGE_PRIORITIES):
+    address = ("client", 1)
+    sock = MockPreloadedSocket(address, sending_limit=sending_limit, should_record_sent_bytes=True)
+    sender = MessageSender(PrimaryMemoryLogger(), ConnectionInformation(sock, address), protocol_definitions.CLIENT_PROTOCOL_MAP, lambda: None, priorities)
+    return sender, sock
+
+def write_everything(sender: MessageSender):
+    while sender.has_queued_bytes():
+        sender.write()
+
+def summarize(messages):
+    """Returns (type code, values) pairs for messages created with tuples of values"""
+    return [(message.type_code, tuple(message.values)) for message in messages]
+
+def decode_messages(input_bytes):
+    """Converts bytes sent to a client back into (type code, values) pairs"""
+    handler = protocol.MessageHandler(protocol_definitions.CLIENT_PROTOCOL_MAP)
+    messages = []
+    remaining_bytes = bytes(input_bytes)
+    while remaining_bytes:
+        handler.receive_bytes(remaining_bytes)
+        messages.append((handler.get_protocol_type_code(), tuple(handler.get_values().values())))
+        remaining_bytes = remaining_bytes[handler.get_number_of_bytes_extracted():]
+        handler.prepare_for_next_message()
+    return messages
+
+def create_text_message(text):
+    return Message(protocol_definitions.TEXT_MESSAGE_PROTOCOL_TYPE_CODE, (text,))
+
+def create_help_message(text):
+    return Message(protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE, (text,))
+
+GAME_UPDATE_MESSAGE = Message(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, (1, 3, "X        "))
+GAME_ENDING_MESSAGE = Message(protocol_definitions.GAME_ENDING_PROTOCOL_TYPE_CODE, (1, "Bob", "W"))
+
+class TestMessageSenderPriorities(unittest.TestCase):
+    def test_game_update_arrives_before_text_backlog(self):
+        sender, sock = create_message_sender()
+        bulk_text_messages = [create_text_message(str(index)*5000) for index in range(5)]
+        for message in bulk_text_messages:
+            sender.send_message(message)
+        sender.send_message(GAME_UPDATE_MESSAGE)
+        write_everything(sender)
+        self.assertEqual(decode_messages(sock.sent_bytes), summarize([GAME_UPDATE_MESSAGE] + bulk_text_messages))
+
+    def test_sends_lanes_in_priority_order(self):
+        sender, sock = create_message_sender()
+        messages = [create_help_message("help"), create_text_message("text"), GAME_ENDING_MESSAGE, GAME_UPDATE_MESSAGE]
+        for message in messages:
+            sender.send_message(message)
+        write_everything(sender)
+        self.assertEqual(decode_messages(sock.sent_bytes), summarize(messages[::-1]))
+
+    def test_preserves_order_within_lane(self):
+        sender, sock = create_message_sender(sending_limit=7)
+        messages = [create_text_message(f"message {index}") for index in range(20)]
+        for message in messages:
+            sender.send_message(message)
+        write_everything(sender)
+        self.assertEqual(decode_messages(sock.sent_bytes), summarize(messages))
+
+    def test_partially_sent_frame_is_finished_before_higher_priority_frame(self):
+        sender, sock = create_message_sender(sending_limit=10)
+        text_message = create_text_message("a"*50)
+        sender.send_message(text_message)
+        sender.write()
+        sender.send_message(GAME_UPDATE_MESSAGE)
+        write_everything(sender)
+        self.assertEqual(decode_messages(sock.sent_bytes), summarize([text_message, GAME_UPDATE_MESSAGE]))
+
+    def test_without_priorities_messages_are_sent_in_order(self):
+        sender, sock = create_message_sender(priorities=None)
+        messages = [create_help_message("help"), create_text_message("text"), GAME_UPDATE_MESSAGE]
+        for message in messages:
+            sender.send_message(message)
+        write_everything(sender)
+        self.assertEqual(decode_messages(sock.sent_bytes), summarize(messages))
+
+if __name__ == '__main__':
+    unittest.main()
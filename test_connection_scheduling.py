@@ -0,0 +1,119 @@
+import selectors
+import unittest
+
+import protocol
+import protocol_definitions
+import connection_handler
+from connection_scheduling import ConnectionScheduler
+from logging_utilities import PrimaryMemoryLogger
+from mock_socket import MockPreloadedSocket, MockIgnoringSelector
+from testing_utilities import compute_percentile, FakeClock
+from rate_limiting import RateLimitConfiguration, ConnectionRateLimiter
+
+HELP_FRAME = protocol_definitions.SERVER_PROTOCOL_MAP.pack_values_given_type_code(protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
+MOVE_FRAME = protocol_definitions.SERVER_PROTOCOL_MAP.pack_values_given_type_code(protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE, 1, 5)
+
+class DispatchRecorder:
+    def __init__(self):
+        """Records how many messages were dispatched before each move, which measures dispatch latency without depending on timing"""
+        self.dispatch_count = 0
+        self.move_latencies = []
+        self.callback_handler = protocol.ProtocolCallbackHandler()
+        self.callback_handler.register_callback_with_protocol(self.handle_help, protocol_definitions.BASE_HELP_MESSAGE_PROTOCOL_TYPE_CODE)
+        self.callback_handler.register_callback_with_protocol(self.handle_move, protocol_definitions.GAME_UPDATE_PROTOCOL_TYPE_CODE)
+
+    def handle_help(self, values, connection_information):
+        self.dispatch_count += 1
+
+    def handle_move(self, values, connection_information):
+        self.move_latencies.append(self.dispatch_count)
+        self.dispatch_count += 1
+
+def create_handler(index, recorder: DispatchRecorder, message_budget, rate_limiter=None):
+    address = ("client", index)
+    connection_information = connection_handler.ConnectionInformation(MockPreloadedSocket(address), address)
+    logger = PrimaryMemoryLogger()
+    logger.debugging_mode = False
+    return connection_handler.ConnectionHandler(
+        MockIgnoringSelector(),
+        connection_information,
+        logger,
+        recorder.callback_handler,
+        is_server=True,
+        rate_limiter=rate_limiter,
+        message_budget=message_budget
+    )
+
+def run_skewed_load(message_budget, light_client_count=50, heavy_message_count=3000):
+    """Simulates selector loop iterations with one heavy client that is ready first and many light clients sending a move each"""
+    recorder = DispatchRecorder()
+    scheduler = ConnectionScheduler(lambda handler: handler.close())
+    heavy_handler = create_handler(0, recorder, message_budget)
+    heavy_handler.connection_information.sock.load(HELP_FRAME*heavy_message_count)
+    handlers = [heavy_handler]
+    for index in range(light_client_count):
+        handler = create_handler(index + 1, recorder, message_budget)
+        handler.connection_information.sock.load(MOVE_FRAME)
+        handlers.append(handler)
+    while recorder.dispatch_count < heavy_message_count + light_client_count:
+        scheduler.service_ready_connections()
+        for handler in handlers:
+            if handler.connection_information.sock.has_received_bytes():
+                scheduler.process_events(handler, selectors.EVENT_READ)
+    return recorder
+
+class TestConnectionScheduler(unittest.TestCase):
+    def test_unlimited_budget_lets_heavy_client_delay_everyone(self):
+        recorder = run_skewed_load(None)
+        self.assertGreaterEqual(compute_percentile(recorder.move_latencies, 50), 3000)
+
+    def test_budget_bounds_light_client_dispatch_latency(self):
+        recorder = run_skewed_load(16)
+        p50 = compute_percentile(recorder.move_latencies, 50)
+        p99 = compute_percentile(recorder.move_latencies, 99)
+        #A light client waits at most for one budget from the heavy client and one message from every other light client
+        self.assertLessEqual(p99, 16 + 50)
+        self.assertLessEqual(p50, p99)
+
+    def test_pending_messages_are_all_eventually_handled_in_order(self):
+        recorder = run_skewed_load(4, light_client_count=3, heavy_message_count=50)
+        self.assertEqual(recorder.dispatch_count, 53)
+        self.assertEqual(len(recorder.move_latencies), 3)
+
+    def test_handler_is_queued_only_while_messages_are_pending(self):
+        recorder = DispatchRecorder()
+        scheduler = ConnectionScheduler(lambda handler: handler.close())
+        handler = create_handler(0, recorder, 2)
+        handler.connection_information.sock.load(HELP_FRAME*3)
+        scheduler.process_events(handler, selectors.EVENT_READ)
+        self.assertEqual(recorder.dispatch_count, 2)
+        self.assertTrue(scheduler.has_ready_connections())
+        self.assertEqual(scheduler.compute_select_timeout(), 0)
+        scheduler.service_ready_connections()
+        self.assertEqual(recorder.dispatch_count, 3)
+        self.assertFalse(scheduler.has_ready_connections())
+        self.assertIsNone(scheduler.compute_select_timeout())
+
+class TestRateLimitedReading(unittest.TestCase):
+    def test_rate_limited_connection_is_not_drained(self):
+        clock = FakeClock()
+        rate_limiter = ConnectionRateLimiter(RateLimitConfiguration(1, 2), clock)
+        recorder = DispatchRecorder()
+        handler = create_handler(0, recorder, None, rate_limiter)
+        sock = handler.connection_information.sock
+        sock.load(HELP_FRAME*5000)
+        handler.read()
+        self.assertEqual(recorder.dispatch_count, 2)
+        received_byte_count = len(sock.receive_buffer)
+        handler.read()
+        handler.process_pending_messages()
+        #Nothing is read or decoded until the connection may send again, so nothing is dropped either
+        self.assertEqual(len(sock.receive_buffer), received_byte_count)
+        self.assertEqual(recorder.dispatch_count, 2)
+        self.assertEqual(rate_limiter.get_dropped_message_count(), 0)
+        clock.advance(1)
+        handler.process_pending_messages()
+        self.assertEqual(recorder.dispatch_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
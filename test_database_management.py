@@ -0,0 +1,135 @@
+from database_management import *
+from testing_utilities import FakeClock
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+class TestDatabaseConnections(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "accounts.db")
+        create_database_at_path(self.path)
+        self.manager = DatabaseConnectionManager()
+
+    def tearDown(self):
+        self.manager.close_connections()
+        close_database_connections()
+        self.directory.cleanup()
+
+    def test_accounts_are_inserted_and_retrieved(self):
+        insert_account_into_database_at_path(Account("Bob", "password"), self.path)
+        account = retrieve_account_with_name_from_database_at_path("Bob", self.path)
+        self.assertEqual((account.name, account.password), ("Bob", "password"))
+        self.assertIsNone(retrieve_account_with_name_from_database_at_path("Alice", self.path))
+        with self.assertRaises(sqlite3.Error):
+            insert_account_into_database_at_path(Account("Bob", "other"), self.path)
+
+    def test_connections_are_reused_on_each_thread(self):
+        connection = self.manager.get_connection(self.path)
+        self.assertIs(self.manager.get_connection(self.path), connection)
+        other_thread_connections = []
+        thread = threading.Thread(target=lambda: other_thread_connections.append(self.manager.get_connection(self.path)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other_thread_connections[0], connection)
+        self.assertEqual(self.manager.opened_connection_count, 2)
+
+    def test_configuration_sets_pragmas(self):
+        connection = self.manager.get_connection(self.path)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        #NORMAL is 1
+        self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+        manager = DatabaseConnectionManager(ConnectionConfiguration(synchronous="FULL", mmap_size=0))
+        connection = manager.get_connection(self.path)
+        self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 2)
+        self.assertEqual(connection.execute("PRAGMA mmap_size").fetchone()[0], 0)
+        manager.close_connections()
+
+    def test_closed_connections_are_reopened(self):
+        connection = self.manager.get_connection(self.path)
+        self.manager.close_connections()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+        self.assertIsNot(self.manager.get_connection(self.path), connection)
+
+class TestAccountCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "accounts.db")
+        create_database_at_path(self.path)
+        self.clock = FakeClock()
+        configure_account_cache(2, time_function=self.clock)
+        self.cache = get_account_cache()
+
+    def tearDown(self):
+        configure_account_cache(AccountCache.DEFAULT_MAXIMUM_SIZE)
+        close_database_connections()
+        self.directory.cleanup()
+
+    def test_repeated_lookups_are_hits(self):
+        insert_account_into_database_at_path(Account("Bob", "password"), self.path)
+        self.assertEqual(retrieve_account_with_name_from_database_at_path("Bob", self.path).password, "password")
+        self.assertEqual(retrieve_account_with_name_from_database_at_path("Bob", self.path).password, "password")
+        self.assertEqual((self.cache.hit_count, self.cache.miss_count), (1, 1))
+        self.assertEqual(self.cache.compute_hit_rate(), 0.5)
+
+    def test_names_without_accounts_are_cached_until_inserted(self):
+        self.assertIsNone(retrieve_account_with_name_from_database_at_path("Alice", self.path))
+        self.assertIsNone(retrieve_account_with_name_from_database_at_path("Alice", self.path))
+        self.assertEqual(self.cache.hit_count, 1)
+        insert_account_into_database_at_path(Account("Alice", "password"), self.path)
+        self.assertEqual(retrieve_account_with_name_from_database_at_path("Alice", self.path).name, "Alice")
+
+    def test_names_without_accounts_expire_for_accounts_inserted_by_other_processes(self):
+        self.assertIsNone(retrieve_account_with_name_from_database_at_path("Alice", self.path))
+        #Another process inserting the account cannot invalidate this process's cache
+        connection = sqlite3.connect(self.path)
+        connection.execute(f"INSERT INTO {ACCOUNT_TABLE.name} VALUES ('Alice', 'password')")
+        connection.commit()
+        connection.close()
+        self.assertIsNone(retrieve_account_with_name_from_database_at_path("Alice", self.path))
+        self.clock.advance(AccountCache.DEFAULT_MISSING_ACCOUNT_LIFETIME)
+        self.assertEqual(retrieve_account_with_name_from_database_at_path("Alice", self.path).name, "Alice")
+        self.assertEqual(len(self.cache), 1)
+
+    def test_least_recently_used_names_are_evicted(self):
+        for name in ["Alice", "Bob", "Alice", "Carol"]:
+            retrieve_account_with_name_from_database_at_path(name, self.path)
+        self.assertEqual(self.cache.eviction_count, 1)
+        self.assertEqual([name for _, name in self.cache.entries], ["Alice", "Carol"])
+
+    def test_lookups_that_race_with_an_insert_are_not_cached(self):
+        invalidation_count = self.cache.invalidation_count
+        insert_account_into_database_at_path(Account("Bob", "password"), self.path)
+        self.cache.store(self.path, "Bob", None, invalidation_count)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(retrieve_account_with_name_from_database_at_path("Bob", self.path).name, "Bob")
+
+class TestBulkAccounts(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "accounts.db")
+        create_database_at_path(self.path)
+
+    def tearDown(self):
+        close_database_connections()
+        self.directory.cleanup()
+
+    def test_imported_accounts_are_exported_in_name_order(self):
+        insert_account_into_database_at_path(Account("player3", "existing"), self.path)
+        accounts = (Account(f"player{index}", f"password{index}") for index in range(10))
+        self.assertEqual(import_accounts_into_database_at_path(accounts, self.path, chunk_size=3), 9)
+        exported_accounts = list(export_accounts_from_database_at_path(self.path, chunk_size=4))
+        self.assertEqual([account.name for account in exported_accounts], [f"player{index}" for index in range(10)])
+        self.assertEqual(exported_accounts[3].password, "existing")
+
+    def test_import_invalidates_cached_missing_names(self):
+        self.assertIsNone(retrieve_account_with_name_from_database_at_path("Bob", self.path))
+        import_accounts_into_database_at_path([Account("Bob", "password")], self.path)
+        self.assertEqual(retrieve_account_with_name_from_database_at_path("Bob", self.path).password, "password")
+
+if __name__ == '__main__':
+    unittest.main()
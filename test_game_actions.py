@@ -86,6 +86,68 @@ class EndingTestCase(unittest.TestCase):
         self._assert_unfinished(fifth_turn)
         sixth_turn = 'XOXOXO   '
         self._assert_unfinished(sixth_turn)
+class BoardStateTableTestCase(unittest.TestCase):
+    def test_matches_line_scanning_on_every_board(self):
+        from game_actions import _check_winner_by_scanning_lines, _compute_current_player_by_counting
+        table = get_board_state_table()
+        for index in range(NUMBER_OF_BOARD_STATES):
+            board = convert_board_index_to_board(index)
+            self.assertEqual(compute_board_index(board), index)
+            self.assertEqual(table.get_winner(index), _check_winner_by_scanning_lines(board), board)
+            self.assertEqual(table.get_current_player(index), _compute_current_player_by_counting(board), board)
+
+    def test_legal_move_mask(self):
+        self.assertEqual(compute_legal_move_mask('X   O   X'), 0b011101110)
+        self.assertEqual(compute_legal_move_mask(list('XOXOXOXOX')), 0)
+
+    def test_accepts_lists(self):
+        self.assertEqual(check_winner(list('XXXOO    ')), 'X')
+        self.assertEqual(compute_winner_and_current_player(list('XO       ')), (None, 'X'))
+
+    def test_boards_with_other_characters_use_line_scanning(self):
+        self.assertIsNone(compute_board_index('000000000'))
+        self.assertIsNone(compute_board_index('XXX'))
+        for board in ['X_X_X_X_X', '+XXOO    ', 'XXOO    \n', 'XXOO    é']:
+            self.assertIsNone(compute_board_index(board), board)
+        self.assertEqual(check_winner('111OO    '), '1')
+
+class MoveTextTestCase(unittest.TestCase):
+    def test_standard_board_moves(self):
+        self.assertEqual(convert_move_text_to_move_number("a1"), 1)
+        self.assertEqual(convert_move_text_to_move_number("B3"), 6)
+        self.assertEqual(convert_move_text_to_move_number("c2"), 8)
+        self.assertFalse(is_valid_move_text("d1"))
+        self.assertFalse(is_valid_move_text("a4"))
+
+    def test_larger_board_moves(self):
+        self.assertTrue(is_valid_move_text("o15", 15))
+        self.assertEqual(convert_move_text_to_move_number("o15", 15), 225)
+        self.assertEqual(convert_move_text_to_move_number("b10", 15), 25)
+        self.assertFalse(is_valid_move_text("p1", 15))
+        self.assertFalse(is_valid_move_text("a16", 15))
+        self.assertFalse(is_valid_move_text("a0", 15))
+
+    def test_board_configuration_limits(self):
+        self.assertTrue(is_valid_board_configuration(3, 3))
+        self.assertTrue(is_valid_board_configuration(15, 5))
+        self.assertFalse(is_valid_board_configuration(16, 5))
+        self.assertFalse(is_valid_board_configuration(4, 5))
+        self.assertFalse(is_valid_board_configuration(4, 2))
+
+class MoveSequenceTestCase(unittest.TestCase):
+    def test_codes_round_trip_and_are_distinct(self):
+        sequences = [[], [0], [8], [4, 0, 8], list(range(9)), list(reversed(range(9)))]
+        codes = [encode_move_sequence(moves) for moves in sequences]
+        self.assertEqual(len(set(codes)), len(codes))
+        for moves, code in zip(sequences, codes):
+            self.assertEqual(decode_move_sequence(code), moves)
+            self.assertLess(code, 2**MOVE_SEQUENCE_CODE_BITS)
+        self.assertEqual(encode_move_sequence([8]*9), MAXIMUM_MOVE_SEQUENCE_CODE)
+        self.assertLess(MAXIMUM_MOVE_SEQUENCE_CODE, 2**32)
+
+    def test_board_after_moves(self):
+        self.assertEqual(compute_board_after_moves([4, 0, 8]), "O   X   X")
+        self.assertEqual(compute_board_after_moves([], 4), " "*16)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
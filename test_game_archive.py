@@ -0,0 +1,111 @@
+from game_archive import *
+from game_manager import Game, GameHandler
+import game_actions
+from testing_utilities import FakeClock
+
+import os
+import tempfile
+import unittest
+
+class TestGameArchive(unittest.TestCase):
+    def test_reads_back_archived_games(self):
+        archive = GameArchive()
+        game = Game("Bob", "Alice", 5, 4)
+        for username, move in [("Bob", 25), ("Alice", 1)]:
+            game.make_move(username, move)
+        first_id = archive.archive_game(game, EXPIRED)
+        second_id = archive.archive_game(Game("Alice", "Carol"), game_actions.TIE)
+        archived_game = archive.get_game(first_id)
+        self.assertEqual((archived_game.creator_username, archived_game.invited_username), ("Bob", "Alice"))
+        self.assertEqual((archived_game.board_size, archived_game.winning_length), (5, 4))
+        self.assertEqual(archived_game.moves, [24, 0])
+        self.assertEqual(archived_game.outcome, EXPIRED)
+        self.assertEqual(archive.get_game(second_id).moves, [])
+        self.assertEqual(archive.get_game(second_id).outcome, game_actions.TIE)
+        self.assertEqual(len(archive), 2)
+        self.assertEqual(archive.usernames, ["Bob", "Alice", "Carol"])
+
+    def test_replays_intermediate_boards(self):
+        game = Game("Bob", "Alice")
+        for username, move in [("Bob", 5), ("Alice", 1), ("Bob", 9)]:
+            game.make_move(username, move)
+        self.assertEqual(game.compute_text_after_moves(2), "O   X    ")
+        self.assertEqual(game.compute_text_after_moves(3), game.compute_text())
+        archive = GameArchive()
+        archived_game = archive.get_game(archive.archive_game(game, EXPIRED))
+        self.assertEqual(archived_game.compute_text_after_moves(1), "    X    ")
+
+class TestGameRecordFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.records")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_standard_games_are_appended_as_fixed_width_records(self):
+        record_file = GameRecordFile(self.path)
+        archive = GameArchive(record_file)
+        games = []
+        for moves, outcome in [([0, 3, 1, 4, 2], 'X'), ([4], EXPIRED), ([], game_actions.TIE)]:
+            game = Game("Bob", "Alice")
+            game.moves = moves
+            games.append((moves, outcome))
+            archive.archive_game(game, outcome)
+        archive.archive_game(Game("Bob", "Alice", 5, 4), EXPIRED)
+        record_file.close()
+        self.assertEqual(os.path.getsize(self.path), 3*GAME_RECORD_SIZE)
+        records = MemoryMappedGameRecords(self.path)
+        self.assertEqual([records.get_game(index) for index in range(len(records))], games)
+        self.assertEqual(records.count_outcomes(), {'X': 1, 'O': 0, game_actions.TIE: 1, EXPIRED: 1})
+        records.close()
+
+    def test_empty_and_partial_files(self):
+        GameRecordFile(self.path).close()
+        records = MemoryMappedGameRecords(self.path)
+        self.assertEqual(len(records), 0)
+        records.close()
+        with open(self.path, 'wb') as file:
+            file.write(bytes(3))
+        with self.assertRaises(ValueError):
+            MemoryMappedGameRecords(self.path)
+
+class TestGameRetention(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.handler = GameHandler(10, self.clock)
+
+    def test_finished_game_is_archived_and_evicted(self):
+        self.handler.create_game("Bob", "Alice")
+        game = self.handler.get_game("Bob", "Alice")
+        for username, move in [("Bob", 1), ("Alice", 4), ("Bob", 2), ("Alice", 5), ("Bob", 3)]:
+            self.assertTrue(self.handler.make_move(game, username, move))
+        self.assertFalse(self.handler.game_exists("Bob", "Alice"))
+        self.assertIsNone(self.handler.compute_time_until_next_expiry())
+        archived_game = self.handler.archive.get_game(0)
+        self.assertEqual(archived_game.moves, [0, 3, 1, 4, 2])
+        self.assertEqual(archived_game.outcome, 'X')
+
+    def test_rejected_move_changes_nothing(self):
+        self.handler.create_game("Bob", "Alice")
+        game = self.handler.get_game("Bob", "Alice")
+        self.assertFalse(self.handler.make_move(game, "Alice", 1))
+        self.assertEqual(game.moves, [])
+
+    def test_idle_games_expire_after_timeout(self):
+        self.handler.create_game("Bob", "Alice")
+        self.clock.advance(5)
+        self.handler.create_game("Carol", "Dave")
+        self.clock.advance(3)
+        self.handler.make_move(self.handler.get_game("Bob", "Alice"), "Bob", 1)
+        self.assertEqual(self.handler.compute_time_until_next_expiry(), 7)
+        self.clock.advance(7)
+        expired_games = self.handler.expire_idle_games()
+        self.assertEqual([(game.creator_username, game.invited_username) for game in expired_games], [("Carol", "Dave")])
+        self.assertTrue(self.handler.game_exists("Bob", "Alice"))
+        self.assertFalse(self.handler.game_exists("Carol", "Dave"))
+        self.assertEqual(self.handler.archive.get_game(0).outcome, EXPIRED)
+        self.assertEqual(self.handler.compute_time_until_next_expiry(), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+from game_manager import *
+from testing_utilities import FakeClock
+
+import unittest
+
+class TestGameIds(unittest.TestCase):
+    def test_game_id_is_sorted_tuple(self):
+        handler = GameHandler()
+        self.assertEqual(handler.sorted_game_id("Bob", "Alice"), ("Alice", "Bob"))
+        self.assertEqual(handler.sorted_game_id("Alice", "Bob"), ("Alice", "Bob"))
+
+    def test_game_id_usernames_are_interned(self):
+        handler = GameHandler()
+        first_id = handler.sorted_game_id("".join(["Bo", "b"]), "Alice")
+        second_id = handler.sorted_game_id("".join(["B", "ob"]), "Alice")
+        self.assertIs(first_id[1], second_id[1])
+
+class TestUserGameIndex(unittest.TestCase):
+    def setUp(self):
+        self.handler = GameHandler()
+        self.opponents = [f"user{index}" for index in range(25)]
+        for opponent in self.opponents:
+            self.handler.create_game("Bob", opponent)
+
+    def test_lists_games_in_creation_order_with_pagination(self):
+        self.assertEqual(self.handler.count_user_games("Bob"), 25)
+        pages = [self.handler.get_user_games("Bob", start, 10) for start in (0, 10, 20)]
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([game.invited_username for page in pages for game in page], self.opponents)
+        self.assertEqual(self.handler.get_user_games("Bob", 30, 10), [])
+        self.assertEqual(self.handler.count_user_games("user3"), 1)
+        self.assertEqual(self.handler.count_user_games("Carol"), 0)
+
+    def test_finished_games_leave_index(self):
+        game = self.handler.get_game("Bob", "user0")
+        for username, move in [("Bob", 1), ("user0", 4), ("Bob", 2), ("user0", 5), ("Bob", 3)]:
+            self.handler.make_move(game, username, move)
+        self.assertEqual(self.handler.count_user_games("Bob"), 24)
+        self.assertEqual(self.handler.count_user_games("user0"), 0)
+        self.assertNotIn("user0", self.handler.user_game_numbers)
+
+    def test_game_against_self_leaves_index(self):
+        self.handler.create_game("Carol", "Carol")
+        self.assertEqual(self.handler.count_user_games("Carol"), 1)
+        self.handler.idle_game_timeout = 0
+        self.handler.expire_idle_games()
+        self.assertEqual(self.handler.count_user_games("Carol"), 0)
+
+class TestGameNumbers(unittest.TestCase):
+    def test_games_are_numbered_in_creation_order(self):
+        handler = GameHandler()
+        handler.create_game("Bob", "Alice")
+        handler.create_game("Bob", "Carol")
+        self.assertEqual(handler.get_game_by_number(1), handler.get_game("Alice", "Bob"))
+        self.assertEqual(handler.get_game_by_number(2).invited_username, "Carol")
+        self.assertIsNone(handler.get_game_by_number(3))
+
+    def test_players_can_have_several_games_together(self):
+        handler = GameHandler()
+        games = [handler.create_game("Bob", "computer") for _ in range(3)]
+        self.assertEqual([game.number for game in games], [1, 2, 3])
+        self.assertEqual(handler.get_games_between("computer", "Bob"), games)
+        self.assertIs(handler.get_game("Bob", "computer"), games[2])
+        self.assertEqual(handler.count_user_games("Bob"), 3)
+        handler.idle_game_timeout = 0
+        handler.expire_idle_games()
+        self.assertFalse(handler.game_exists("Bob", "computer"))
+        self.assertEqual(handler.pair_game_numbers, {})
+
+    def test_finished_games_cannot_be_found_by_number(self):
+        handler = GameHandler()
+        handler.create_game("Bob", "Alice")
+        game = handler.get_game_by_number(1)
+        for username, move in [("Bob", 1), ("Alice", 4), ("Bob", 2), ("Alice", 5), ("Bob", 3)]:
+            handler.make_move(game, username, move)
+        self.assertIsNone(handler.get_game_by_number(1))
+        handler.create_game("Bob", "Alice")
+        self.assertEqual(handler.get_game_by_number(2).number, 2)
+
+class TestMoveClocks(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.handler = GameHandler(time_function=self.clock, move_time_limit=30)
+
+    def test_player_who_runs_out_of_time_loses(self):
+        self.handler.create_game("Bob", "Alice")
+        game = self.handler.get_game("Bob", "Alice")
+        self.clock.advance(20)
+        self.assertTrue(self.handler.make_move(game, "Bob", 5))
+        #The clock Bob started the game with is only found to be pushed back once it would have run out
+        self.assertEqual(self.handler.compute_time_until_next_move_deadline(), 10)
+        self.clock.advance(10)
+        self.assertEqual(self.handler.end_timed_out_games(), [])
+        self.assertEqual(self.handler.compute_time_until_next_move_deadline(), 20)
+        self.clock.advance(19)
+        self.assertEqual(self.handler.end_timed_out_games(), [])
+        self.clock.advance(1)
+        self.assertEqual(self.handler.end_timed_out_games(), [(game, 'X')])
+        self.assertIsNone(self.handler.get_game_by_number(game.number))
+        self.assertIsNone(self.handler.compute_time_until_next_move_deadline())
+        self.assertEqual(self.handler.archive.get_game(0).outcome, 'X')
+
+    def test_finished_games_stop_their_clocks(self):
+        self.handler.create_game("Bob", "Alice")
+        game = self.handler.get_game("Bob", "Alice")
+        for username, move in [("Bob", 1), ("Alice", 4), ("Bob", 2), ("Alice", 5), ("Bob", 3)]:
+            self.handler.make_move(game, username, move)
+        self.clock.advance(60)
+        self.assertEqual(self.handler.end_timed_out_games(), [])
+
+    def test_games_are_untimed_by_default(self):
+        handler = GameHandler(time_function=self.clock)
+        handler.create_game("Bob", "Alice")
+        self.assertIsNone(handler.compute_time_until_next_move_deadline())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+from game_persistence import *
+from game_manager import GameHandler
+from database_management import create_database_at_path, MOVE_TABLE
+from logging_utilities import PrimaryMemoryLogger
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+class TestGamePersistence(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.db")
+        create_database_at_path(self.path)
+        self.writer = GamePersistenceWriter(self.path)
+        self.handler = GameHandler(persistence=self.writer)
+
+    def tearDown(self):
+        self.writer.close()
+        self.directory.cleanup()
+
+    def test_saved_games_match_live_games(self):
+        self.handler.create_game("Bob", "Alice")
+        self.handler.create_game("Bob", "Carol", 5, 4)
+        self.handler.make_move(self.handler.get_game("Bob", "Alice"), "Bob", 5)
+        self.handler.make_move(self.handler.get_game("Bob", "Alice"), "Alice", 1)
+        self.handler.make_move(self.handler.get_game("Bob", "Carol"), "Bob", 25)
+        self.writer.flush()
+        saved_games = load_saved_games_from_database_at_path(self.path)
+        self.assertEqual([(game.number, game.creator_username, game.invited_username, game.board_size, game.winning_length, game.moves) for game in saved_games], [
+            (1, "Bob", "Alice", 3, 3, [4, 0]),
+            (2, "Bob", "Carol", 5, 4, [24]),
+        ])
+
+    def test_finished_games_are_removed(self):
+        self.handler.create_game("Bob", "Alice")
+        game = self.handler.get_game("Bob", "Alice")
+        for username, move in [("Bob", 1), ("Alice", 4), ("Bob", 2), ("Alice", 5), ("Bob", 3)]:
+            self.handler.make_move(game, username, move)
+        self.writer.flush()
+        self.assertEqual(load_saved_games_from_database_at_path(self.path), [])
+
+    def test_restored_games_continue_where_they_left_off(self):
+        self.handler.create_game("Bob", "Alice")
+        self.handler.make_move(self.handler.get_game("Bob", "Alice"), "Bob", 3)
+        self.writer.flush()
+        restored_handler = GameHandler()
+        self.assertEqual(restore_games_from_database_at_path(restored_handler, self.path), 1)
+        game = restored_handler.get_game_by_number(1)
+        self.assertEqual(game.compute_text(), "  X      ")
+        self.assertEqual(game.get_current_turn(), "Alice")
+        self.assertEqual(restored_handler.count_user_games("Bob"), 1)
+        restored_handler.create_game("Carol", "Dave")
+        self.assertEqual(restored_handler.get_game("Carol", "Dave").number, 2)
+
+    def test_numbers_of_finished_games_are_not_reused_after_restoring(self):
+        self.handler.create_game("Bob", "Alice")
+        self.handler.create_game("Carol", "Dave")
+        game = self.handler.get_game("Carol", "Dave")
+        for username, move in [("Carol", 1), ("Dave", 4), ("Carol", 2), ("Dave", 5), ("Carol", 3)]:
+            self.handler.make_move(game, username, move)
+        self.writer.flush()
+        restored_handler = GameHandler()
+        self.assertEqual(restore_games_from_database_at_path(restored_handler, self.path), 1)
+        restored_handler.create_game("Carol", "Dave")
+        self.assertEqual(restored_handler.get_game("Carol", "Dave").number, 3)
+
+    def test_database_errors_are_logged_and_returned_on_close(self):
+        logger = PrimaryMemoryLogger()
+        writer = GamePersistenceWriter(self.path, logger=logger)
+        connection = sqlite3.connect(self.path)
+        connection.execute(f"DROP TABLE {MOVE_TABLE.name}")
+        connection.commit()
+        connection.close()
+        handler = GameHandler(persistence=writer)
+        handler.create_game("Bob", "Alice")
+        handler.make_move(handler.get_game("Bob", "Alice"), "Bob", 5)
+        writer.flush()
+        self.assertEqual(len(logger.logs[""]), 1)
+        self.assertIsInstance(writer.close(), sqlite3.Error)
+
+    def test_writer_that_cannot_open_the_database_still_flushes_and_closes(self):
+        logger = PrimaryMemoryLogger()
+        writer = GamePersistenceWriter(os.path.join(self.directory.name, "missing", "games.db"), logger=logger)
+        writer.record_change(GAME_DELETION_COMMAND, (1,))
+        writer.flush()
+        self.assertIsInstance(writer.close(), sqlite3.Error)
+        self.assertEqual(len(logger.logs[""]), 1)
+
+    def test_errors_other_than_database_errors_do_not_stop_the_writer(self):
+        writer = GamePersistenceWriter(self.path)
+        #A command that is not a string makes sqlite3 raise a TypeError
+        writer.record_change(1, (1,))
+        writer.flush()
+        handler = GameHandler(persistence=writer)
+        handler.create_game("Bob", "Alice")
+        self.assertIsInstance(writer.close(), TypeError)
+        self.assertEqual([game.number for game in load_saved_games_from_database_at_path(self.path)], [1])
+
+    def test_database_uses_write_ahead_logging(self):
+        self.writer.flush()
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        connection.close()
+
+if __name__ == '__main__':
+    unittest.main()
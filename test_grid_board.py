@@ -0,0 +1,69 @@
+from grid_board import *
+from game_manager import Game
+import game_actions
+
+import random
+import unittest
+
+def place_pieces(board: GridBoard, cells, piece):
+    for cell in cells:
+        board.place_piece(cell, piece)
+
+class TestWinDetection(unittest.TestCase):
+    def test_detects_lines_in_every_direction(self):
+        lines = {
+            "row": [15*7 + column for column in range(3, 8)],
+            "column": [15*row + 2 for row in range(10, 15)],
+            "diagonal": [15*index + index for index in range(5)],
+            "anti-diagonal": [15*index + 14 - index for index in range(5)],
+        }
+        for name, line in lines.items():
+            board = GridBoard(15, 5)
+            place_pieces(board, line[:-1], 'O')
+            self.assertIsNone(board.compute_winner(), name)
+            board.place_piece(line[-1], 'O')
+            self.assertEqual(board.compute_winner(), 'O', name)
+
+    def test_detects_line_completed_in_the_middle(self):
+        board = GridBoard(7, 4)
+        place_pieces(board, [21, 22, 24], 'X')
+        board.place_piece(23, 'X')
+        self.assertEqual(board.compute_winner(), 'X')
+
+    def test_lines_do_not_wrap_around_edges(self):
+        board = GridBoard(5, 3)
+        place_pieces(board, [3, 4, 5], 'X')
+        self.assertIsNone(board.compute_winner())
+        self.assertIsNone(compute_winner_by_scanning(board.compute_text(), 5, 3))
+
+    def test_full_board_without_line_is_tie(self):
+        board = GridBoard(4, 4)
+        for index, piece in enumerate("XXOO" "OOXX" "XXOO" "OOXX"):
+            board.place_piece(index, piece)
+        self.assertEqual(board.compute_winner(), game_actions.TIE)
+
+    def test_matches_scanning_on_random_games(self):
+        generator = random.Random(0)
+        for board_size, winning_length in [(4, 3), (6, 4), (9, 5)]:
+            for _ in range(50):
+                board = GridBoard(board_size, winning_length)
+                cells = list(range(board_size*board_size))
+                generator.shuffle(cells)
+                piece = 'X'
+                for cell in cells:
+                    board.place_piece(cell, piece)
+                    self.assertEqual(board.compute_winner(), compute_winner_by_scanning(board.compute_text(), board_size, winning_length))
+                    if board.compute_winner() is not None:
+                        break
+                    piece = game_actions.compute_other_piece(piece)
+
+class TestGridGame(unittest.TestCase):
+    def test_uses_board_with_requested_size(self):
+        game = Game("Bob", "Alice", 15, 5)
+        self.assertEqual(game.compute_text(), ' '*225)
+        self.assertTrue(game.make_move("Bob", 225))
+        self.assertFalse(game.make_move("Alice", 226))
+        self.assertEqual(game.compute_text(), ' '*224 + 'X')
+
+if __name__ == '__main__':
+    unittest.main()
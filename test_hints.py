@@ -0,0 +1,44 @@
+from hints import *
+from solver import get_solver
+
+import os
+import tempfile
+import unittest
+
+class TestHintTables(unittest.TestCase):
+    def setUp(self):
+        self.solver = get_solver()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "hints.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lazy_table_matches_solver(self):
+        table = LazyHintTable()
+        self.assertEqual(table.solver.best_moves, {})
+        for board, best_moves in self.solver.best_moves.items():
+            self.assertEqual(table.get_best_moves(board), best_moves, board)
+        self.assertEqual(table.compute_size(), len(self.solver.best_moves))
+
+    def test_lazy_table_forgets_least_recently_used_boards(self):
+        table = LazyHintTable(2)
+        for board in ["X        ", " X       ", "  X      "]:
+            table.get_best_moves(board)
+        self.assertEqual(table.compute_size(), 2)
+
+    def test_memory_mapped_table_matches_solver(self):
+        table = open_memory_mapped_hint_table(self.path, self.solver)
+        self.assertEqual(os.path.getsize(self.path), HINT_TABLE_FILE_SIZE)
+        for board, best_moves in self.solver.best_moves.items():
+            self.assertEqual(table.get_best_moves(board), best_moves, board)
+        table.close()
+
+    def test_memory_mapped_table_rejects_file_of_wrong_size(self):
+        with open(self.path, 'wb') as file:
+            file.write(bytes(10))
+        with self.assertRaises(ValueError):
+            MemoryMappedHintTable(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
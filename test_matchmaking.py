@@ -0,0 +1,58 @@
+import unittest
+
+from matchmaking import MatchmakingQueue
+from testing_utilities import FakeClock
+
+class TestMatchmakingQueue(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = MatchmakingQueue(time_function=self.clock)
+
+    def test_players_with_close_ratings_are_paired_when_they_join(self):
+        self.assertIsNone(self.queue.enqueue("Bob", 1200))
+        self.assertIsNone(self.queue.enqueue("Carol", 1600))
+        self.assertEqual(self.queue.enqueue("Alice", 1250).username, "Bob")
+        self.assertNotIn("Bob", self.queue)
+        self.assertEqual(len(self.queue), 1)
+
+    def test_nearest_bucket_is_preferred(self):
+        self.assertIsNone(self.queue.enqueue("Bob", 1110))
+        self.assertIsNone(self.queue.enqueue("Carol", 1390))
+        self.clock.advance(30)
+        self.assertEqual(self.queue.enqueue("Alice", 1360).username, "Carol")
+
+    def test_newer_player_of_a_bucket_is_paired_when_the_oldest_is_too_far(self):
+        self.queue = MatchmakingQueue(initial_rating_gap=50, time_function=self.clock)
+        self.assertIsNone(self.queue.enqueue("Bob", 1000))
+        self.assertIsNone(self.queue.enqueue("Carol", 1090))
+        self.assertEqual(self.queue.enqueue("Alice", 1130).username, "Carol")
+        self.assertEqual(list(self.queue.queued_players), ["Bob"])
+
+    def test_rating_gap_grows_while_waiting(self):
+        self.queue.enqueue("Bob", 1200)
+        self.queue.enqueue("Alice", 1500)
+        self.assertEqual(self.queue.pair_waiting_players_if_due(), [])
+        self.clock.advance(self.queue.compute_time_until_next_pairing())
+        self.assertEqual(self.queue.pair_waiting_players_if_due(), [])
+        self.clock.advance(20)
+        pairs = self.queue.pair_waiting_players_if_due()
+        self.assertEqual([(first.username, second.username) for first, second in pairs], [("Bob", "Alice")])
+        self.assertEqual(len(self.queue), 0)
+        self.assertIsNone(self.queue.compute_time_until_next_pairing())
+
+    def test_players_further_than_the_maximum_gap_are_never_paired(self):
+        self.queue.enqueue("Bob", 400)
+        self.queue.enqueue("Alice", 2000)
+        self.clock.advance(1000)
+        self.assertEqual(self.queue.pair_waiting_players(), [])
+        self.assertEqual(len(self.queue), 2)
+
+    def test_removed_players_are_not_paired(self):
+        self.queue.enqueue("Bob", 1200)
+        self.assertEqual(self.queue.remove_player("Bob").username, "Bob")
+        self.assertIsNone(self.queue.remove_player("Bob"))
+        self.assertIsNone(self.queue.enqueue("Alice", 1200))
+        self.assertEqual(self.queue.bucket_indexes, [12])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -130,6 +130,13 @@ class TestComplexVariableLengthMessageProtocol(unittest.TestCase):
             self.assertEqual(expected[key], values[key])
         self.assertTrue(message_handler.is_done_obtaining_values())
 
+    def test_can_unpack_empty_final_string(self):
+        message_protocol = protocol.create_game_number_and_username_message_protocol(6)
+        message_handler = protocol.MessageHandler(protocol.ProtocolMap([message_protocol]))
+        message_handler.receive_bytes(message_protocol.pack(2, ""))
+        self.assertTrue(message_handler.is_done_obtaining_values())
+        self.assertEqual(message_handler.get_values(), {'game': 2, 'username': ''})
+
 class TestMultipleFieldFixedLengthMessageProtocol(unittest.TestCase):
     def _compute_protocol(self):
         first_field = protocol.create_single_byte_nonnegative_integer_protocol_field('1')
@@ -0,0 +1,54 @@
+from rate_limiting import *
+from testing_utilities import FakeClock
+
+import unittest
+
+class TestTokenBucket(unittest.TestCase):
+    def test_allows_burst_up_to_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, 3, clock)
+        results = [bucket.try_consume() for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, 1, clock)
+        self.assertTrue(bucket.try_consume())
+        self.assertFalse(bucket.try_consume())
+        clock.advance(0.5)
+        self.assertTrue(bucket.try_consume())
+
+    def test_does_not_exceed_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, 2, clock)
+        clock.advance(100)
+        results = [bucket.try_consume() for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+class TestConnectionRateLimiter(unittest.TestCase):
+    def test_counts_dropped_messages(self):
+        clock = FakeClock()
+        limiter = ConnectionRateLimiter(RateLimitConfiguration(1, 2), clock)
+        for _ in range(5):
+            limiter.allow_message(0)
+        self.assertEqual(limiter.get_dropped_message_count(0), 3)
+        self.assertEqual(limiter.get_dropped_message_count(), 3)
+        self.assertEqual(limiter.get_dropped_message_count(5), 0)
+
+    def test_type_code_limit_does_not_block_other_type_codes(self):
+        clock = FakeClock()
+        limiter = ConnectionRateLimiter(RateLimitConfiguration(100, 100, {0: (1, 1)}), clock)
+        self.assertTrue(limiter.allow_message(0))
+        self.assertFalse(limiter.allow_message(0))
+        self.assertTrue(limiter.allow_message(5))
+
+    def test_dropped_message_does_not_consume_connection_token(self):
+        clock = FakeClock()
+        limiter = ConnectionRateLimiter(RateLimitConfiguration(1, 2, {0: (1, 1)}), clock)
+        self.assertTrue(limiter.allow_message(0))
+        self.assertFalse(limiter.allow_message(0))
+        self.assertTrue(limiter.allow_message(5))
+        self.assertFalse(limiter.allow_message(5))
+
+if __name__ == '__main__':
+    unittest.main()
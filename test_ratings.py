@@ -0,0 +1,53 @@
+from ratings import *
+from database_management import create_database_at_path
+
+import os
+import random
+import tempfile
+import unittest
+
+class TestRatings(unittest.TestCase):
+    def test_expected_scores_of_both_players_add_up_to_one(self):
+        self.assertEqual(compute_expected_score(1200, 1200), 0.5)
+        self.assertAlmostEqual(compute_expected_score(1600, 1200) + compute_expected_score(1200, 1600), 1)
+        self.assertAlmostEqual(compute_expected_score(1600, 1200), 10/11)
+
+    def test_winner_gains_what_the_loser_loses(self):
+        table = RatingTable()
+        self.assertEqual(table.record_game("Bob", "Alice", WIN_SCORE), 16)
+        self.assertEqual(table.get_rating("Bob"), 1216)
+        self.assertEqual(table.get_rating("Alice"), 1184)
+        self.assertEqual(table.get_rating("Carol"), DEFAULT_RATING)
+        self.assertLess(table.record_game("Bob", "Alice", TIE_SCORE), 0)
+        self.assertEqual(table.get_player_rating("Alice").game_count, 2)
+
+    def test_leaderboard_matches_sorting_every_rating(self):
+        generator = random.Random(0)
+        table = RatingTable(leaderboard_capacity=12)
+        usernames = [f"player{index}" for index in range(200)]
+        for _ in range(5000):
+            first_username, second_username = generator.sample(usernames, 2)
+            table.record_game(first_username, second_username, generator.choice([WIN_SCORE, TIE_SCORE, LOSS_SCORE]))
+            expected_usernames = sorted(table.player_ratings, key=lambda username: (-table.get_rating(username), username))[:10]
+            self.assertEqual([player_rating.username for player_rating in table.get_leaderboard(10)], expected_usernames)
+        #Players leaving the cache are replaced by rebuilding it, which should be rare compared to the games played
+        self.assertGreater(table.leaderboard_rebuild_count, 1)
+        self.assertLess(table.leaderboard_rebuild_count, 500)
+
+    def test_ratings_are_saved_and_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ratings.db")
+            create_database_at_path(path)
+            writer = RatingWriter(path)
+            table = RatingTable(writer=writer)
+            table.record_game("Bob", "Alice", WIN_SCORE)
+            table.record_game("Bob", "Carol", LOSS_SCORE)
+            self.assertIsNone(writer.close())
+            loaded_table = RatingTable(load_player_ratings_from_database_at_path(path))
+            for username in ["Alice", "Bob", "Carol"]:
+                self.assertEqual(loaded_table.get_rating(username), table.get_rating(username))
+                self.assertEqual(loaded_table.get_player_rating(username).game_count, table.get_player_rating(username).game_count)
+            self.assertEqual([player_rating.username for player_rating in loaded_table.get_leaderboard(3)], ["Carol", "Bob", "Alice"])
+
+if __name__ == '__main__':
+    unittest.main()
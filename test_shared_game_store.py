@@ -0,0 +1,102 @@
+from shared_game_store import *
+import game_actions
+
+import multiprocessing
+import unittest
+
+def play_games_in_own_slots(store: SharedGameStore, worker: int, game_count: int, results):
+    """Starts games for the worker and plays X along the top row in each, recording the slots it got"""
+    slots = []
+    for game in range(game_count):
+        slot = store.allocate_slot(worker*1000 + game, 2*worker, 2*worker + 1)
+        for player_id, cell in [(2*worker, 0), (2*worker + 1, 3), (2*worker, 1), (2*worker + 1, 4), (2*worker, 2)]:
+            store.make_move(slot, player_id, cell)
+        slots.append(slot)
+    results.put((worker, slots))
+    store.close()
+
+def race_for_cells(store: SharedGameStore, slot: int, player_id: int, results):
+    """Tries every cell of the shared game as one player until the game ends and records how many moves it made"""
+    move_count = 0
+    while store.read_slot(slot).compute_winner() is None:
+        for cell in range(9):
+            if store.make_move(slot, player_id, cell):
+                move_count += 1
+    results.put(move_count)
+    store.close()
+
+class TestSharedGameStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SharedGameStore(64, lock_stripe_count=8)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_moves_follow_turns_and_stop_at_the_end(self):
+        slot = self.store.allocate_slot(7, 10, 20)
+        self.assertFalse(self.store.make_move(slot, 20, 0))
+        self.assertTrue(self.store.make_move(slot, 10, 4))
+        self.assertFalse(self.store.make_move(slot, 20, 4))
+        for player_id, cell in [(20, 0), (10, 3), (20, 1), (10, 5)]:
+            self.assertTrue(self.store.make_move(slot, player_id, cell))
+        self.assertFalse(self.store.make_move(slot, 20, 8))
+        game = self.store.read_slot(slot)
+        self.assertEqual((game.game_number, game.creator_id, game.invited_id), (7, 10, 20))
+        self.assertEqual(game.compute_text(), "OO XXX   ")
+        self.assertEqual(game.compute_winner(), 'X')
+        self.assertEqual(game.sequence, 2*6)
+
+    def test_freed_slots_are_reused(self):
+        slots = [self.store.allocate_slot(number, 1, 2) for number in range(64)]
+        self.assertEqual(sorted(slots), list(range(64)))
+        self.assertIsNone(self.store.allocate_slot(64, 1, 2))
+        self.store.free_slot(slots[10])
+        self.assertIsNone(self.store.read_slot(slots[10]))
+        self.assertEqual(self.store.count_free_slots(), 1)
+        self.assertEqual(self.store.allocate_slot(65, 3, 4), slots[10])
+        self.assertEqual(self.store.read_slot(slots[10]).compute_text(), " "*9)
+
+    def test_freeing_a_free_or_missing_slot_is_rejected(self):
+        slot = self.store.allocate_slot(1, 1, 2)
+        self.store.free_slot(slot)
+        with self.assertRaises(ValueError):
+            self.store.free_slot(slot)
+        for missing_slot in [-1, 64]:
+            with self.assertRaises(ValueError):
+                self.store.free_slot(missing_slot)
+        self.assertEqual(self.store.count_free_slots(), 64)
+        self.assertNotEqual(self.store.allocate_slot(2, 1, 2), self.store.allocate_slot(3, 1, 2))
+
+    def test_worker_processes_share_slots(self):
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=play_games_in_own_slots, args=(self.store, worker, 12, results)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        slots_by_worker = dict(results.get(timeout=30) for _ in workers)
+        for worker in workers:
+            worker.join()
+        every_slot = [slot for slots in slots_by_worker.values() for slot in slots]
+        self.assertEqual(len(set(every_slot)), 4*12)
+        self.assertEqual(self.store.count_free_slots(), 64 - 4*12)
+        for worker, slots in slots_by_worker.items():
+            for slot in slots:
+                game = self.store.read_slot(slot)
+                self.assertEqual(game.creator_id, 2*worker)
+                self.assertEqual(game.compute_text(), "XXXOO    ")
+
+    def test_racing_processes_make_each_move_once(self):
+        slot = self.store.allocate_slot(1, 100, 200)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=race_for_cells, args=(self.store, slot, player_id, results)) for player_id in (100, 200, 100, 200)]
+        for worker in workers:
+            worker.start()
+        move_count = sum(results.get(timeout=30) for _ in workers)
+        for worker in workers:
+            worker.join()
+        game = self.store.read_slot(slot)
+        self.assertEqual(move_count, bin(game.x_bitboard | game.o_bitboard).count("1"))
+        self.assertEqual(game.sequence, 2*move_count + 2)
+        self.assertIsNotNone(game.compute_winner())
+
+if __name__ == '__main__':
+    unittest.main()
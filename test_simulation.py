@@ -0,0 +1,36 @@
+from simulation import *
+import game_actions
+
+import unittest
+
+class TestSelfPlaySimulator(unittest.TestCase):
+    def test_random_games_all_finish(self):
+        simulator = SelfPlaySimulator(create_random_policy(0), create_random_policy(1), concurrent_game_count=50)
+        results = simulator.run(500)
+        self.assertEqual(results.game_count, 500)
+        self.assertEqual(sum(results.outcome_counts.values()), 500)
+        self.assertTrue(5*500 <= results.move_count <= 9*500)
+
+    def test_same_seeds_give_same_results(self):
+        results = [SelfPlaySimulator(create_random_policy(3), create_random_policy(4), concurrent_game_count=10).run(200) for _ in range(2)]
+        self.assertEqual(results[0].outcome_counts, results[1].outcome_counts)
+        self.assertEqual(results[0].move_count, results[1].move_count)
+
+    def test_scripted_games(self):
+        simulator = SelfPlaySimulator(create_scripted_policy([1, 2, 3]), create_scripted_policy([4, 5, 6]), concurrent_game_count=7)
+        results = simulator.run(20)
+        self.assertEqual(results.outcome_counts, {'X': 20, 'O': 0, game_actions.TIE: 0})
+        self.assertEqual(results.move_count, 5*20)
+
+    def test_perfect_play_ties(self):
+        results = SelfPlaySimulator(perfect_policy, perfect_policy, concurrent_game_count=3).run(10, should_trace_allocations=True)
+        self.assertEqual(results.outcome_counts[game_actions.TIE], 10)
+        self.assertIsNotNone(results.peak_memory)
+
+    def test_larger_boards(self):
+        simulator = SelfPlaySimulator(create_random_policy(0), create_random_policy(1), concurrent_game_count=5, board_size=5, winning_length=4)
+        results = simulator.run(20)
+        self.assertEqual(sum(results.outcome_counts.values()), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+from solver import *
+import game_actions
+
+import unittest
+
+class TestSymmetries(unittest.TestCase):
+    def test_symmetries_are_distinct_permutations(self):
+        self.assertEqual(len(set(SYMMETRIES)), 8)
+        for symmetry in SYMMETRIES:
+            self.assertEqual(sorted(symmetry), list(range(9)))
+
+    def test_rotations_and_reflections_share_canonical_board(self):
+        board = "XO  X    "
+        canonical_board = compute_canonical_board(board)
+        for symmetry in SYMMETRIES:
+            self.assertEqual(compute_canonical_board(transform_board(board, symmetry)), canonical_board)
+
+class TestSolver(unittest.TestCase):
+    def setUp(self):
+        self.solver = get_solver()
+
+    def test_perfect_play_ties(self):
+        self.assertEqual(self.solver.compute_value(EMPTY_BOARD), 0)
+
+    def test_takes_immediate_win_over_block(self):
+        self.assertEqual(self.solver.get_best_moves("XX OO X  "), (5,))
+
+    def test_blocks_opponent(self):
+        self.assertEqual(self.solver.get_best_moves("XX  O    "), (2,))
+
+    def test_never_loses_against_any_opponent(self):
+        def play_every_opponent_move(board):
+            winner = game_actions.check_winner(board)
+            if winner is not None:
+                self.assertNotEqual(winner, 'X', board)
+                return
+            for move in range(9):
+                if board[move] == ' ':
+                    after_opponent = board[:move] + 'X' + board[move + 1:]
+                    if game_actions.check_winner(after_opponent) is not None:
+                        self.assertNotEqual(game_actions.check_winner(after_opponent), 'X', after_opponent)
+                        continue
+                    reply = self.solver.get_best_move(after_opponent)
+                    play_every_opponent_move(after_opponent[:reply] + 'O' + after_opponent[reply + 1:])
+        play_every_opponent_move(EMPTY_BOARD)
+
+if __name__ == '__main__':
+    unittest.main()
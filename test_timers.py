@@ -0,0 +1,47 @@
+from timers import *
+
+import unittest
+
+class TestTimerScheduler(unittest.TestCase):
+    def test_pops_expired_keys_in_deadline_order(self):
+        scheduler = TimerScheduler()
+        scheduler.schedule("b", 2.0)
+        scheduler.schedule("a", 1.0)
+        scheduler.schedule("c", 3.0)
+        self.assertEqual(scheduler.compute_next_deadline(), 1.0)
+        self.assertEqual(scheduler.pop_expired_keys(2.5), ["a", "b"])
+        self.assertEqual(len(scheduler), 1)
+        self.assertEqual(scheduler.compute_next_deadline(), 3.0)
+
+    def test_rescheduled_and_cancelled_keys_keep_only_their_latest_deadline(self):
+        scheduler = TimerScheduler()
+        scheduler.schedule("a", 1.0)
+        scheduler.schedule("b", 2.0)
+        scheduler.schedule("a", 5.0)
+        scheduler.cancel("b")
+        self.assertEqual(scheduler.get_deadline("a"), 5.0)
+        self.assertIsNone(scheduler.get_deadline("b"))
+        #The pushed back deadline is found out once the old one passes
+        self.assertEqual(scheduler.compute_next_deadline(), 1.0)
+        self.assertEqual(scheduler.pop_expired_keys(2.0), [])
+        self.assertEqual(scheduler.compute_next_deadline(), 5.0)
+        self.assertEqual(scheduler.pop_expired_keys(10.0), ["a"])
+        self.assertIsNone(scheduler.compute_next_deadline())
+
+    def test_later_deadlines_do_not_add_heap_entries(self):
+        scheduler = TimerScheduler()
+        for deadline in range(10000):
+            scheduler.schedule("a", float(deadline))
+        self.assertEqual(len(scheduler.heap), 1)
+        self.assertEqual(scheduler.pop_expired_keys(9998.0), [])
+        self.assertEqual(scheduler.compute_next_deadline(), 9999.0)
+
+    def test_stale_entries_are_compacted(self):
+        scheduler = TimerScheduler()
+        for deadline in range(10000, 0, -1):
+            scheduler.schedule("a", float(deadline))
+        self.assertLess(len(scheduler.heap), 200)
+        self.assertEqual(scheduler.compute_next_deadline(), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
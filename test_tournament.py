@@ -0,0 +1,34 @@
+from tournament import *
+import game_actions
+
+import unittest
+
+class TestTournament(unittest.TestCase):
+    def test_shards_cover_every_ordered_pairing(self):
+        shards = create_tournament_shards(["random", "perfect"], 25, shard_game_count=10, board_size=3, winning_length=3)
+        self.assertEqual([(shard.x_policy_name, shard.o_policy_name, shard.game_count) for shard in shards], [
+            ("random", "perfect", 10), ("random", "perfect", 10), ("random", "perfect", 5),
+            ("perfect", "random", 10), ("perfect", "random", 10), ("perfect", "random", 5),
+        ])
+        self.assertEqual(len({shard.seed for shard in shards}), len(shards))
+
+    def test_merged_results_add_up(self):
+        results = TournamentResults(["random", "perfect"])
+        results.merge_shard_result(("random", "perfect", 0, 7, 3, 50))
+        results.merge_shard_result(("perfect", "random", 9, 0, 1, 40))
+        perfect = results.standings["perfect"]
+        self.assertEqual((perfect.wins, perfect.losses, perfect.ties), (16, 0, 4))
+        self.assertEqual(perfect.compute_points(), 18)
+        self.assertEqual(results.game_count, 20)
+        self.assertEqual([standing.policy_name for standing in results.compute_ranked_standings()], ["perfect", "random"])
+
+    def test_results_do_not_depend_on_worker_count(self):
+        results = [run_tournament(["random", "scripted", "perfect"], 60, worker_count=worker_count, shard_game_count=25) for worker_count in (1, 2)]
+        for policy_name in ["random", "scripted", "perfect"]:
+            standings = [result.standings[policy_name] for result in results]
+            self.assertEqual((standings[0].wins, standings[0].losses, standings[0].ties), (standings[1].wins, standings[1].losses, standings[1].ties))
+        self.assertEqual(results[0].game_count, 6*60)
+        self.assertEqual(results[0].standings["perfect"].losses, 0)
+
+if __name__ == '__main__':
+    unittest.main()
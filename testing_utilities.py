@@ -1,4 +1,6 @@
+import os
 import time
+import tempfile
 from threading import Thread
 import selectors
 from protocol import Message
@@ -36,6 +38,23 @@ def wait_until_true_or_timeout(condition_function, timeout_message = "", time_to
             time_waited += waiting_time
             waiting_time = min(time_to_wait - time_waited, waiting_time*2)
 
+class FakeClock:
+    """A time function that only moves forward when advanced, for testing code that takes a time_function"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, amount):
+        self.now += amount
+
+def compute_percentile(values, percentile):
+    """Returns the value at the specified percentile (between 0 and 100) of the values"""
+    ordered_values = sorted(values)
+    index = min(len(ordered_values) - 1, int(len(ordered_values)*percentile/100))
+    return ordered_values[index]
+
 class Credentials:
     def __init__(self, username, password=""):
         self.username = username
@@ -74,7 +93,8 @@ class TestClientHandler:
 
     def perform_command(self, command: str):
         request = self.client.create_request_from_text_input(command)
-        self.client.send_message(request)
+        if request:
+            self.client.send_message(request)
 
     def send_message(self, message):
         self.client.send_message(message)
@@ -257,9 +277,15 @@ class TestCase:
     DEFAULT_SERVER_PORT = 9090
     DEFAULT_SERVER_HOST = 'localhost'
     DEFAULT_SERVER_ADDRESS = (DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT)
-    def __init__(self, server_host=DEFAULT_SERVER_HOST, server_port=DEFAULT_SERVER_PORT, use_real_sockets=False, database_path="testing.db", password_function=create_simple_password, should_perform_automatic_login=False):
+    def __init__(self, server_host=DEFAULT_SERVER_HOST, server_port=DEFAULT_SERVER_PORT, use_real_sockets=False, database_path=None, password_function=create_simple_password, should_perform_automatic_login=False):
+        """database_path: the database the server uses. If unspecified, a new database is created in a temporary directory that is deleted when the test case closes, so accounts and ratings never carry over between tests"""
         self.server_host = server_host
         self.server_port = server_port
+        self.temporary_directory = None
+        if database_path is None:
+            self.temporary_directory = tempfile.TemporaryDirectory()
+            database_path = os.path.join(self.temporary_directory.name, "testing.db")
+            create_database_at_path(database_path)
         self.factory = TestingFactory(server_host, server_port, should_use_real_sockets=use_real_sockets)
         self.clients = {}
         self.password_function = password_function
@@ -309,6 +335,9 @@ class TestCase:
             self.clients[client].close()
         self.server.close()
         self.active_clients = 0
+        if self.temporary_directory is not None:
+            self.temporary_directory.cleanup()
+            self.temporary_directory = None
 
     def delete_inactive_client_threads(self):
         for key in self.active_clients.copy():
@@ -380,7 +409,3 @@ class TestCase:
     def assert_values_match_output(self, values, user_name):
         output = self.get_output(user_name)
         self._assert_match(values, output, self._value_matches_output)
-
-def setup():
-    create_database_at_path("testing.db")
-setup()
\ No newline at end of file
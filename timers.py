@@ -0,0 +1,85 @@
+#This module keeps deadlines in a heap so the selector loop can find the next one and the ones that passed without looking at every timer.
+import heapq
+import itertools
+
+class TimerScheduler:
+    #Cancelled entries are only dropped when they reach the top, so the heap is rebuilt once they outnumber the live timers by this factor
+    COMPACTION_FACTOR = 2
+    def __init__(self):
+        """
+            Keeps at most one deadline for each key, with every operation taking O(log n) time for n timers.
+            Pushing a key's deadline later, which is what a move does to a move clock, only updates the deadline recorded for the key.
+            Its heap entry is only moved to the new deadline once the old one passes, so reschedules never pile up entries
+        """
+        #Holds (deadline, entry number, key) tuples. The entry number breaks ties between equal deadlines without comparing keys
+        self.heap = []
+        #Maps keys to [entry number, deadline of the heap entry, actual deadline] lists
+        self.live_entries = {}
+        self.entry_numbers = itertools.count()
+
+    def schedule(self, key, deadline: float):
+        """Sets the key's deadline, replacing the one it had if any"""
+        live_entry = self.live_entries.get(key)
+        if live_entry is not None and live_entry[1] <= deadline:
+            live_entry[2] = deadline
+            return
+        #An earlier deadline needs a new entry, which leaves any old one stale
+        entry_number = next(self.entry_numbers)
+        self.live_entries[key] = [entry_number, deadline, deadline]
+        heapq.heappush(self.heap, (deadline, entry_number, key))
+        self._compact_if_mostly_stale()
+
+    def cancel(self, key):
+        """Removes the key's deadline if it has one"""
+        if self.live_entries.pop(key, None) is not None:
+            self._compact_if_mostly_stale()
+
+    def get_deadline(self, key):
+        """Returns the key's deadline or None if it has none"""
+        live_entry = self.live_entries.get(key)
+        return None if live_entry is None else live_entry[2]
+
+    def _compact_if_mostly_stale(self):
+        if len(self.heap) > self.COMPACTION_FACTOR*len(self.live_entries) + 64:
+            self.heap = []
+            for key, live_entry in self.live_entries.items():
+                live_entry[1] = live_entry[2]
+                self.heap.append((live_entry[2], live_entry[0], key))
+            heapq.heapify(self.heap)
+
+    def _drop_stale_entries_from_top(self):
+        while self.heap:
+            _, entry_number, key = self.heap[0]
+            live_entry = self.live_entries.get(key)
+            if live_entry is not None and live_entry[0] == entry_number:
+                return
+            heapq.heappop(self.heap)
+
+    def compute_next_deadline(self):
+        """
+            Returns a time at or before the earliest deadline or None if there are none.
+            It is before the earliest deadline when the top entry's deadline was pushed later, which is only found out when pop_expired_keys reaches it
+        """
+        self._drop_stale_entries_from_top()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_expired_keys(self, now: float):
+        """Removes and returns the keys whose deadlines are at or before now"""
+        expired_keys = []
+        self._drop_stale_entries_from_top()
+        while self.heap and self.heap[0][0] <= now:
+            _, entry_number, key = self.heap[0]
+            live_entry = self.live_entries[key]
+            if live_entry[2] > now:
+                #Only entries that reach now are moved, so a burst of reschedules is spread over the time the old deadlines pass
+                live_entry[1] = live_entry[2]
+                heapq.heapreplace(self.heap, (live_entry[2], entry_number, key))
+            else:
+                heapq.heappop(self.heap)
+                del self.live_entries[key]
+                expired_keys.append(key)
+            self._drop_stale_entries_from_top()
+        return expired_keys
+
+    def __len__(self):
+        return len(self.live_entries)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+#This module runs round robin tournaments between the move policies in simulation.POLICIES, sharding the games across worker processes.
+#Every pairing plays both ways around, and its games are split into shards that are each played by one worker with SelfPlaySimulator.
+#Workers only send back the pairing and its outcome counts, which are merged into the standings in the parent process.
+import os
+import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import game_actions
+from simulation import SelfPlaySimulator, POLICIES
+
+#Points given for each outcome, like a chess tournament
+WIN_POINTS = 1
+TIE_POINTS = 0.5
+
+class TournamentShard:
+    def __init__(self, x_policy_name: str, o_policy_name: str, game_count: int, seed: int, board_size: int, winning_length: int):
+        """
+            Describes games between two policies that a single worker plays
+            seed: the seed the policies are created with. Every shard gets its own, so results do not depend on how many workers there are
+        """
+        self.x_policy_name = x_policy_name
+        self.o_policy_name = o_policy_name
+        self.game_count = game_count
+        self.seed = seed
+        self.board_size = board_size
+        self.winning_length = winning_length
+
+def play_tournament_shard(shard: TournamentShard):
+    """Plays the shard's games and returns (x_policy_name, o_policy_name, x_wins, o_wins, ties, move_count). This runs in the worker processes"""
+    simulator = SelfPlaySimulator(
+        POLICIES[shard.x_policy_name](2*shard.seed),
+        POLICIES[shard.o_policy_name](2*shard.seed + 1),
+        concurrent_game_count=min(shard.game_count, 1000),
+        board_size=shard.board_size,
+        winning_length=shard.winning_length
+    )
+    results = simulator.run(shard.game_count)
+    counts = results.outcome_counts
+    return shard.x_policy_name, shard.o_policy_name, counts['X'], counts['O'], counts[game_actions.TIE], results.move_count
+
+class Standing:
+    def __init__(self, policy_name: str):
+        """Keeps the record of a policy over the tournament"""
+        self.policy_name = policy_name
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+
+    def compute_game_count(self):
+        return self.wins + self.losses + self.ties
+
+    def compute_points(self):
+        return WIN_POINTS*self.wins + TIE_POINTS*self.ties
+
+    def __str__(self) -> str:
+        return f"{self.policy_name}: {self.compute_points():g} points ({self.wins} wins, {self.losses} losses, {self.ties} ties)"
+
+class TournamentResults:
+    def __init__(self, policy_names):
+        """Merges the results of shards into standings for each policy"""
+        self.standings = {policy_name: Standing(policy_name) for policy_name in policy_names}
+        self.game_count = 0
+        self.move_count = 0
+        self.elapsed_time = 0.0
+
+    def merge_shard_result(self, shard_result):
+        """Adds a result returned by play_tournament_shard to the standings"""
+        x_policy_name, o_policy_name, x_wins, o_wins, ties, move_count = shard_result
+        x_standing = self.standings[x_policy_name]
+        o_standing = self.standings[o_policy_name]
+        x_standing.wins += x_wins
+        x_standing.losses += o_wins
+        x_standing.ties += ties
+        o_standing.wins += o_wins
+        o_standing.losses += x_wins
+        o_standing.ties += ties
+        self.game_count += x_wins + o_wins + ties
+        self.move_count += move_count
+
+    def compute_ranked_standings(self):
+        """Returns the standings from the most to the fewest points, breaking ties by name"""
+        return sorted(self.standings.values(), key=lambda standing: (-standing.compute_points(), standing.policy_name))
+
+    def __str__(self) -> str:
+        lines = [f"{self.game_count} games and {self.move_count} moves in {self.elapsed_time:.2f}s ({self.game_count/self.elapsed_time:.0f} games/s)"]
+        lines += [f"{rank}. {standing}" for rank, standing in enumerate(self.compute_ranked_standings(), 1)]
+        return "\n".join(lines)
+
+def create_tournament_shards(policy_names, games_per_pairing: int, *, shard_game_count: int, board_size: int, winning_length: int, seed: int = 0):
+    """
+        Returns the shards of a round robin where every ordered pair of different policies plays games_per_pairing games
+        shard_game_count: must be assigned values explicitly. The most games in a shard. Smaller shards balance the load across workers better
+        board_size: must be assigned values explicitly
+        winning_length: must be assigned values explicitly
+        seed: must be assigned values explicitly. The seed the shard seeds are counted up from
+    """
+    shards = []
+    for x_policy_name, o_policy_name in itertools.permutations(policy_names, 2):
+        for first_game in range(0, games_per_pairing, shard_game_count):
+            game_count = min(shard_game_count, games_per_pairing - first_game)
+            shards.append(TournamentShard(x_policy_name, o_policy_name, game_count, seed + len(shards), board_size, winning_length))
+    return shards
+
+def run_tournament(policy_names, games_per_pairing: int, *, worker_count: int = None, shard_game_count: int = 1000,
+                   board_size: int = game_actions.DEFAULT_BOARD_SIZE, winning_length: int = game_actions.DEFAULT_WINNING_LENGTH, seed: int = 0):
+    """
+        Plays a round robin between the policies named in simulation.POLICIES across worker processes and returns the TournamentResults
+        worker_count: must be assigned values explicitly. The number of worker processes. Defaults to the number of processors
+        shard_game_count: must be assigned values explicitly. The most games a worker plays for one task
+        board_size: must be assigned values explicitly
+        winning_length: must be assigned values explicitly
+        seed: must be assigned values explicitly
+    """
+    shards = create_tournament_shards(policy_names, games_per_pairing, shard_game_count=shard_game_count, board_size=board_size, winning_length=winning_length, seed=seed)
+    results = TournamentResults(policy_names)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        #Results are merged as they stream back, in shard order so the merge does not depend on scheduling
+        for shard_result in executor.map(play_tournament_shard, shards):
+            results.merge_shard_result(shard_result)
+    results.elapsed_time = time.perf_counter() - start
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(prog='tournament.py', description='Plays a round robin between move policies across worker processes and prints the standings.')
+    parser.add_argument("policies", nargs="*", help=f"the policies in the tournament. Options: {', '.join(POLICIES)}. Every policy if unspecified")
+    parser.add_argument("--games", type=int, default=10000, help="the number of games each ordered pair of policies plays")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="the number of worker processes")
+    parser.add_argument("--shard-games", type=int, default=1000, help="the most games a worker plays for one task")
+    parser.add_argument("--board-size", type=int, default=game_actions.DEFAULT_BOARD_SIZE)
+    parser.add_argument("--winning-length", type=int, default=game_actions.DEFAULT_WINNING_LENGTH)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    policy_names = list(dict.fromkeys(arguments.policies)) if arguments.policies else list(POLICIES)
+    for policy_name in policy_names:
+        if policy_name not in POLICIES:
+            print(f"Unknown policy {policy_name}!")
+            sys.exit(1)
+    if len(policy_names) < 2:
+        print("A tournament needs at least 2 different policies.")
+        sys.exit(1)
+    if not game_actions.is_valid_board_configuration(arguments.board_size, arguments.winning_length):
+        print("The board size and winning length are not a valid board configuration.")
+        sys.exit(1)
+    is_standard_board = arguments.board_size == game_actions.DEFAULT_BOARD_SIZE and arguments.winning_length == game_actions.DEFAULT_WINNING_LENGTH
+    if "perfect" in policy_names and not is_standard_board:
+        print("The perfect policy only plays on the standard 3 by 3 board.")
+        sys.exit(1)
+    print(run_tournament(
+        policy_names,
+        arguments.games,
+        worker_count=arguments.workers,
+        shard_game_count=arguments.shard_games,
+        board_size=arguments.board_size,
+        winning_length=arguments.winning_length,
+        seed=arguments.seed
+    ))
+
+if __name__ == '__main__':
+    main()